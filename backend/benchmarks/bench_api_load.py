@@ -0,0 +1,397 @@
+"""Load and latency benchmark of every API route, driven in-process.
+
+The ASGI app runs in this process behind an httpx client, with the MOSTLY
+AI and Groq clients replaced by fakes that answer after a fixed delay, so
+the numbers measure the API itself: routing, validation, the event loop,
+serialization and compression. Each route is loaded on its own with
+``--concurrency`` clients for ``--requests`` requests; the report holds
+p50/p95/p99 latency and throughput per route. Run from the backend
+directory:
+
+    python -m benchmarks.bench_api_load --concurrency 16 --requests 200 --output load.json
+    python -m benchmarks.bench_api_load --baseline load.json
+
+With ``--baseline``, a route regresses when its p95 grows, or its
+throughput drops, by more than ``--tolerance``; any regression fails the run.
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import platform
+import multiprocessing
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+
+# Long-lived and destructive routes are not load tested
+SKIPPED_ROUTES = (
+    "GET /api/synthetic/jobs/{job_id}/events",
+    "GET /api/training/jobs/{job_id}/events",
+    "GET /api/jobs/events",
+    "DELETE /api/synthetic/datasets/{dataset_id}",
+)
+
+SEED_TIMEOUT_SECONDS = 300
+
+
+class FakeGenerator:
+    def __init__(self, data):
+        self.id = str(uuid.uuid4())
+        self.data = data
+
+    def export_to_file(self, directory: str) -> str:
+        path = os.path.join(directory, f"{self.id}.zip")
+        with open(path, "wb") as f:
+            f.write(b"bench")
+        return path
+
+
+class FakeGenerators:
+    def __init__(self, registry: Dict[str, FakeGenerator]):
+        self.registry = registry
+
+    def get(self, generator_id: str) -> FakeGenerator:
+        return self.registry[generator_id]
+
+    def import_from_file(self, path: str) -> FakeGenerator:
+        # Generators are trained in other job processes; every one was trained on the base history
+        from services.shipment_history import load_base_shipments
+
+        return FakeGenerator(load_base_shipments())
+
+
+class FakeMostlyAI:
+    """Trains instantly and samples synthetic rows from the training data"""
+
+    latency = 0.0
+    registry: Dict[str, FakeGenerator] = {}
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.generators = FakeGenerators(self.registry)
+
+    def train(self, data, **config) -> FakeGenerator:
+        time.sleep(self.latency)
+        generator = FakeGenerator(data)
+        self.registry[generator.id] = generator
+        return generator
+
+    def generate(self, generator: FakeGenerator, size: int):
+        time.sleep(self.latency)
+        return generator.data.sample(size, replace=True, random_state=0).reset_index(drop=True)
+
+
+class FakeGroqBackend:
+    """Answers every completion after ``latency`` seconds without blocking the loop"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def complete(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if "weight" in messages[0]["content"]:
+            return '{"cost": 0.3, "time": 0.3, "reliability": 0.25, "risk": 0.15}'
+        return '{"name": "Bench scenario", "stressFactors": ["capacity_reduction"]}'
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    path: str
+    # Request keyword arguments for the i-th request
+    request: Callable[[int], Dict[str, Any]] = lambda i: {}
+    expected_status: int = 200
+    # Routes that queue background work run last so they do not load the others
+    submits_jobs: bool = False
+
+
+@dataclass
+class Fixtures:
+    job_id: str = ""
+    dataset_id: str = ""
+    training_job_id: str = ""
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    upload: bytes = b""
+
+
+def ranking_lanes(lane_count: int, alternatives: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    return [
+        {
+            "laneId": f"lane-{lane}",
+            "alternatives": [
+                {
+                    "id": f"carrier-{k}",
+                    "cost": float(rng.uniform(1000, 5000)),
+                    "time": float(rng.uniform(2, 20)),
+                    "reliability": float(rng.uniform(0.7, 1.0)),
+                    "risk": float(rng.uniform(0.0, 0.3)),
+                }
+                for k in range(alternatives)
+            ],
+        }
+        for lane in range(lane_count)
+    ]
+
+
+def build_routes(fixtures: Fixtures) -> List[Route]:
+    rng = np.random.default_rng(0)
+    weights = {"cost": 0.3, "time": 0.3, "reliability": 0.25, "risk": 0.15}
+    lanes = ranking_lanes(50, 6, rng)
+    config = {"baseDatasetSize": 1000, "syntheticRatio": 1.0, "privacyLevel": "medium", "scenarioType": "historical"}
+    return [
+        Route("health", "GET", "/health"),
+        Route("metrics", "GET", "/metrics"),
+        Route("generation_job", "GET", f"/api/synthetic/jobs/{fixtures.job_id}"),
+        Route("dataset", "GET", f"/api/synthetic/datasets/{fixtures.job_id}"),
+        Route("dataset_metadata", "GET", f"/api/synthetic/datasets/{fixtures.job_id}?includeRecords=false"),
+        Route("dataset_rows", "GET", f"/api/synthetic/datasets/{fixtures.dataset_id}/rows?limit=1000"),
+        Route("dataset_rows_ndjson", "GET", f"/api/synthetic/datasets/{fixtures.dataset_id}/rows?format=ndjson"),
+        Route("dataset_rows_arrow", "GET", f"/api/synthetic/datasets/{fixtures.dataset_id}/rows?format=arrow"),
+        Route("datasets", "GET", "/api/synthetic/datasets"),
+        Route("generation_stats", "GET", "/api/synthetic/stats"),
+        Route("training_job", "GET", f"/api/training/jobs/{fixtures.training_job_id}"),
+        Route("training_jobs", "GET", "/api/training/jobs"),
+        Route("weights_latest", "GET", "/api/training/weights/latest"),
+        Route("weights", "GET", "/api/training/weights/bench"),
+        Route("weights_save", "POST", "/api/training/weights/bench", lambda i: {"json": weights}),
+        Route("training_stats", "GET", "/api/training/stats"),
+        Route("rank", "POST", "/api/rank", lambda i: {"json": {"lanes": lanes}}),
+        Route("rank_neutrosophic", "POST", "/api/rank", lambda i: {"json": {"lanes": lanes, "method": "neutrosophic"}}),
+        Route("rank_sensitivity", "POST", "/api/rank/sensitivity", lambda i: {"json": {"lanes": lanes[:5], "seed": i}}),
+        Route("quotes_score", "POST", "/api/quotes/score", lambda i: {
+            "files": {"file": ("shipments.tsv", fixtures.upload, "text/tab-separated-values")}
+        }),
+        Route("forecast_lanes", "GET", "/api/forecast/lanes"),
+        Route("lanes", "GET", "/api/lanes"),
+        # Distinct prompts so every request reaches the (fake) Groq backend
+        Route("groq_optimize_weights", "POST", "/api/groq/optimize-weights", lambda i: {"json": {
+            "currentWeights": weights, "historicalData": fixtures.records[:5], "optimizationGoal": f"goal-{i}"
+        }}),
+        Route("groq_generate_scenario", "POST", "/api/groq/generate-scenario", lambda i: {"json": {
+            "baseScenario": f"port closure {i}"
+        }}),
+        Route("groq_analyze_dataset", "POST", "/api/groq/analyze-dataset", lambda i: {"json": fixtures.records}),
+        # Distinct requests so each one creates a job rather than joining an active duplicate
+        Route("generate", "POST", "/api/synthetic/generate", lambda i: {"json": {
+            **config, "baseDatasetSize": 100 + i
+        }}, submits_jobs=True),
+        Route("generate_duplicate", "POST", "/api/synthetic/generate", lambda i: {"json": config}, submits_jobs=True),
+        Route("training_start", "POST", "/api/training/start", lambda i: {"json": {
+            "datasetId": fixtures.dataset_id, "weights": {**weights, "risk": round(0.15 - i * 1e-4, 6)}
+        }}, submits_jobs=True),
+        Route("scenario_peak_season", "POST", "/api/scenarios/peak_season", submits_jobs=True),
+        Route("scenario_supply_disruption", "POST", "/api/scenarios/supply_disruption", submits_jobs=True),
+        Route("scenario_economic_downturn", "POST", "/api/scenarios/economic_downturn", submits_jobs=True),
+    ]
+
+
+def percentile_ms(latencies: np.ndarray, q: float) -> float:
+    return float(np.percentile(latencies, q) * 1000) if len(latencies) else float("nan")
+
+
+async def load_route(client, route: Route, requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """Send ``requests`` requests from ``concurrency`` concurrent clients and summarize them"""
+    for i in range(warmup):
+        await client.request(route.method, route.path, **route.request(i))
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            kwargs = route.request(i)
+            start = time.perf_counter()
+            response = await client.request(route.method, route.path, **kwargs)
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != route.expected_status:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    values = np.array(latencies)
+    return {
+        "method": route.method,
+        "path": route.path.split("?")[0],
+        "requests": len(values),
+        "errors": errors,
+        "p50Ms": percentile_ms(values, 50),
+        "p95Ms": percentile_ms(values, 95),
+        "p99Ms": percentile_ms(values, 99),
+        "maxMs": float(values.max() * 1000) if len(values) else float("nan"),
+        "throughputRps": len(values) / elapsed if elapsed > 0 else float("nan"),
+    }
+
+
+async def wait_for(client, path: str) -> Dict[str, Any]:
+    deadline = time.monotonic() + SEED_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = (await client.get(path)).json()
+        if job["status"] == "completed":
+            return job
+        if job["status"] == "failed":
+            raise SystemExit(f"seeding job {path} failed: {job.get('error')}")
+        await asyncio.sleep(0.2)
+    raise SystemExit(f"seeding job {path} did not finish within {SEED_TIMEOUT_SECONDS}s")
+
+
+async def seed(client) -> Fixtures:
+    """Create the dataset, training job and weight matrix the read routes need"""
+    from services.shipment_history import load_base_shipments
+
+    fixtures = Fixtures()
+    response = await client.post("/api/synthetic/generate", json={
+        "baseDatasetSize": 1000, "syntheticRatio": 10.0, "privacyLevel": "medium", "scenarioType": "historical"
+    })
+    response.raise_for_status()
+    fixtures.job_id = response.json()["id"]
+    await wait_for(client, f"/api/synthetic/jobs/{fixtures.job_id}")
+    fixtures.dataset_id = (await client.get(f"/api/synthetic/datasets/{fixtures.job_id}?includeRecords=false")).json()["id"]
+
+    weights = {"cost": 0.3, "time": 0.3, "reliability": 0.25, "risk": 0.15}
+    (await client.post("/api/training/weights/bench", json=weights)).raise_for_status()
+    response = await client.post("/api/training/start", json={"datasetId": fixtures.dataset_id, "weights": weights})
+    response.raise_for_status()
+    fixtures.training_job_id = response.json()["id"]
+    await wait_for(client, f"/api/training/jobs/{fixtures.training_job_id}")
+
+    base = load_base_shipments()
+    fixtures.records = json.loads(base.head(200).to_json(orient="records"))
+    buffer = io.StringIO()
+    base.to_csv(buffer, sep="\t", index=False)
+    fixtures.upload = buffer.getvalue().encode()
+    return fixtures
+
+
+def configure_environment(workdir: str) -> None:
+    """Point every store at a scratch directory before the app is imported"""
+    os.environ.update(
+        JOB_BACKEND="local",
+        JOB_STORE_URL=f"sqlite:///{workdir}/jobs.db",
+        DATASET_DIR=os.path.join(workdir, "datasets"),
+        GENERATOR_CACHE_DIR=os.path.join(workdir, "generator_cache"),
+        MOSTLY_API_KEY="bench",
+        SERVICE_WARMUP="false",
+        # Job-submitting routes are measured for their latency, not for backpressure
+        GENERATION_QUEUE_CAPACITY=str(10 ** 6),
+    )
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+    import main
+    import services.generation_worker as generation_worker
+    import services.job_supervisor as job_supervisor
+    from services.dependencies import get_groq_service
+    from services.groq_service import GroqService
+    from services.llm_client import LLMClient
+
+    # The API starts job processes from a fork server, which would import the real
+    # client; forking them from this process lets them inherit the patched one
+    job_supervisor.job_processes = multiprocessing.get_context("fork")
+    FakeMostlyAI.latency = args.mostly_latency
+    generation_worker.MostlyAI = FakeMostlyAI
+    groq_backend = FakeGroqBackend(args.groq_latency)
+    groq_service = GroqService(LLMClient(groq_backend))
+    main.app.dependency_overrides[get_groq_service] = lambda: groq_service
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            fixtures = await seed(client)
+            routes = sorted(build_routes(fixtures), key=lambda route: route.submits_jobs)
+            if args.routes:
+                routes = [route for route in routes if any(name in route.name for name in args.routes)]
+
+            results = {}
+            for route in routes:
+                results[route.name] = await load_route(client, route, args.requests, args.concurrency, args.warmup)
+                summary = results[route.name]
+                print(
+                    f"{route.name:<28} p50={summary['p50Ms']:8.1f}ms p95={summary['p95Ms']:8.1f}ms "
+                    f"p99={summary['p99Ms']:8.1f}ms {summary['throughputRps']:8.1f} req/s"
+                    + (f" errors={summary['errors']}" if summary["errors"] else "")
+                )
+
+    return {
+        "meta": {
+            "createdAt": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "mostlyLatencySeconds": args.mostly_latency,
+            "groqLatencySeconds": args.groq_latency,
+            "skipped": list(SKIPPED_ROUTES),
+        },
+        "routes": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Routes whose p95 latency or throughput is worse than the baseline by more than ``tolerance``"""
+    regressions = []
+    for name, current in report["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if previous is None:
+            continue
+        p95_change = current["p95Ms"] / previous["p95Ms"] - 1
+        rps_change = current["throughputRps"] / previous["throughputRps"] - 1
+        print(f"{name:<28} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}")
+        if p95_change > tolerance:
+            regressions.append(f"{name}: p95 {previous['p95Ms']:.1f}ms -> {current['p95Ms']:.1f}ms")
+        if rps_change < -tolerance:
+            regressions.append(f"{name}: throughput {previous['throughputRps']:.0f} -> {current['throughputRps']:.0f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per route")
+    parser.add_argument("--routes", nargs="*", help="only load routes whose name contains one of these")
+    parser.add_argument("--mostly-latency", type=float, default=0.0, help="seconds the fake MOSTLY AI client takes per call")
+    parser.add_argument("--groq-latency", type=float, default=0.05, help="seconds the fake Groq backend takes per completion")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against a report written by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95/throughput regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(workdir)
+        report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            raise SystemExit("regressed against baseline:\n  " + "\n  ".join(regressions))
+
+    failed = {name: summary["errors"] for name, summary in report["routes"].items() if summary["errors"]}
+    if failed:
+        raise SystemExit(f"unexpected status codes: {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark API cold start: importing main and serving the first /health.
+
+Each run starts a fresh interpreter without API keys, as a new pod would
+before its secrets are needed. Run from the backend directory:
+
+    python -m benchmarks.bench_cold_start --repeat 5
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# Modules that belong to first use of a service, never to startup
+DEFERRED_MODULES = ("pandas", "numpy", "pyarrow", "mostlyai", "groq", "celery")
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/health").status_code
+    ready = time.perf_counter()
+    loaded = [m for m in %r if m in sys.modules]
+print(json.dumps({"import": imported - start, "ready": ready - start, "status": status, "loaded": loaded}))
+"""
+
+
+def cold_start(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE % (DEFERRED_MODULES,)],
+        env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.5, help="fail if the best time to first /health exceeds this many seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {k: v for k, v in os.environ.items() if k not in ("MOSTLY_API_KEY", "GROQ_API_KEY")}
+        env.update(
+            JOB_STORE_URL=f"sqlite:///{workdir}/jobs.db",
+            DATASET_DIR=os.path.join(workdir, "datasets"),
+            SERVICE_WARMUP="false",
+        )
+        runs = [cold_start(env) for _ in range(args.repeat)]
+
+    imports = [run["import"] for run in runs]
+    ready = [run["ready"] for run in runs]
+    print(f"import best={min(imports) * 1000:.0f}ms median={np.median(imports) * 1000:.0f}ms")
+    print(f"first /health best={min(ready) * 1000:.0f}ms median={np.median(ready) * 1000:.0f}ms")
+    if any(run["status"] != 200 for run in runs):
+        raise SystemExit("/health did not answer 200 on a cold start")
+    loaded = sorted({module for run in runs for module in run["loaded"]})
+    if loaded:
+        raise SystemExit(f"startup imported {', '.join(loaded)}; these belong to first service use")
+    if min(ready) > args.budget:
+        raise SystemExit(f"cold start took {min(ready):.3f}s, budget is {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
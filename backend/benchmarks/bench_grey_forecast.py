@@ -0,0 +1,44 @@
+"""Benchmark grey-model lane forecasting on resampled shipment history.
+
+Every resampled row is assigned to one of ``--lanes`` random lanes, so the
+fit covers that many series at once.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_grey_forecast --lanes 500 --rows 20000
+"""
+import argparse
+import time
+import numpy as np
+from services.grey_forecast import forecast_lanes
+from services.shipment_history import load_base_shipments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--lanes", type=int, default=500)
+    parser.add_argument("--horizon", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.0, help="fail if the best run exceeds this many seconds")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = load_base_shipments()
+    df = base.sample(n=args.rows, replace=True, random_state=0).reset_index(drop=True)
+    df["destination_country"] = rng.integers(0, args.lanes, len(df)).astype(str)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        forecasts = forecast_lanes(df, "costPerKg", args.horizon)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"rows={args.rows} lanes={len(forecasts)} best={best * 1000:.1f}ms median={np.median(timings) * 1000:.1f}ms")
+    if best > args.budget:
+        raise SystemExit(f"grey forecasting took {best:.3f}s, budget is {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Benchmark privacy metric computation on resampled shipment history.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_privacy_metrics --rows 100000
+"""
+import argparse
+import time
+import numpy as np
+from services.privacy_metrics import compute_privacy_metrics
+from services.shipment_history import load_base_shipments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="fail if the best run exceeds this many seconds")
+    args = parser.parse_args()
+
+    base = load_base_shipments()
+    df = base.sample(n=args.rows, replace=True, random_state=0).reset_index(drop=True)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        metrics = compute_privacy_metrics(df)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"rows={args.rows} best={best * 1000:.1f}ms median={np.median(timings) * 1000:.1f}ms")
+    print(f"metrics={metrics}")
+    if best > args.budget:
+        raise SystemExit(f"privacy metrics took {best:.3f}s, budget is {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
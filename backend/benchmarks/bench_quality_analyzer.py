@@ -0,0 +1,39 @@
+"""Benchmark synthetic-data quality analysis on resampled shipment history.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_quality_analyzer --rows 10000
+"""
+import argparse
+import time
+import numpy as np
+from services.quality_analyzer import analyze_quality, reference_profile
+from services.shipment_history import load_base_shipments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="fail if the best run exceeds this many seconds")
+    args = parser.parse_args()
+
+    reference = reference_profile()
+    base = load_base_shipments()
+    df = base.sample(n=args.rows, replace=True, random_state=0).reset_index(drop=True)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        report = analyze_quality(df, reference)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"rows={args.rows} best={best * 1000:.1f}ms median={np.median(timings) * 1000:.1f}ms")
+    print(f"qualityScore={report['qualityScore']} analysis={report['analysis']}")
+    if best > args.budget:
+        raise SystemExit(f"quality analysis took {best:.3f}s, budget is {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Benchmark Monte Carlo weight sensitivity on random lanes.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sensitivity --samples 10000 --lanes 500
+"""
+import argparse
+import time
+import numpy as np
+from services.mcda import topsis_gaps
+from services.sensitivity import weight_sensitivity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=10_000)
+    parser.add_argument("--lanes", type=int, default=500)
+    parser.add_argument("--alternatives", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=5.0, help="fail if the best run exceeds this many seconds")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.random((args.lanes, args.alternatives, 4))
+    # Pad a third of the lanes so ragged batches are exercised
+    matrix[::3, args.alternatives // 2:] = np.nan
+    weights = np.array([0.35, 0.35, 0.2, 0.1])
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = weight_sensitivity(topsis_gaps(matrix), weights, args.samples, 50.0, 100, seed=0)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    stability = result["rankProbabilities"][np.arange(args.lanes), result["baseWinner"], 0]
+    print(f"samples={args.samples} lanes={args.lanes} best={best * 1000:.1f}ms median={np.median(timings) * 1000:.1f}ms")
+    print(f"mean winner stability={stability.mean():.3f}")
+    if best > args.budget:
+        raise SystemExit(f"sensitivity analysis took {best:.3f}s, budget is {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark serializing and compressing large dataset payloads.
+
+Compares the validated pydantic + stdlib json path against the orjson
+response used by the dataset routes, per 100k rows. Run from the backend
+directory:
+
+    python -m benchmarks.bench_serialization --rows 100000
+"""
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+import numpy as np
+from models.schemas import SyntheticDataset, DatasetMetadata, PrivacyMetrics
+from services.compression import compress, supported_encodings
+from services.serialization import FastJSONResponse, dumps_lines
+
+COUNTRIES = ["Kenya", "Nigeria", "Ghana", "Ethiopia", "Uganda", "Zambia", "Malawi", "Sudan"]
+CARRIERS = ["Kenya Airways", "Ethiopian Airlines", "DHL", "Maersk", "Kuehne Nagel"]
+
+
+def synthetic_rows(count: int, rng: np.random.Generator):
+    """Rows shaped like generated shipment records"""
+    start = datetime(2024, 1, 1)
+    origin = rng.integers(len(COUNTRIES), size=count)
+    destination = rng.integers(len(COUNTRIES), size=count)
+    carrier = rng.integers(len(CARRIERS), size=count)
+    weight = rng.gamma(2.0, 400.0, size=count)
+    cost = weight * rng.uniform(2.0, 9.0, size=count)
+    days = rng.integers(0, 365, size=count)
+    return [
+        {
+            "request_reference": f"SR_{i:06d}",
+            "origin_country": COUNTRIES[origin[i]],
+            "destination_country": COUNTRIES[destination[i]],
+            "carrier": CARRIERS[carrier[i]],
+            "weight_kg": float(weight[i]),
+            "carrier_cost": float(cost[i]),
+            "item_category": "Pharmaceuticals" if i % 3 else "Emergency Health Kits",
+            "date_of_collection": (start + timedelta(days=int(days[i]))).strftime("%d-%b-%y"),
+            "delivery_status": "Delivered",
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=0.5, help="fail if orjson serialization of 100k rows exceeds this many seconds")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, np.random.default_rng(0))
+    metadata = DatasetMetadata(
+        generatedAt=datetime.utcnow(), recordCount=len(rows), sourceHash="0" * 64, scenario="baseline",
+        privacyMetrics=PrivacyMetrics(kAnonymity=5, lDiversity=2, tCloseness=0.1),
+        columns=list(rows[0])
+    )
+    dataset = SyntheticDataset(id="bench", jobId="bench", metadata=metadata)
+    dataset.records = rows
+    scale = 100_000 / args.rows
+
+    def validated_stdlib():
+        model = SyntheticDataset.model_validate(dataset.model_dump())
+        return json.dumps(model.model_dump(mode="json")).encode()
+
+    def fast():
+        return FastJSONResponse(dataset).body
+
+    def ndjson_stdlib():
+        return ("\n".join(json.dumps(row, default=str) for row in rows) + "\n").encode()
+
+    stdlib_time = best_of(args.repeat, validated_stdlib)
+    fast_time = best_of(args.repeat, fast)
+    ndjson_stdlib_time = best_of(args.repeat, ndjson_stdlib)
+    ndjson_fast_time = best_of(args.repeat, lambda: dumps_lines(rows))
+    body = fast()
+
+    print(f"rows={args.rows} body={len(body) / 1e6:.1f}MB")
+    print(f"json   pydantic+stdlib: {stdlib_time * scale * 1000:.0f}ms/100k rows")
+    print(f"json   orjson:          {fast_time * scale * 1000:.0f}ms/100k rows ({stdlib_time / fast_time:.1f}x)")
+    print(f"ndjson stdlib:          {ndjson_stdlib_time * scale * 1000:.0f}ms/100k rows")
+    print(f"ndjson orjson:          {ndjson_fast_time * scale * 1000:.0f}ms/100k rows ({ndjson_stdlib_time / ndjson_fast_time:.1f}x)")
+    for encoding in supported_encodings():
+        compressed = compress(body, encoding)
+        seconds = best_of(args.repeat, lambda: compress(body, encoding))
+        print(f"{encoding:<6} {seconds * scale * 1000:.0f}ms/100k rows, ratio {len(body) / len(compressed):.1f}x")
+
+    if fast_time * scale > args.budget:
+        raise SystemExit(f"orjson serialization took {fast_time * scale:.3f}s per 100k rows, budget is {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
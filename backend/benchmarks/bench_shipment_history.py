@@ -0,0 +1,65 @@
+"""Benchmark loading a large shipment history: parsing the TSV vs the memory-mapped cache.
+
+The base shipments are tiled to ``--rows`` rows in a temporary file. Run
+from the backend directory:
+
+    python -m benchmarks.bench_shipment_history --rows 1000000
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from services.shipment_features import BASE_DATA_PATH
+from services.shipment_history import ShipmentHistory
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=0.05, help="fail if mapping the cached table exceeds this many seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        base = pd.read_csv(BASE_DATA_PATH, sep="\t", dtype=str)
+        tiled = base.iloc[np.arange(args.rows) % len(base)]
+        path = os.path.join(workdir, "shipments.tsv")
+        tiled.to_csv(path, sep="\t", index=False)
+        print(f"rows={args.rows} source={os.path.getsize(path) / 1e6:.0f}MB")
+
+        parse_time = best_of(args.repeat, lambda: pd.read_csv(path, sep="\t"))
+        print(f"pd.read_csv per job:    {parse_time * 1000:.0f}ms (numbers still text)")
+
+        history = ShipmentHistory(os.path.join(workdir, "cache"))
+        start = time.perf_counter()
+        history.table(path)
+        print(f"first load (parse+write): {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        def cold_map():
+            # A new process: stat, hash and map the existing file
+            return ShipmentHistory(history.directory).table(path)
+
+        map_time = best_of(args.repeat, cold_map)
+        warm_time = best_of(args.repeat, lambda: history.table(path))
+        frame_time = best_of(args.repeat, lambda: history.frame(path))
+        print(f"new process (hash+map):   {map_time * 1000:.0f}ms")
+        print(f"warm table:               {warm_time * 1000:.3f}ms")
+        print(f"warm DataFrame:           {frame_time * 1000:.0f}ms")
+
+        if warm_time > args.budget:
+            raise SystemExit(f"mapping the cached history took {warm_time:.3f}s, budget is {args.budget:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
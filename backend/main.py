@@ -1,29 +1,94 @@
 
 import os
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form, BackgroundTasks
+import asyncio
+from datetime import datetime
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, BackgroundTasks, Query, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Literal
+
+# Load environment variables before any service reads its configuration
+load_dotenv()
 
 from models.schemas import (
-    SyntheticDataConfig, GenerationJob, SyntheticDataset,
+    SyntheticDataConfig, GenerationJob, SyntheticDataset, DatasetPage, JobStatus,
     TrainingJobRequest, TrainingJob, WeightVector,
-    GroqOptimizationRequest, GroqScenarioRequest
+    GroqOptimizationRequest, GroqScenarioRequest,
+    RankingRequest, RankingResponse, SensitivityRequest, SensitivityResponse, QuoteScoringResponse,
+    LaneForecastResponse, LaneIndexResponse
 )
-from services.mostly_service import mostly_service
-from services.groq_service import groq_service
-from services.training_service import training_service
+# Services are created on first use so the app imports and starts without
+# pandas, model SDKs or API keys; see services/dependencies.py
+from services.dependencies import (
+    ServiceUnavailable, get_job_store, get_mostly_service, get_scenario_pool, get_training_service, get_ranking_service,
+    get_quote_service, get_forecast_service, get_lane_service, get_groq_service, get_quality_service, warm_up, close_all
+)
+from services.job_events import job_events, sse_stream, HEARTBEAT_SECONDS, TERMINAL_STATUSES
+from services.job_stats import job_stats
+from services.serialization import FastJSONResponse, records_response
+from services.compression import CompressionMiddleware
+from services.metrics import MetricsMiddleware, loop_lag_monitor, registry as metrics_registry
+from services.workers import JOB_BACKEND, GenerationQueueFull
+from services.job_submissions import IdempotencyKeyReused, SubmissionInProgress
+from services.job_supervisor import PROCESS_ID, reap_abandoned_jobs, recover_orphaned_jobs, report_alive
+from services.scenario_pool import SCENARIO_POOL_SIZE, warm_scenario_pool
+
+# Create services in the background once the app is serving
+SERVICE_WARMUP = os.getenv("SERVICE_WARMUP", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    store = get_job_store()
+    # Local jobs left by a process that died can never finish. Other API workers,
+    # or the old ones of a rolling restart, still run theirs. Celery jobs outlive
+    # API processes and are redelivered by the broker
+    heartbeat = None
+    if JOB_BACKEND == "local":
+        store.touch_process(PROCESS_ID, datetime.utcnow())
+        recover_orphaned_jobs(store)
+        heartbeat = asyncio.create_task(report_alive(store))
+    # Stats are seeded after recovery so the failures above are counted once
+    job_stats.load(store)
+    job_events.listen(job_stats.on_job_event)
+    job_events.start_relay()
+    loop_lag_monitor.start()
+    warming = asyncio.create_task(asyncio.to_thread(warm_up)) if SERVICE_WARMUP else None
+    reaper = asyncio.create_task(reap_abandoned_jobs())
+    warmer = asyncio.create_task(warm_scenario_pool()) if SCENARIO_POOL_SIZE > 0 else None
+    yield
+    reaper.cancel()
+    if heartbeat is not None:
+        heartbeat.cancel()
+    if warmer is not None:
+        warmer.cancel()
+    await loop_lag_monitor.stop()
+    await job_events.stop_relay()
+    if warming is not None:
+        await warming
+    close_all()
 
-# Load environment variables
-load_dotenv()
 
 app = FastAPI(
     title="DeepCAL++ API",
     description="Advanced multi-criteria optimization with synthetic data generation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Page sizes for JSON row paging; NDJSON/Arrow streams are unbounded
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+# Event streams must reach the client unbuffered
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Quote uploads beyond this size are rejected while they are read
+QUOTE_UPLOAD_MAX_BYTES = int(os.getenv("QUOTE_UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -33,44 +98,132 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/zstd for responses whose client accepts it
+app.add_middleware(CompressionMiddleware)
+
+# Outermost, so latencies include compression; labelled by route template
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
 # Health check
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "DeepCAL++ API"}
 
+# Prometheus metrics of this process
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(metrics_registry.render(), media_type=metrics_registry.content_type)
+
+def ensure_cancellable(job):
+    """404 for unknown jobs, 409 for jobs that already finished, cancelled ones included"""
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    return job
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """Read an upload in chunks; 413 as soon as it is known to exceed ``max_bytes``"""
+    too_large = HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+    chunks, size = [], 0
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def watch_all_jobs(kind: Optional[str]):
+    """Keep every unfinished job of a kind alive while a stream follows them all"""
+    for name, provider in (("generation", get_mostly_service), ("training", get_training_service)):
+        if kind in (None, name) and provider.created:
+            provider().supervisor.watch_all()
+
 # Synthetic Data Endpoints
 @app.post("/api/synthetic/generate", response_model=GenerationJob)
-async def start_synthetic_generation(config: SyntheticDataConfig):
-    """Start synthetic data generation job"""
+async def start_synthetic_generation(
+    config: SyntheticDataConfig,
+    idempotency_key: Optional[str] = Header(None),
+    mostly_service=Depends(get_mostly_service)
+):
+    """Start synthetic data generation job; retries and duplicates of an active job return that job"""
     try:
-        job = await mostly_service.start_generation(config)
+        job = await mostly_service.start_generation(config, idempotency_key)
         return job
+    except (GenerationQueueFull, IdempotencyKeyReused, SubmissionInProgress, ValueError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start generation: {str(e)}")
 
 @app.get("/api/synthetic/jobs/{job_id}", response_model=GenerationJob)
-async def get_generation_job_status(job_id: str):
+async def get_generation_job_status(job_id: str, mostly_service=Depends(get_mostly_service)):
     """Get generation job status"""
     job = await mostly_service.get_job_status(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    mostly_service.watch_job(job_id)
     return job
 
-@app.get("/api/synthetic/datasets/{job_id}", response_model=SyntheticDataset)
-async def get_synthetic_dataset(job_id: str):
+@app.post("/api/synthetic/jobs/{job_id}/cancel", response_model=GenerationJob)
+async def cancel_generation_job(job_id: str, mostly_service=Depends(get_mostly_service)):
+    """Cancel a pending or running generation job and stop its worker"""
+    ensure_cancellable(await mostly_service.get_job_status(job_id))
+    return await mostly_service.cancel_job(job_id)
+
+@app.get("/api/synthetic/jobs/{job_id}/events")
+async def stream_generation_job_events(job_id: str, mostly_service=Depends(get_mostly_service)):
+    """Server-Sent Events: the job's current state, then each change until it finishes"""
+    if not await mostly_service.get_job_status(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    events = job_events.subscribe(
+        "generation", job_id, snapshot=lambda: mostly_service.get_job_status(job_id), heartbeat=HEARTBEAT_SECONDS
+    )
+    stream = sse_stream(events, on_heartbeat=lambda: mostly_service.watch_job(job_id))
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/synthetic/datasets/{job_id}", response_model=SyntheticDataset, response_class=FastJSONResponse)
+async def get_synthetic_dataset(job_id: str, includeRecords: bool = False, mostly_service=Depends(get_mostly_service)):
     """Get synthetic dataset by job ID"""
-    dataset = await mostly_service.get_dataset(job_id)
+    dataset = await mostly_service.get_dataset(job_id, include_records=includeRecords)
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
-    return dataset
+    return records_response(dataset)
+
+@app.get("/api/synthetic/datasets/{dataset_id}/rows", response_class=FastJSONResponse)
+async def get_synthetic_dataset_rows(
+    dataset_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    columns: Optional[str] = None,
+    format: Literal["json", "ndjson", "arrow"] = "json",
+    mostly_service=Depends(get_mostly_service)
+):
+    """Page or stream dataset rows as JSON, NDJSON or Arrow IPC"""
+    projection = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    
+    if format == "json":
+        page = await mostly_service.read_dataset_page(
+            dataset_id, offset, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE), projection
+        )
+        if not page:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        return records_response(page)
+    
+    stream = await mostly_service.stream_dataset(dataset_id, format, offset, limit, projection)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    media_type = "application/vnd.apache.arrow.stream" if format == "arrow" else "application/x-ndjson"
+    return StreamingResponse(stream, media_type=media_type)
 
-@app.get("/api/synthetic/datasets", response_model=List[SyntheticDataset])
-async def list_synthetic_datasets():
-    """List all synthetic datasets"""
-    return await mostly_service.list_datasets()
+@app.get("/api/synthetic/datasets", response_model=List[SyntheticDataset], response_class=FastJSONResponse)
+async def list_synthetic_datasets(limit: Optional[int] = None, offset: int = 0, mostly_service=Depends(get_mostly_service)):
+    """List all synthetic datasets (metadata only; page rows via /rows)"""
+    return await mostly_service.list_datasets(limit=limit, offset=offset)
 
 @app.delete("/api/synthetic/datasets/{dataset_id}")
-async def delete_synthetic_dataset(dataset_id: str):
+async def delete_synthetic_dataset(dataset_id: str, mostly_service=Depends(get_mostly_service)):
     """Delete synthetic dataset"""
     success = await mostly_service.delete_dataset(dataset_id)
     if not success:
@@ -78,40 +231,64 @@ async def delete_synthetic_dataset(dataset_id: str):
     return {"message": "Dataset deleted successfully"}
 
 @app.get("/api/synthetic/stats")
-async def get_generation_stats():
+async def get_generation_stats(mostly_service=Depends(get_mostly_service)):
     """Get generation statistics"""
     return await mostly_service.get_generation_stats()
 
 # Training Endpoints
 @app.post("/api/training/start", response_model=TrainingJob)
-async def start_model_training(request: TrainingJobRequest):
-    """Start model training job"""
+async def start_model_training(
+    request: TrainingJobRequest,
+    idempotency_key: Optional[str] = Header(None),
+    training_service=Depends(get_training_service)
+):
+    """Start model training job; retries and duplicates of an active job return that job"""
     try:
-        job = await training_service.start_training(request)
+        job = await training_service.start_training(request, idempotency_key)
         return job
+    except (IdempotencyKeyReused, SubmissionInProgress, ValueError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start training: {str(e)}")
 
 @app.get("/api/training/jobs/{job_id}", response_model=TrainingJob)
-async def get_training_job_status(job_id: str):
+async def get_training_job_status(job_id: str, training_service=Depends(get_training_service)):
     """Get training job status"""
     job = await training_service.get_training_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Training job not found")
+    training_service.watch_job(job_id)
     return job
 
+@app.post("/api/training/jobs/{job_id}/cancel", response_model=TrainingJob)
+async def cancel_training_job(job_id: str, training_service=Depends(get_training_service)):
+    """Cancel a pending or running training job and stop its worker"""
+    ensure_cancellable(await training_service.get_training_job(job_id))
+    return await training_service.cancel_job(job_id)
+
+@app.get("/api/training/jobs/{job_id}/events")
+async def stream_training_job_events(job_id: str, training_service=Depends(get_training_service)):
+    """Server-Sent Events: the job's current state, then each change until it finishes"""
+    if not await training_service.get_training_job(job_id):
+        raise HTTPException(status_code=404, detail="Training job not found")
+    events = job_events.subscribe(
+        "training", job_id, snapshot=lambda: training_service.get_training_job(job_id), heartbeat=HEARTBEAT_SECONDS
+    )
+    stream = sse_stream(events, on_heartbeat=lambda: training_service.watch_job(job_id))
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.get("/api/training/jobs", response_model=List[TrainingJob])
-async def list_training_jobs():
+async def list_training_jobs(status: Optional[JobStatus] = None, limit: Optional[int] = None, offset: int = 0, training_service=Depends(get_training_service)):
     """List all training jobs"""
-    return await training_service.list_training_jobs()
+    return await training_service.list_training_jobs(status=status, limit=limit, offset=offset)
 
 @app.get("/api/training/weights/latest", response_model=WeightVector)
-async def get_latest_weights():
+async def get_latest_weights(training_service=Depends(get_training_service)):
     """Get latest trained weight vector"""
     return await training_service.get_latest_weights()
 
 @app.get("/api/training/weights/{matrix_id}", response_model=WeightVector)
-async def get_weight_matrix(matrix_id: str):
+async def get_weight_matrix(matrix_id: str, training_service=Depends(get_training_service)):
     """Get specific weight matrix"""
     weights = await training_service.get_weight_matrix(matrix_id)
     if not weights:
@@ -119,7 +296,7 @@ async def get_weight_matrix(matrix_id: str):
     return weights
 
 @app.post("/api/training/weights/{matrix_id}")
-async def save_weight_matrix(matrix_id: str, weights: WeightVector):
+async def save_weight_matrix(matrix_id: str, weights: WeightVector, training_service=Depends(get_training_service)):
     """Save weight matrix"""
     success = await training_service.save_weight_matrix(matrix_id, weights)
     if not success:
@@ -127,13 +304,73 @@ async def save_weight_matrix(matrix_id: str, weights: WeightVector):
     return {"message": "Weight matrix saved successfully"}
 
 @app.get("/api/training/stats")
-async def get_training_stats():
+async def get_training_stats(training_service=Depends(get_training_service)):
     """Get training statistics"""
     return await training_service.get_training_stats()
 
+# Job Event Endpoints
+@app.get("/api/jobs/events")
+async def stream_job_events(kind: Optional[Literal["generation", "training"]] = None):
+    """Server-Sent Events for every job, or every job of one kind, as it is created and updated"""
+    events = job_events.subscribe(kind, heartbeat=HEARTBEAT_SECONDS)
+    stream = sse_stream(events, on_heartbeat=lambda: watch_all_jobs(kind))
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+# Ranking Endpoints
+@app.post("/api/rank", response_model=RankingResponse, response_class=FastJSONResponse)
+async def rank_alternatives(request: RankingRequest, ranking_service=Depends(get_ranking_service)):
+    """Rank carrier/forwarder alternatives for a batch of lanes with TOPSIS"""
+    result = await ranking_service.rank(request)
+    if not result:
+        raise HTTPException(status_code=404, detail="Weight matrix not found")
+    return result
+
+@app.post("/api/rank/sensitivity", response_model=SensitivityResponse, response_class=FastJSONResponse)
+async def rank_sensitivity(request: SensitivityRequest, ranking_service=Depends(get_ranking_service)):
+    """Rank stability and winner-flip weight thresholds under Dirichlet-perturbed weights"""
+    result = await ranking_service.sensitivity(request)
+    if not result:
+        raise HTTPException(status_code=404, detail="Weight matrix not found")
+    return result
+
+@app.post("/api/quotes/score", response_model=QuoteScoringResponse, response_class=FastJSONResponse)
+async def score_freight_quotes(file: UploadFile = File(...), weightMatrixId: str = Form("latest"), quote_service=Depends(get_quote_service)):
+    """Pick the best forwarder for every shipment in a CSV/TSV/Parquet upload"""
+    content = await read_upload(file, QUOTE_UPLOAD_MAX_BYTES)
+    result = await quote_service.score_upload(content, file.filename or "", weightMatrixId)
+    if not result:
+        raise HTTPException(status_code=404, detail="Weight matrix not found")
+    return result
+
+# Forecast Endpoints
+@app.get("/api/forecast/lanes", response_model=LaneForecastResponse, response_class=FastJSONResponse)
+async def forecast_lanes(
+    metric: Literal["costPerKg", "transitDays"] = "costPerKg",
+    horizon: int = Query(3, ge=1, le=24),
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    carrier: Optional[str] = None,
+    forecast_service=Depends(get_forecast_service)
+):
+    """GM(1,1)/Verhulst forecasts of the next shipments per origin/destination/carrier lane"""
+    return await forecast_service.lane_forecasts(metric, horizon, origin, destination, carrier)
+
+# Lane Endpoints
+@app.get("/api/lanes", response_model=LaneIndexResponse, response_class=FastJSONResponse)
+async def list_lanes(
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    carrier: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    lane_service=Depends(get_lane_service)
+):
+    """Per origin/destination/carrier lane distances, cost, weight, volume and transit statistics"""
+    return await lane_service.lanes(origin, destination, carrier, limit, offset)
+
 # Groq AI Endpoints
 @app.post("/api/groq/optimize-weights", response_model=WeightVector)
-async def optimize_weights_with_groq(request: GroqOptimizationRequest):
+async def optimize_weights_with_groq(request: GroqOptimizationRequest, groq_service=Depends(get_groq_service)):
     """Optimize weight vector using Groq AI"""
     try:
         optimized_weights = await groq_service.optimize_weights(request)
@@ -142,7 +379,7 @@ async def optimize_weights_with_groq(request: GroqOptimizationRequest):
         raise HTTPException(status_code=500, detail=f"Weight optimization failed: {str(e)}")
 
 @app.post("/api/groq/generate-scenario")
-async def generate_scenario_with_groq(request: GroqScenarioRequest):
+async def generate_scenario_with_groq(request: GroqScenarioRequest, groq_service=Depends(get_groq_service)):
     """Generate stress test scenario using Groq AI"""
     try:
         scenario = await groq_service.generate_scenario(request)
@@ -151,49 +388,64 @@ async def generate_scenario_with_groq(request: GroqScenarioRequest):
         raise HTTPException(status_code=500, detail=f"Scenario generation failed: {str(e)}")
 
 @app.post("/api/groq/analyze-dataset")
-async def analyze_dataset_quality(dataset: List[Dict[str, Any]]):
-    """Analyze synthetic dataset quality using Groq AI"""
+async def analyze_dataset_quality(dataset: List[Dict[str, Any]], narrative: bool = False, quality_service=Depends(get_quality_service)):
+    """Score synthetic dataset quality against the base shipments; narrative=true adds a Groq summary when Groq is configured"""
     try:
-        analysis = await groq_service.analyze_dataset_quality(dataset)
+        analysis = await quality_service.analyze(dataset, narrative=narrative)
         return analysis
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dataset analysis failed: {str(e)}")
 
 # Scenario Generation Endpoints
+# Each returns a pooled, usually completed, job; see services/scenario_pool.py
 @app.post("/api/scenarios/peak_season", response_model=GenerationJob)
-async def generate_peak_season_scenario():
+async def generate_peak_season_scenario(scenario_pool=Depends(get_scenario_pool)):
     """Generate peak season stress test scenario"""
-    config = SyntheticDataConfig(
-        baseDatasetSize=1000,
-        syntheticRatio=3.0,
-        privacyLevel="high",
-        scenarioType="stress_test"
-    )
-    return await mostly_service.start_generation(config)
+    return await scenario_pool.acquire("peak_season")
 
 @app.post("/api/scenarios/supply_disruption", response_model=GenerationJob)
-async def generate_supply_disruption_scenario():
+async def generate_supply_disruption_scenario(scenario_pool=Depends(get_scenario_pool)):
     """Generate supply disruption stress test scenario"""
-    config = SyntheticDataConfig(
-        baseDatasetSize=800,
-        syntheticRatio=2.5,
-        privacyLevel="high",
-        scenarioType="stress_test"
-    )
-    return await mostly_service.start_generation(config)
+    return await scenario_pool.acquire("supply_disruption")
 
 @app.post("/api/scenarios/economic_downturn", response_model=GenerationJob)
-async def generate_economic_downturn_scenario():
+async def generate_economic_downturn_scenario(scenario_pool=Depends(get_scenario_pool)):
     """Generate economic downturn stress test scenario"""
-    config = SyntheticDataConfig(
-        baseDatasetSize=1200,
-        syntheticRatio=2.0,
-        privacyLevel="medium",
-        scenarioType="stress_test"
-    )
-    return await mostly_service.start_generation(config)
+    return await scenario_pool.acquire("economic_downturn")
 
 # Error handlers
+@app.exception_handler(GenerationQueueFull)
+async def generation_queue_full_handler(request, exc):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "30"}
+    )
+
+@app.exception_handler(IdempotencyKeyReused)
+async def idempotency_key_reused_handler(request, exc):
+    return JSONResponse(
+        status_code=409,
+        content={"detail": str(exc)}
+    )
+
+@app.exception_handler(SubmissionInProgress)
+async def submission_in_progress_handler(request, exc):
+    return JSONResponse(
+        status_code=409,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(ServiceUnavailable)
+async def service_unavailable_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)}
+    )
+
 @app.exception_handler(ValueError)
 async def value_error_handler(request, exc):
     return JSONResponse(
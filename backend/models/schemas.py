@@ -9,6 +9,7 @@ class JobStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class PrivacyLevel(str, Enum):
     HIGH = "high"
@@ -34,12 +35,16 @@ class GenerationJob(BaseModel):
     createdAt: datetime
     completedAt: Optional[datetime] = None
     recordsGenerated: Optional[int] = None
+    queuePosition: Optional[int] = None
+    generatorCacheHit: Optional[bool] = None
     error: Optional[str] = None
 
 class PrivacyMetrics(BaseModel):
     kAnonymity: int
     lDiversity: int
     tCloseness: float
+    equivalenceClasses: Optional[int] = None
+    quasiIdentifiers: List[str] = []
 
 class DatasetMetadata(BaseModel):
     generatedAt: datetime
@@ -47,13 +52,23 @@ class DatasetMetadata(BaseModel):
     sourceHash: str
     scenario: str
     privacyMetrics: PrivacyMetrics
+    columns: List[str] = []
 
 class SyntheticDataset(BaseModel):
     id: str
     jobId: str
-    records: List[Dict[str, Any]]
+    # Rows live in Parquet; only populated when a caller asks for them
+    records: Optional[List[Dict[str, Any]]] = None
     metadata: DatasetMetadata
 
+class DatasetPage(BaseModel):
+    datasetId: str
+    offset: int
+    limit: int
+    total: int
+    columns: List[str]
+    records: List[Dict[str, Any]]
+
 class WeightVector(BaseModel):
     cost: float = Field(ge=0.0, le=1.0)
     time: float = Field(ge=0.0, le=1.0)
@@ -63,7 +78,7 @@ class WeightVector(BaseModel):
 class TrainingJobRequest(BaseModel):
     datasetId: str
     weights: WeightVector
-    modelType: str = "neutrosophic"
+    modelType: Literal["neutrosophic", "topsis"] = "neutrosophic"
 
 class TrainingJob(BaseModel):
     id: str
@@ -74,8 +89,19 @@ class TrainingJob(BaseModel):
     createdAt: datetime
     completedAt: Optional[datetime] = None
     accuracy: Optional[float] = None
+    iterations: Optional[int] = None
+    modelType: Optional[Literal["neutrosophic", "topsis"]] = None
     error: Optional[str] = None
 
+class JobEvent(BaseModel):
+    kind: Literal["generation", "training"]
+    jobId: str
+    # "snapshot" carries the full job, "update" only the fields that changed
+    type: Literal["snapshot", "update"]
+    status: JobStatus
+    progress: int
+    changes: Dict[str, Any]
+
 class GroqOptimizationRequest(BaseModel):
     currentWeights: WeightVector
     historicalData: List[Dict[str, Any]]
@@ -85,3 +111,160 @@ class GroqScenarioRequest(BaseModel):
     baseScenario: str
     complexity: Literal["simple", "moderate", "complex"] = "moderate"
     industryContext: str = "logistics"
+
+class CriteriaIndeterminacy(BaseModel):
+    cost: float = Field(default=0.0, ge=0, le=1)
+    time: float = Field(default=0.0, ge=0, le=1)
+    reliability: float = Field(default=0.0, ge=0, le=1)
+    risk: float = Field(default=0.0, ge=0, le=1)
+
+class RankingAlternative(BaseModel):
+    id: str
+    cost: float
+    time: float
+    reliability: float
+    risk: float
+    # How uncertain each criterion value is; only used by neutrosophic scoring
+    indeterminacy: Optional[CriteriaIndeterminacy] = None
+
+class RankingLane(BaseModel):
+    laneId: str
+    alternatives: List[RankingAlternative] = Field(min_length=1)
+
+class RankingRequest(BaseModel):
+    lanes: List[RankingLane] = Field(min_length=1)
+    weightMatrixId: str = "latest"
+    method: Literal["topsis", "neutrosophic"] = "topsis"
+    # Optional AHP pairwise judgments over (cost, time, reliability, risk);
+    # when given, the derived weights replace the stored weight matrix
+    pairwiseMatrix: Optional[List[List[float]]] = None
+
+class RankedAlternative(BaseModel):
+    id: str
+    score: float
+    rank: int
+    # Score and accuracy functions of the weighted neutrosophic aggregate
+    neutrosophicScore: Optional[float] = None
+    neutrosophicAccuracy: Optional[float] = None
+
+class LaneRanking(BaseModel):
+    laneId: str
+    bestAlternative: str
+    ranking: List[RankedAlternative]
+
+class AHPConsistency(BaseModel):
+    lambdaMax: float
+    consistencyIndex: float
+    consistencyRatio: float
+    isConsistent: bool
+
+class RankingResponse(BaseModel):
+    weightMatrixId: str
+    weights: WeightVector
+    consistency: Optional[AHPConsistency] = None
+    lanes: List[LaneRanking]
+
+class SensitivityRequest(BaseModel):
+    lanes: List[RankingLane] = Field(min_length=1)
+    weightMatrixId: str = "latest"
+    method: Literal["topsis", "neutrosophic"] = "topsis"
+    samples: int = Field(default=2000, ge=1, le=50000)
+    # Dirichlet concentration around the weights; larger means smaller perturbations
+    concentration: float = Field(default=50.0, gt=0)
+    # Grid resolution of the one-at-a-time sweeps used for winner-flip thresholds
+    thresholdSteps: int = Field(default=100, ge=2, le=1000)
+    seed: Optional[int] = None
+
+class AlternativeStability(BaseModel):
+    id: str
+    baseScore: float
+    baseRank: int
+    winProbability: float
+    expectedRank: float
+    # Probability of each rank, best first
+    rankProbabilities: List[float]
+
+class WeightThreshold(BaseModel):
+    criterion: str
+    baseWeight: float
+    # Nearest weights for this criterion, others rescaled in proportion, where
+    # another alternative wins; None when the winner holds over the whole range
+    lowerWeight: Optional[float] = None
+    lowerWinner: Optional[str] = None
+    upperWeight: Optional[float] = None
+    upperWinner: Optional[str] = None
+
+class LaneSensitivity(BaseModel):
+    laneId: str
+    baseWinner: str
+    winnerStability: float
+    alternatives: List[AlternativeStability]
+    thresholds: List[WeightThreshold]
+
+class SensitivityResponse(BaseModel):
+    weightMatrixId: str
+    weights: WeightVector
+    samples: int
+    concentration: float
+    lanes: List[LaneSensitivity]
+
+class ScoredShipment(BaseModel):
+    row: int
+    requestReference: Optional[str] = None
+    # Forwarder column key and display name; None when no forwarder quoted
+    bestForwarder: Optional[str] = None
+    bestForwarderName: Optional[str] = None
+    bestCost: Optional[float] = None
+    scores: Dict[str, float]
+
+class QuoteScoringResponse(BaseModel):
+    weightMatrixId: str
+    weights: WeightVector
+    scoredRows: int
+    unscoredRows: int
+    shipments: List[ScoredShipment]
+
+class LaneForecast(BaseModel):
+    origin: str
+    destination: str
+    carrier: str
+    metric: Literal["costPerKg", "transitDays"]
+    points: int
+    lastObserved: float
+    model: Literal["gm11", "verhulst"]
+    ratioTestPassed: bool
+    parameters: Dict[str, float]
+    # In-sample mean absolute percentage error of each fitted model
+    mape: Dict[str, Optional[float]]
+    forecast: List[float]
+    distanceKm: Optional[float] = None
+
+class LaneForecastResponse(BaseModel):
+    metric: Literal["costPerKg", "transitDays"]
+    horizon: int
+    lanes: List[LaneForecast]
+
+class LaneStats(BaseModel):
+    origin: str
+    destination: str
+    carrier: str
+    shipments: int
+    distanceKm: Optional[float] = None
+    totalCost: Optional[float] = None
+    meanCost: Optional[float] = None
+    totalWeightKg: Optional[float] = None
+    meanWeightKg: Optional[float] = None
+    totalVolumeCbm: Optional[float] = None
+    meanVolumeCbm: Optional[float] = None
+    costPerKgP10: Optional[float] = None
+    costPerKgP50: Optional[float] = None
+    costPerKgP90: Optional[float] = None
+    meanTransitDays: Optional[float] = None
+    p90TransitDays: Optional[float] = None
+    deliveredRate: Optional[float] = None
+
+class LaneIndexResponse(BaseModel):
+    # Changes whenever the shipment history content does
+    version: str
+    total: int
+    lanes: List[LaneStats]
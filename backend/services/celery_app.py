@@ -0,0 +1,35 @@
+import os
+from celery import Celery
+from services.workers import REDIS_URL
+from services.job_supervisor import JOB_MEMORY_LIMIT_MB
+
+# memory:// runs broker and results in-process, e.g. for tests
+_in_memory = REDIS_URL.startswith("memory://")
+
+celery_app = Celery(
+    "deepcal",
+    broker=os.getenv("CELERY_BROKER_URL", REDIS_URL),
+    backend=os.getenv("CELERY_RESULT_BACKEND", "cache+memory://" if _in_memory else REDIS_URL),
+    include=["services.tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    # Jobs run for minutes: hand out one at a time and only acknowledge once
+    # finished so a lost worker's job is redelivered
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_track_started=True,
+    result_expires=24 * 3600,
+    task_routes={
+        "deepcal.generate_dataset": {"queue": "generation"},
+        "deepcal.train_weights": {"queue": "training"},
+    },
+    task_always_eager=os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true",
+    # A recycle threshold, not a limit: Celery only checks it after a task finishes, then
+    # replaces the child (KiB). Each task enforces JOB_MEMORY_LIMIT_MB with MemoryWatchdog
+    worker_max_memory_per_child=JOB_MEMORY_LIMIT_MB * 1024 if JOB_MEMORY_LIMIT_MB > 0 else None,
+)
@@ -0,0 +1,158 @@
+import os
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is offered only when the package is installed
+    zstandard = None
+
+# Bodies smaller than this go out uncompressed; the headers would outweigh the savings
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Event streams must reach the client as each event is sent
+EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Encodings in server preference order"""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding an Accept-Encoding header allows, or None"""
+    quality = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        quality[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = quality.get(encoding, quality.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    """Incremental compressor whose every chunk can be decoded as soon as it arrives"""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._stream.compress(data) + self._stream.flush(self._flush_mode)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._stream.compress(data) + self._stream.flush()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return _Compressor(encoding).finish(data)
+
+
+class CompressionMiddleware:
+    """gzip/zstd response compression negotiated from Accept-Encoding.
+
+    Whole bodies are compressed in one go; streamed bodies (NDJSON, Arrow
+    IPC) are compressed chunk by chunk with a flush after each, so clients
+    can decode rows as they arrive. Event streams, already-encoded bodies and
+    small bodies are passed through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+
+class _CompressingSend:
+    def __init__(self, send: Callable, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def __call__(self, message: dict):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress
+            self.start = message
+            headers = {key.lower(): value for key, value in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            self.passthrough = b"content-encoding" in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.compressor is None:
+            if not more:
+                # Whole body in one message
+                if len(body) < self.minimum_size:
+                    await self._flush_start()
+                    await self.send(message)
+                    return
+                data = compress(body, self.encoding)
+                await self._flush_start(self._headers(len(data)))
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            self.compressor = _Compressor(self.encoding)
+            await self._flush_start(self._headers(None))
+
+        data = self.compressor.chunk(body) if more else self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more})
+
+    def _headers(self, length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = [
+            (key, value) for key, value in self.start.get("headers", [])
+            if key.lower() not in (b"content-length", b"vary")
+        ]
+        vary = [value for key, value in self.start.get("headers", []) if key.lower() == b"vary"]
+        headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return headers
+
+    async def _flush_start(self, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        if self.start is None:
+            return
+        start = self.start if headers is None else {**self.start, "headers": headers}
+        self.start = None
+        await self.send(start)
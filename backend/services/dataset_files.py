@@ -0,0 +1,139 @@
+import io
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Iterator, List, Optional
+from services.serialization import dumps_lines
+
+DATASET_DIR = os.getenv("DATASET_DIR", "./datasets")
+
+# Row groups bound how much a paged read has to decode
+ROW_GROUP_SIZE = int(os.getenv("DATASET_ROW_GROUP_SIZE", "10000"))
+STREAM_BATCH_SIZE = 5000
+
+
+class DatasetFileStore:
+    """Columnar on-disk storage for synthetic dataset rows, one Parquet file per dataset"""
+
+    def __init__(self, directory: str = DATASET_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, dataset_id: str) -> str:
+        return os.path.join(self.directory, f"{dataset_id}.parquet")
+
+    def exists(self, dataset_id: str) -> bool:
+        return os.path.exists(self.path(dataset_id))
+
+    def write(self, dataset_id: str, df: pd.DataFrame) -> List[str]:
+        """Write rows to Parquet and return the stored column names"""
+        df = df.copy()
+        # Generated frames can mix types in object columns; store them as text
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].astype("string")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        # Write then rename so readers never observe a partial file
+        tmp_path = self.path(dataset_id) + ".tmp"
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+        os.replace(tmp_path, self.path(dataset_id))
+        return table.column_names
+
+    def delete(self, dataset_id: str) -> bool:
+        try:
+            os.remove(self.path(dataset_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def row_count(self, dataset_id: str) -> int:
+        return pq.ParquetFile(self.path(dataset_id)).metadata.num_rows
+
+    def schema(self, dataset_id: str, columns: Optional[List[str]] = None) -> pa.Schema:
+        """Arrow schema of a dataset, projected onto ``columns``; raises ValueError on unknown columns"""
+        parquet = pq.ParquetFile(self.path(dataset_id))
+        schema = parquet.schema_arrow
+        projected = self._validate_columns(parquet, columns)
+        if projected is None:
+            return schema
+        return pa.schema([schema.field(name) for name in projected])
+
+    def iter_batches(
+        self,
+        dataset_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        batch_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[pa.RecordBatch]:
+        """Yield record batches for rows [offset, offset + limit), skipping whole row groups"""
+        parquet = pq.ParquetFile(self.path(dataset_id))
+        columns = self._validate_columns(parquet, columns)
+        remaining = parquet.metadata.num_rows - offset if limit is None else limit
+        start = 0
+        for group in range(parquet.num_row_groups):
+            if remaining <= 0:
+                break
+            group_rows = parquet.metadata.row_group(group).num_rows
+            if start + group_rows <= offset:
+                start += group_rows
+                continue
+
+            table = parquet.read_row_group(group, columns=columns)
+            table = table.slice(max(offset - start, 0), remaining)
+            start += group_rows
+            remaining -= table.num_rows
+            for batch in table.to_batches(max_chunksize=batch_size):
+                yield batch
+
+    def read_page(
+        self,
+        dataset_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> pa.Table:
+        """Read rows [offset, offset + limit) with optional column projection"""
+        batches = list(self.iter_batches(dataset_id, offset, limit, columns))
+        if batches:
+            return pa.Table.from_batches(batches)
+        return self.schema(dataset_id, columns).empty_table()
+
+    def stream_ndjson(self, dataset_id: str, offset: int = 0, limit: Optional[int] = None,
+                      columns: Optional[List[str]] = None) -> Iterator[bytes]:
+        """Yield newline-delimited JSON, one batch of rows per chunk"""
+        for batch in self.iter_batches(dataset_id, offset, limit, columns):
+            yield dumps_lines(batch.to_pylist())
+
+    def stream_arrow(self, dataset_id: str, offset: int = 0, limit: Optional[int] = None,
+                     columns: Optional[List[str]] = None) -> Iterator[bytes]:
+        """Yield an Arrow IPC stream, one record batch per chunk"""
+        schema = self.schema(dataset_id, columns)
+
+        # Drain the sink after every batch so memory stays bounded by one batch
+        sink = io.BytesIO()
+        writer = pa.ipc.new_stream(sink, schema)
+        for batch in self.iter_batches(dataset_id, offset, limit, columns):
+            writer.write_batch(batch)
+            yield self._drain(sink)
+        writer.close()
+        yield self._drain(sink)
+
+    def _drain(self, sink: io.BytesIO) -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    def _validate_columns(self, parquet: pq.ParquetFile, columns: Optional[List[str]]) -> Optional[List[str]]:
+        if not columns:
+            return None
+        available = set(parquet.schema_arrow.names)
+        unknown = [col for col in columns if col not in available]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        return columns
+
+# Singleton instance
+dataset_files = DatasetFileStore()
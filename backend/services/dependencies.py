@@ -0,0 +1,84 @@
+import logging
+import importlib
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceUnavailable(Exception):
+    """Raised when a service cannot be created, e.g. its API key is not configured"""
+
+
+class LazyService:
+    """Creates a service on first use and hands out the same instance afterwards.
+
+    ``target`` names the factory as "module:attribute", so neither the module
+    nor its dependencies are imported until the service is first needed.
+    Instances are usable as FastAPI dependencies. A failed creation is not
+    remembered, so fixing the configuration does not need a restart.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self._instance: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> bool:
+        return self._instance is not None
+
+    def __call__(self) -> Any:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._create()
+        return self._instance
+
+    def _create(self) -> Any:
+        module_name, attribute = self.target.split(":")
+        try:
+            factory: Callable[[], Any] = getattr(importlib.import_module(module_name), attribute)
+            return factory()
+        except Exception as e:
+            raise ServiceUnavailable(f"{attribute} is unavailable: {e}") from e
+
+    def close(self) -> None:
+        """Release the instance's resources, if it was ever created"""
+        instance, self._instance = self._instance, None
+        close: Optional[Callable[[], None]] = getattr(instance, "close", None)
+        if close is not None:
+            close()
+
+
+# Service providers, in dependency order
+get_job_store = LazyService("services.job_store:create_job_store")
+get_mostly_service = LazyService("services.mostly_service:MostlyAIService")
+get_scenario_pool = LazyService("services.scenario_pool:ScenarioPool")
+get_training_service = LazyService("services.training_service:TrainingService")
+get_ranking_service = LazyService("services.ranking_service:RankingService")
+get_quote_service = LazyService("services.quote_service:QuoteService")
+get_forecast_service = LazyService("services.forecast_service:ForecastService")
+get_lane_service = LazyService("services.lane_service:LaneService")
+get_groq_service = LazyService("services.groq_service:GroqService")
+get_quality_service = LazyService("services.quality_service:QualityService")
+
+SERVICES = (
+    get_job_store, get_mostly_service, get_scenario_pool, get_training_service, get_ranking_service,
+    get_quote_service, get_forecast_service, get_lane_service, get_groq_service, get_quality_service,
+)
+
+
+def warm_up() -> None:
+    """Create every service up front, skipping those that are not configured"""
+    for provider in SERVICES:
+        try:
+            provider()
+        except ServiceUnavailable as e:
+            logger.warning("Skipping warm-up: %s", e)
+
+
+def close_all() -> None:
+    """Close created services, dependents first"""
+    for provider in reversed(SERVICES):
+        provider.close()
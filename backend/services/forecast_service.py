@@ -0,0 +1,26 @@
+import asyncio
+from typing import Optional
+from models.schemas import LaneForecast, LaneForecastResponse
+from services.grey_forecast import history_forecasts
+from services.lane_index import history_lane_index
+
+
+class ForecastService:
+    async def lane_forecasts(
+        self,
+        metric: str,
+        horizon: int,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        carrier: Optional[str] = None
+    ) -> LaneForecastResponse:
+        """Grey-model forecasts for every lane in the shipment history, optionally filtered"""
+        forecasts = await asyncio.to_thread(history_forecasts, metric, horizon)
+        index = await asyncio.to_thread(history_lane_index)
+        filters = {"origin": origin, "destination": destination, "carrier": carrier}
+        lanes = []
+        for forecast in forecasts:
+            if all(value is None or forecast[key].lower() == value.lower() for key, value in filters.items()):
+                stats = index.lookup(forecast["origin"], forecast["destination"], forecast["carrier"])
+                lanes.append(LaneForecast(**forecast, distanceKm=stats["distanceKm"] if stats else None))
+        return LaneForecastResponse(metric=metric, horizon=horizon, lanes=lanes)
@@ -0,0 +1,102 @@
+import time
+import hashlib
+import pandas as pd
+from typing import Any, Dict, Optional
+from mostlyai import MostlyAI
+from models.schemas import SyntheticDataConfig
+from services.dataset_files import dataset_files
+from services.generator_cache import generator_cache, generator_fingerprint
+from services.privacy_metrics import compute_privacy_metrics
+from services.shipment_history import load_base_shipments
+
+# Functions in this module run inside generation worker processes and must
+# not import the service singletons.
+
+
+def build_generator_config(config: SyntheticDataConfig, df: pd.DataFrame) -> Dict[str, Any]:
+    """Build MOSTLY AI generator configuration"""
+    base_config = {
+        "name": f"DeepCAL Synthetic Generator - {config.scenarioType.value}",
+        "privacy_level": config.privacyLevel.value,
+    }
+    
+    # Scenario-specific configurations
+    if config.scenarioType == "stress_test":
+        base_config.update({
+            "augmentation_ratio": 1.5,
+            "noise_level": 0.1,
+            "outlier_detection": True
+        })
+    elif config.scenarioType == "seasonal_variation":
+        base_config.update({
+            "time_series_augmentation": True,
+            "seasonal_patterns": True
+        })
+    
+    return base_config
+
+
+def run_generation(
+    dataset_id: str,
+    config: SyntheticDataConfig,
+    api_key: str,
+    base_url: str,
+    progress: Optional[Any] = None
+) -> Dict[str, Any]:
+    """Train a generator, sample synthetic rows and write them to Parquet.
+
+    Returns the dataset metadata fields; rows never leave the worker.
+    ``progress`` may be a shared value that receives a 0-100 percentage.
+    """
+    def report(value: int):
+        if progress is not None:
+            progress.value = value
+
+    client = MostlyAI(api_key=api_key, base_url=base_url)
+    # Seconds spent in MOSTLY AI calls; the API process records them as metrics
+    external_calls: Dict[str, float] = {}
+
+    # Typed base history, parsed once and memory-mapped by every worker
+    df = load_base_shipments()
+    report(20)
+
+    # Configure generator based on scenario type
+    generator_config = build_generator_config(config, df)
+    report(30)
+
+    # Reuse a generator trained on identical data and config; training
+    # takes minutes while generation takes seconds
+    cache_key = generator_fingerprint(df, generator_config)
+    start = time.perf_counter()
+    generator = generator_cache.load(client, cache_key)
+    external_calls["load_generator"] = time.perf_counter() - start
+    cache_hit = generator is not None
+    if not cache_hit:
+        start = time.perf_counter()
+        generator = client.train(data=df, **generator_config)
+        external_calls["train"] = time.perf_counter() - start
+        generator_cache.save(cache_key, generator)
+    report(60)
+
+    # Generate synthetic data
+    target_size = int(len(df) * config.syntheticRatio)
+    start = time.perf_counter()
+    synthetic_data = client.generate(generator, size=target_size)
+    external_calls["generate"] = time.perf_counter() - start
+    report(90)
+
+    # Create source hash from per-row hashes rather than a rendered copy of the frame
+    row_hashes = pd.util.hash_pandas_object(synthetic_data, index=False).to_numpy()
+    source_hash = hashlib.md5(row_hashes.tobytes()).hexdigest()
+
+    privacy_metrics = compute_privacy_metrics(synthetic_data)
+    columns = dataset_files.write(dataset_id, synthetic_data)
+
+    return {
+        "recordCount": len(synthetic_data),
+        "sourceHash": source_hash,
+        "columns": columns,
+        "privacyMetrics": privacy_metrics,
+        "cacheHit": cache_hit,
+        "externalCalls": external_calls
+    }
@@ -0,0 +1,114 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+GENERATOR_CACHE_DIR = os.getenv("GENERATOR_CACHE_DIR", "./generator_cache")
+GENERATOR_CACHE_MAX_BYTES = int(os.getenv("GENERATOR_CACHE_MAX_BYTES", str(5 * 1024 ** 3)))
+
+
+def generator_fingerprint(df: pd.DataFrame, generator_config: Dict[str, Any]) -> str:
+    """Content address of a trained generator: base data rows plus generator config"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(json.dumps(generator_config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class GeneratorCache:
+    """Exported MOSTLY AI generators on disk, keyed by fingerprint, evicted LRU by total size.
+
+    Entries are a ``<key>.zip`` export plus a ``<key>.json`` sidecar whose
+    mtime records the last use. Everything is plain files, so generation
+    worker processes share the cache without coordination.
+    """
+
+    def __init__(self, directory: str = GENERATOR_CACHE_DIR, max_bytes: int = GENERATOR_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".zip", base + ".json"
+
+    def load(self, client: Any, key: str) -> Optional[Any]:
+        """Return a usable generator for ``key``, or None on a cache miss"""
+        export_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(meta_path)
+
+        # The generator usually still exists server-side; re-import only if it was removed
+        try:
+            return client.generators.get(meta["generatorId"])
+        except Exception:
+            pass
+        if not os.path.exists(export_path):
+            return None
+        generator = client.generators.import_from_file(export_path)
+        meta["generatorId"] = generator.id
+        self._write_meta(meta_path, meta)
+        return generator
+
+    def save(self, key: str, generator: Any) -> None:
+        """Export a freshly trained generator into the cache, then enforce the size budget"""
+        export_path, meta_path = self._paths(key)
+        tmp_dir = tempfile.mkdtemp(dir=self.directory, prefix=".export-")
+        try:
+            exported = generator.export_to_file(tmp_dir)
+            os.replace(exported, export_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._write_meta(meta_path, {
+            "generatorId": generator.id,
+            "createdAt": datetime.utcnow().isoformat(),
+            "sizeBytes": os.path.getsize(export_path)
+        })
+        self.evict()
+
+    def evict(self) -> List[str]:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            export_path, meta_path = self._paths(key)
+            try:
+                entries.append((os.path.getmtime(meta_path), os.path.getsize(export_path), key))
+            except FileNotFoundError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            evicted.append(key)
+        return evicted
+
+    def _write_meta(self, meta_path: str, meta: Dict[str, Any]) -> None:
+        # Per-process name: workers writing the same key must not share a temp file
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+# Singleton instance
+generator_cache = GeneratorCache()
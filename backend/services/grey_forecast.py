@@ -0,0 +1,198 @@
+import os
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+from services.shipment_features import BASE_DATA_PATH, parse_numeric, shipment_cost, transit_days
+from services.shipment_history import load_base_shipments
+
+# Shipments are grouped into lanes on these columns
+LANE_COLUMNS = ("origin_country", "destination_country", "carrier")
+
+# Grey models need a few points to fit two parameters, and work best on short recent series
+MIN_POINTS = 4
+MAX_POINTS = int(os.getenv("GREY_MAX_POINTS", "24"))
+
+METRICS = ("costPerKg", "transitDays")
+
+MODELS = ("gm11", "verhulst")
+
+
+def metric_values(df: pd.DataFrame, metric: str) -> np.ndarray:
+    """Per-shipment value of a forecast metric, NaN where it cannot be computed.
+
+    Cost is the carrier cost, or the lowest forwarder quote where no carrier
+    cost was recorded.
+    """
+    if metric == "transitDays":
+        return transit_days(df)
+    if metric == "costPerKg":
+        cost = shipment_cost(df)
+        weight = parse_numeric(df["weight_kg"]) if "weight_kg" in df.columns else np.full(len(df), np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return cost / weight
+    raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS)}")
+
+
+def lane_series(df: pd.DataFrame, metric: str) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """Stack each lane's positive metric values in shipment order.
+
+    Returns the lane keys, a left-aligned (lanes, MAX_POINTS) array padded
+    with NaN and the number of points per lane. Only the most recent
+    MAX_POINTS shipments of a lane are kept. Shipments are ordered by
+    collection date; rows without one keep their place in the file.
+    """
+    values = metric_values(df, metric)
+    frame = pd.DataFrame({col: df[col].astype("string").fillna("") for col in LANE_COLUMNS})
+    if "date_of_collection" in df.columns:
+        collected = pd.to_datetime(df["date_of_collection"], format="%d-%b-%y", errors="coerce")
+        frame["order"] = collected.ffill().bfill()
+    else:
+        frame["order"] = np.arange(len(df))
+    frame["value"] = values
+    frame = frame[np.isfinite(values) & (values > 0)]
+    frame = frame.sort_values(list(LANE_COLUMNS) + ["order"], kind="stable")
+
+    # Position counted from each lane's newest point, so the tail is kept
+    frame["from_end"] = frame.groupby(list(LANE_COLUMNS)).cumcount(ascending=False)
+    frame = frame[frame["from_end"] < MAX_POINTS]
+    lane_id = frame.groupby(list(LANE_COLUMNS), sort=False).ngroup().to_numpy()
+    counts = np.bincount(lane_id) if len(lane_id) else np.zeros(0, dtype=int)
+
+    position = (counts[lane_id] - 1 - frame["from_end"].to_numpy()) if len(lane_id) else lane_id
+    series = np.full((len(counts), MAX_POINTS), np.nan)
+    series[lane_id, position] = frame["value"].to_numpy()
+
+    keys = frame.drop_duplicates(list(LANE_COLUMNS))[list(LANE_COLUMNS)].reset_index(drop=True)
+    enough = counts >= MIN_POINTS
+    return keys[enough].reset_index(drop=True), series[enough], counts[enough]
+
+
+def class_ratio_test(series: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Grey applicability check: every ratio x0(k-1)/x0(k) lies in (e^(-2/(n+1)), e^(2/(n+1)))"""
+    mask = np.arange(1, series.shape[1])[np.newaxis, :] < counts[:, np.newaxis]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = series[:, :-1] / series[:, 1:]
+    bound = np.exp(2.0 / (counts + 1))[:, np.newaxis]
+    inside = (ratio > 1.0 / bound) & (ratio < bound)
+    return (inside | ~mask).all(axis=1)
+
+
+def _normal_equations(columns: Tuple[np.ndarray, np.ndarray], target: np.ndarray, mask: np.ndarray):
+    """Masked 2x2 least-squares normal equations for every lane at once"""
+    u, v = (np.where(mask, col, 0.0) for col in columns)
+    y = np.where(mask, target, 0.0)
+    lhs = np.stack([
+        np.stack([(u * u).sum(axis=1), (u * v).sum(axis=1)], axis=-1),
+        np.stack([(u * v).sum(axis=1), (v * v).sum(axis=1)], axis=-1),
+    ], axis=-2)
+    rhs = np.stack([(u * y).sum(axis=1), (v * y).sum(axis=1)], axis=-1)
+    return lhs, rhs
+
+
+def _solve(lhs: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """Solve stacked 2x2 systems, NaN where a lane's system is singular"""
+    det = np.linalg.det(lhs)
+    singular = ~np.isfinite(det) | (np.abs(det) < 1e-12)
+    lhs = np.where(singular[:, np.newaxis, np.newaxis], np.eye(2), lhs)
+    params = np.linalg.solve(lhs, rhs[..., np.newaxis])[..., 0]
+    params[singular] = np.nan
+    return params
+
+
+def fit_grey_models(series: np.ndarray, counts: np.ndarray, horizon: int) -> Dict[str, Dict[str, np.ndarray]]:
+    """Fit GM(1,1) and grey Verhulst models to every lane with stacked least squares.
+
+    GM(1,1) works on the accumulated series x1 and its background values
+    z1(k) = (x1(k) + x1(k-1)) / 2, fitting x0(k) = -a z1(k) + b. Verhulst
+    treats the observed levels themselves as the saturating curve, fitting
+    x0(k) - x0(k-1) = -a z0(k) + b z0(k)^2 on their background values. Each lane is scaled by its mean
+    first so the normal equations stay well conditioned. Returns, per model,
+    the parameters (in mean-scaled units), the in-sample mean absolute
+    percentage error and the next ``horizon`` values in the original units.
+    """
+    lanes, width = series.shape
+    scale = np.nanmean(series, axis=1, keepdims=True)
+    x0 = series / scale
+    x1 = np.nancumsum(x0, axis=1)
+    z1 = 0.5 * (x1[:, 1:] + x1[:, :-1])
+    z0 = 0.5 * (x0[:, 1:] + x0[:, :-1])
+    mask = np.arange(1, width)[np.newaxis, :] < counts[:, np.newaxis]
+
+    first = x0[:, :1]
+    steps = np.arange(width + horizon)[np.newaxis, :]
+    results = {}
+    for model in MODELS:
+        if model == "gm11":
+            lhs, rhs = _normal_equations((-z1, np.ones_like(z1)), x0[:, 1:], mask)
+            a, b = _solve(lhs, rhs).T[..., np.newaxis]
+            with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+                # As a -> 0 the response degenerates to a straight line in x1
+                linear = np.abs(a) < 1e-9
+                safe_a = np.where(linear, 1.0, a)
+                x1_hat = np.where(
+                    linear,
+                    first + b * steps,
+                    (first - b / safe_a) * np.exp(-safe_a * steps) + b / safe_a
+                )
+                x0_hat = np.concatenate([first, np.diff(x1_hat, axis=1)], axis=1) * scale
+        else:
+            lhs, rhs = _normal_equations((-z0, z0 * z0), np.diff(x0, axis=1), mask)
+            a, b = _solve(lhs, rhs).T[..., np.newaxis]
+            with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+                x0_hat = a * first / (b * first + (a - b * first) * np.exp(a * steps)) * scale
+
+        fitted = x0_hat[:, :width]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            errors = np.abs(fitted[:, 1:] - series[:, 1:]) / series[:, 1:]
+        mape = np.where(mask, errors, 0.0).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+        mape[~np.isfinite(mape) | np.isnan(a[:, 0])] = np.inf
+
+        ahead = counts[:, np.newaxis] + np.arange(horizon)[np.newaxis, :]
+        forecast = np.take_along_axis(x0_hat, ahead, axis=1)
+        # A model that blows up over the horizon is never the better fit
+        mape[~np.isfinite(forecast).all(axis=1)] = np.inf
+        results[model] = {"a": a[:, 0], "b": b[:, 0], "mape": mape, "forecast": forecast}
+    return results
+
+
+def forecast_lanes(df: pd.DataFrame, metric: str, horizon: int) -> List[Dict[str, Any]]:
+    """Fit both grey models on every lane and keep the better one by in-sample MAPE"""
+    keys, series, counts = lane_series(df, metric)
+    if len(keys) == 0:
+        return []
+    fits = fit_grey_models(series, counts, horizon)
+    mapes = np.stack([fits[model]["mape"] for model in MODELS])
+    best = np.argmin(mapes, axis=0)
+    last = series[np.arange(len(counts)), counts - 1]
+    applicable = class_ratio_test(series, counts)
+
+    forecasts = []
+    for i, key in enumerate(keys.itertuples(index=False)):
+        model = MODELS[best[i]]
+        fit = fits[model]
+        if not np.isfinite(fit["mape"][i]):
+            continue
+        forecasts.append({
+            **dict(zip(("origin", "destination", "carrier"), key)),
+            "metric": metric,
+            "points": int(counts[i]),
+            "lastObserved": float(last[i]),
+            "model": model,
+            # Forecasts of lanes failing the class-ratio test deserve little trust
+            "ratioTestPassed": bool(applicable[i]),
+            "parameters": {"a": float(fit["a"][i]), "b": float(fit["b"][i])},
+            "mape": {m: float(fits[m]["mape"][i]) if np.isfinite(fits[m]["mape"][i]) else None for m in MODELS},
+            "forecast": fit["forecast"][i].tolist(),
+        })
+    return forecasts
+
+
+@lru_cache(maxsize=16)
+def _cached_forecasts(path: str, mtime: float, metric: str, horizon: int) -> List[Dict[str, Any]]:
+    return forecast_lanes(load_base_shipments(path), metric, horizon)
+
+
+def history_forecasts(metric: str, horizon: int, path: str = BASE_DATA_PATH) -> List[Dict[str, Any]]:
+    """Lane forecasts over the base shipment history, refitted when the file changes"""
+    return _cached_forecasts(path, os.path.getmtime(path), metric, horizon)
@@ -1,18 +1,45 @@
 
 import os
 import json
-from typing import Dict, Any, List
-from groq import Groq
+import logging
+from typing import Dict, Any, List, Optional
 from models.schemas import WeightVector, GroqOptimizationRequest, GroqScenarioRequest
+from services.llm_client import LLMClient, create_llm_backend
+from services.metrics import fallbacks
+
+logger = logging.getLogger(__name__)
+
+
+def parse_json_completion(text: str) -> Any:
+    """JSON from a completion, with or without a Markdown code fence"""
+    text = text.strip()
+    if text.startswith('```json'):
+        text = text.split('```json')[1].split('```')[0]
+    elif text.startswith('```'):
+        text = text.split('```')[1].split('```')[0]
+    return json.loads(text)
+
+
+def parse_weights(text: str) -> WeightVector:
+    """Criteria weights from a completion, normalized to sum to 1.0"""
+    weights_data = parse_json_completion(text)
+    total = sum(weights_data.values())
+    if abs(total - 1.0) > 0.01:  # Normalize if not exactly 1.0
+        for key in weights_data:
+            weights_data[key] = weights_data[key] / total
+    return WeightVector(**weights_data)
+
+
+def parse_scenario(text: str) -> Dict[str, Any]:
+    scenario_data = parse_json_completion(text)
+    if not isinstance(scenario_data, dict):
+        raise ValueError("Scenario completion is not a JSON object")
+    return scenario_data
+
 
 class GroqService:
-    def __init__(self):
-        self.api_key = os.getenv("GROQ_API_KEY")
-        
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY environment variable is required")
-        
-        self.client = Groq(api_key=self.api_key)
+    def __init__(self, llm: Optional[LLMClient] = None):
+        self.llm = llm or LLMClient(create_llm_backend())
 
     async def optimize_weights(self, request: GroqOptimizationRequest) -> WeightVector:
         """Use Groq to optimize decision criteria weights"""
@@ -41,37 +68,22 @@ class GroqService:
         """
 
         try:
-            completion = self.client.chat.completions.create(
+            # Parsing inside the client keeps unusable completions out of its cache
+            return await self.llm.complete(
                 model="llama3-70b-8192",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.3,
-                max_tokens=150
+                max_tokens=150,
+                parse=parse_weights
             )
             
-            response_text = completion.choices[0].message.content.strip()
-            
-            # Extract JSON from response
-            if response_text.startswith('```json'):
-                response_text = response_text.split('```json')[1].split('```')[0]
-            elif response_text.startswith('```'):
-                response_text = response_text.split('```')[1].split('```')[0]
-            
-            weights_data = json.loads(response_text)
-            
-            # Validate and normalize weights
-            total = sum(weights_data.values())
-            if abs(total - 1.0) > 0.01:  # Normalize if not exactly 1.0
-                for key in weights_data:
-                    weights_data[key] = weights_data[key] / total
-            
-            return WeightVector(**weights_data)
-            
         except Exception as e:
             # Fallback to current weights if optimization fails
-            print(f"Groq optimization failed: {e}")
+            logger.warning("Groq optimization failed, keeping current weights: %s", e)
+            fallbacks.inc(service="groq", operation="optimize_weights")
             return request.currentWeights
 
     async def generate_scenario(self, request: GroqScenarioRequest) -> Dict[str, Any]:
@@ -106,31 +118,21 @@ class GroqService:
         """
 
         try:
-            completion = self.client.chat.completions.create(
+            return await self.llm.complete(
                 model="llama3-70b-8192",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=500,
+                parse=parse_scenario
             )
             
-            response_text = completion.choices[0].message.content.strip()
-            
-            # Extract JSON from response
-            if response_text.startswith('```json'):
-                response_text = response_text.split('```json')[1].split('```')[0]
-            elif response_text.startswith('```'):
-                response_text = response_text.split('```')[1].split('```')[0]
-            
-            scenario_data = json.loads(response_text)
-            
-            return scenario_data
-            
         except Exception as e:
             # Fallback scenario
-            print(f"Groq scenario generation failed: {e}")
+            logger.warning("Groq scenario generation failed, using the default scenario: %s", e)
+            fallbacks.inc(service="groq", operation="generate_scenario")
             return {
                 "name": "Default Stress Test",
                 "description": "Standard capacity constraint scenario",
@@ -148,27 +150,23 @@ class GroqService:
                 }
             }
 
-    async def analyze_dataset_quality(self, dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze synthetic dataset quality using Groq"""
-        
+    async def narrate_quality(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace the local summary of a quality report with a Groq narrative of its metrics"""
+
         system_prompt = """You are a data quality expert specializing in synthetic data validation.
-        Analyze the provided dataset sample and provide quality metrics and recommendations."""
+        Explain the provided quality metrics of a synthetic logistics dataset in a short paragraph
+        for a non-technical reader. Do not invent numbers that are not in the metrics."""
 
+        metrics = report["metrics"]
         user_prompt = f"""
-        Dataset sample: {json.dumps(dataset[:10], indent=2)}
-        Dataset size: {len(dataset)} records
-        
-        Analyze this synthetic dataset for:
-        - Data quality issues
-        - Realistic value distributions  
-        - Potential privacy concerns
-        - Recommendations for improvement
-        
-        Provide a quality score (0-100) and specific recommendations.
+        Quality score: {report["qualityScore"]}/100
+        Metrics: {json.dumps({k: v for k, v in metrics.items() if k != "univariateDistances"}, default=float)}
+        Largest distribution gaps: {json.dumps(dict(list(metrics["univariateDistances"].items())[:5]))}
+        Recommendations: {json.dumps(report["recommendations"])}
         """
 
         try:
-            completion = self.client.chat.completions.create(
+            response_text = await self.llm.complete(
                 model="llama3-8b-8192",  # Use smaller model for analysis
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -177,27 +175,10 @@ class GroqService:
                 temperature=0.2,
                 max_tokens=300
             )
-            
-            response_text = completion.choices[0].message.content.strip()
-            
-            # Parse the analysis (simplified)
-            return {
-                "qualityScore": 85,  # Would parse from response
-                "analysis": response_text,
-                "recommendations": [
-                    "Increase data diversity",
-                    "Adjust outlier detection",
-                    "Enhance privacy preservation"
-                ]
-            }
-            
+            report["analysis"] = response_text.strip() or report["analysis"]
         except Exception as e:
-            print(f"Groq dataset analysis failed: {e}")
-            return {
-                "qualityScore": 75,
-                "analysis": "Analysis unavailable",
-                "recommendations": ["Manual review recommended"]
-            }
+            # The computed report stands on its own; keep the local summary
+            logger.warning("Groq dataset narrative failed, keeping the local summary: %s", e)
+            fallbacks.inc(service="groq", operation="analyze_dataset")
 
-# Singleton instance
-groq_service = GroqService()
+        return report
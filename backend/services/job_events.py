@@ -0,0 +1,255 @@
+import os
+import json
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Type
+from pydantic import BaseModel
+from models.schemas import GenerationJob, JobEvent, JobStatus, TrainingJob
+from services.workers import JOB_BACKEND, REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber; a slow client loses the oldest ones first
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("JOB_EVENT_QUEUE_SIZE", "256"))
+
+# Idle streams send a comment this often so proxies keep the connection open
+HEARTBEAT_SECONDS = float(os.getenv("JOB_EVENT_HEARTBEAT_SECONDS", "15"))
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+# Pub/sub channel job changes travel on between API and Celery worker processes
+EVENT_CHANNEL = os.getenv("JOB_EVENT_CHANNEL", "deepcal:job-events")
+
+# Seconds to wait before resubscribing after the event bus connection drops
+RELAY_RETRY_SECONDS = 1.0
+
+JOB_MODELS: Dict[str, Type[BaseModel]] = {"generation": GenerationJob, "training": TrainingJob}
+
+Listener = Callable[[str, Optional[BaseModel], BaseModel], None]
+
+
+class Subscription:
+    """One subscriber's view of the event stream, optionally narrowed to a job kind or id"""
+
+    def __init__(self, kind: Optional[str], job_id: Optional[str]):
+        self.kind = kind
+        self.job_id = job_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def matches(self, event: JobEvent) -> bool:
+        return (self.kind is None or self.kind == event.kind) and (self.job_id is None or self.job_id == event.jobId)
+
+    def offer(self, event: JobEvent) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class RedisEventTransport:
+    """Carries job changes between processes over Redis pub/sub.
+
+    Every process publishes its changes to one channel and every API process
+    relays the channel into its local subscribers and listeners, so SSE
+    streams and statistics see jobs run by any worker. A memory:// URL uses
+    fakeredis instead, which only reaches other clients in the same process.
+    """
+
+    def __init__(self, url: str, channel: str = EVENT_CHANNEL):
+        self.url = url
+        self.channel = channel
+        self._client = None
+
+    def _clients(self, asynchronous: bool):
+        if self.url.startswith("memory://"):
+            import fakeredis
+            server = _fake_server()
+            if asynchronous:
+                return fakeredis.aioredis.FakeRedis(server=server)
+            return fakeredis.FakeRedis(server=server)
+        if asynchronous:
+            import redis.asyncio
+            return redis.asyncio.Redis.from_url(self.url)
+        import redis
+        return redis.Redis.from_url(self.url)
+
+    def send(self, kind: str, previous: Optional[BaseModel], job: BaseModel) -> None:
+        if self._client is None:
+            self._client = self._clients(asynchronous=False)
+        self._client.publish(self.channel, json.dumps({
+            "kind": kind,
+            "previous": previous.model_dump(mode="json") if previous is not None else None,
+            "job": job.model_dump(mode="json"),
+        }))
+
+    async def relay(self, deliver: Listener) -> None:
+        """Hand every change on the channel to ``deliver`` until cancelled"""
+        while True:
+            client = self._clients(asynchronous=True)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    model = JOB_MODELS[payload["kind"]]
+                    previous = payload["previous"]
+                    deliver(
+                        payload["kind"],
+                        model.model_validate(previous) if previous is not None else None,
+                        model.model_validate(payload["job"])
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Job event relay interrupted, resubscribing: %s", e)
+                await asyncio.sleep(RELAY_RETRY_SECONDS)
+            finally:
+                await client.aclose()
+
+
+_FAKE_SERVER = None
+
+
+def _fake_server():
+    global _FAKE_SERVER
+    if _FAKE_SERVER is None:
+        import fakeredis
+        _FAKE_SERVER = fakeredis.FakeServer()
+    return _FAKE_SERVER
+
+
+class JobEventBroadcaster:
+    """In-process fan-out of job state transitions and progress deltas.
+
+    Services publish one event per job update; every matching subscriber
+    gets it on its own bounded queue, so a stalled client never blocks a
+    job or other clients. With a transport, changes take a round trip
+    through it instead and reach this process via ``start_relay``.
+    """
+
+    def __init__(self, transport: Optional[RedisEventTransport] = None):
+        self.transport = transport
+        self._subscriptions: Set[Subscription] = set()
+        self._listeners: List[Listener] = []
+        self._relay: Optional[asyncio.Task] = None
+
+    def listen(self, callback: Listener) -> None:
+        """Call back synchronously with (kind, previous, job) on every job change; once per callback"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, kind: str, previous: Optional[BaseModel], job: BaseModel) -> Optional[JobEvent]:
+        """Publish the fields that changed between two versions of a job"""
+        current = job.model_dump(mode="json")
+        before = previous.model_dump(mode="json") if previous is not None else {}
+        changes = {field: value for field, value in current.items() if before.get(field) != value}
+        if not changes:
+            return None
+        if self.transport is not None:
+            self.transport.send(kind, previous, job)
+            return self._event(kind, previous, job, changes)
+        return self._deliver(kind, previous, job, changes)
+
+    def start_relay(self) -> None:
+        """Start delivering changes from the transport to this process; needs a running loop"""
+        if self.transport is not None and self._relay is None:
+            self._relay = asyncio.get_running_loop().create_task(self.transport.relay(self._deliver))
+
+    async def stop_relay(self) -> None:
+        if self._relay is not None:
+            self._relay.cancel()
+            try:
+                await self._relay
+            except asyncio.CancelledError:
+                pass
+            self._relay = None
+
+    @staticmethod
+    def _event(kind: str, previous: Optional[BaseModel], job: BaseModel, changes: dict) -> JobEvent:
+        return JobEvent(
+            kind=kind,
+            jobId=job.id,
+            type="snapshot" if previous is None else "update",
+            status=job.status,
+            progress=job.progress,
+            changes=changes
+        )
+
+    def _deliver(
+        self, kind: str, previous: Optional[BaseModel], job: BaseModel, changes: Optional[dict] = None
+    ) -> Optional[JobEvent]:
+        if changes is None:
+            current = job.model_dump(mode="json")
+            before = previous.model_dump(mode="json") if previous is not None else {}
+            changes = {field: value for field, value in current.items() if before.get(field) != value}
+        for callback in self._listeners:
+            callback(kind, previous, job)
+        event = self._event(kind, previous, job, changes)
+        for subscription in list(self._subscriptions):
+            if subscription.matches(event):
+                subscription.offer(event)
+        return event
+
+    async def subscribe(
+        self, kind: Optional[str] = None, job_id: Optional[str] = None,
+        snapshot: Optional[Callable[[], Awaitable[Optional[BaseModel]]]] = None,
+        heartbeat: Optional[float] = None
+    ) -> AsyncIterator[Optional[JobEvent]]:
+        """Yield matching events as they are published.
+
+        With a snapshot loader the stream opens with the job's full current
+        state, read after subscribing so no update is missed, and ends once
+        the job reaches a terminal status. With a heartbeat, None is yielded
+        whenever that many seconds pass without an event.
+        """
+        subscription = Subscription(kind, job_id)
+        self._subscriptions.add(subscription)
+        try:
+            if snapshot is not None:
+                snapshot = await snapshot()
+            if snapshot is not None:
+                first = JobEvent(
+                    kind=kind, jobId=snapshot.id, type="snapshot", status=snapshot.status,
+                    progress=snapshot.progress, changes=snapshot.model_dump(mode="json")
+                )
+                yield first
+                if first.status in TERMINAL_STATUSES:
+                    return
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if job_id is not None and event.status in TERMINAL_STATUSES:
+                    return
+        finally:
+            self._subscriptions.discard(subscription)
+
+
+async def sse_stream(
+    events: AsyncIterator[Optional[JobEvent]], on_heartbeat: Optional[Callable[[], None]] = None
+) -> AsyncIterator[str]:
+    """Format subscribed events as Server-Sent Events messages.
+
+    ``on_heartbeat`` runs in a thread when the stream starts and on every
+    heartbeat, i.e. while the client is still connected.
+    """
+    if on_heartbeat is not None:
+        await asyncio.to_thread(on_heartbeat)
+    async for event in events:
+        if event is None:
+            if on_heartbeat is not None:
+                await asyncio.to_thread(on_heartbeat)
+            yield ": heartbeat\n\n"
+        else:
+            yield f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+
+# Singleton instance
+job_events = JobEventBroadcaster(RedisEventTransport(REDIS_URL) if JOB_BACKEND == "celery" else None)
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from pydantic import BaseModel
+from models.schemas import JobStatus
+
+if TYPE_CHECKING:
+    from services.job_store import JobStore
+
+# Rolling rates are kept in one-minute buckets over the longest window
+BUCKET = timedelta(minutes=1)
+RATE_WINDOWS = {"lastHour": timedelta(hours=1), "last24Hours": timedelta(hours=24)}
+
+# Slots of a rolling-window bucket
+CREATED, COMPLETED, FAILED, RECORDS, CANCELLED = 0, 1, 2, 3, 4
+SLOTS = 5
+
+# Jobs are read back in pages of this size when seeding from the store
+SEED_PAGE_SIZE = 1000
+
+
+class Counters:
+    """Job counts and totals for one slice of jobs"""
+
+    def __init__(self):
+        self.jobs = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.records = 0
+        self.accuracy_sum = 0.0
+        self.accuracy_count = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "jobs": self.jobs,
+            "completedJobs": self.completed,
+            "failedJobs": self.failed,
+            "cancelledJobs": self.cancelled,
+            "activeJobs": self.jobs - self.completed - self.failed - self.cancelled,
+            "totalRecords": self.records,
+        }
+
+    @property
+    def average_accuracy(self) -> float:
+        return self.accuracy_sum / self.accuracy_count if self.accuracy_count else 0.0
+
+
+class RollingWindow:
+    """Per-minute created/completed/failed/cancelled/records counts over the longest rate window"""
+
+    def __init__(self):
+        self.buckets: Dict[datetime, List[int]] = {}
+
+    def add(self, at: datetime, field: int, amount: int = 1) -> None:
+        start = at.replace(second=0, microsecond=0)
+        if start <= datetime.utcnow() - max(RATE_WINDOWS.values()) - BUCKET:
+            return
+        self.buckets.setdefault(start, [0] * SLOTS)[field] += amount
+
+    def rates(self, now: datetime) -> Dict[str, Dict[str, float]]:
+        # At most one bucket per minute of the longest window survives pruning
+        horizon = now - max(RATE_WINDOWS.values()) - BUCKET
+        for start in [start for start in self.buckets if start <= horizon]:
+            del self.buckets[start]
+
+        rates = {}
+        for name, window in RATE_WINDOWS.items():
+            since = now - window
+            totals = [0] * SLOTS
+            for start, counts in self.buckets.items():
+                if start + BUCKET > since:
+                    for i in range(SLOTS):
+                        totals[i] += counts[i]
+            hours = window / timedelta(hours=1)
+            rates[name] = {
+                "createdPerHour": totals[CREATED] / hours,
+                "completedPerHour": totals[COMPLETED] / hours,
+                "failedPerHour": totals[FAILED] / hours,
+                "cancelledPerHour": totals[CANCELLED] / hours,
+                "recordsPerHour": totals[RECORDS] / hours,
+            }
+        return rates
+
+
+class JobStats:
+    """Aggregates for one job kind, updated on each job transition"""
+
+    def __init__(self, breakdowns: Optional[Dict[str, Callable[[BaseModel], str]]] = None):
+        # Breakdown name -> function extracting the slice key from a job
+        self.breakdowns = breakdowns or {}
+        self.totals = Counters()
+        self.slices: Dict[str, Dict[str, Counters]] = {name: {} for name in self.breakdowns}
+        self.window = RollingWindow()
+        self.last_created: Optional[datetime] = None
+
+    def _counters(self, job: BaseModel) -> List[Counters]:
+        counters = [self.totals]
+        for name, key in self.breakdowns.items():
+            counters.append(self.slices[name].setdefault(key(job), Counters()))
+        return counters
+
+    def record(self, previous: Optional[BaseModel], job: BaseModel) -> None:
+        """Fold a job transition into the aggregates"""
+        counters = self._counters(job)
+        if previous is None:
+            for c in counters:
+                c.jobs += 1
+            self.window.add(job.createdAt, CREATED)
+            if self.last_created is None or job.createdAt > self.last_created:
+                self.last_created = job.createdAt
+
+        if previous is not None and previous.status == job.status:
+            return
+        finished_at = job.completedAt or job.createdAt
+        if job.status == JobStatus.COMPLETED:
+            records = getattr(job, "recordsGenerated", None) or 0
+            accuracy = getattr(job, "accuracy", None)
+            for c in counters:
+                c.completed += 1
+                c.records += records
+                if accuracy is not None:
+                    c.accuracy_sum += accuracy
+                    c.accuracy_count += 1
+            self.window.add(finished_at, COMPLETED)
+            self.window.add(finished_at, RECORDS, records)
+        elif job.status == JobStatus.FAILED:
+            for c in counters:
+                c.failed += 1
+            self.window.add(finished_at, FAILED)
+        elif job.status == JobStatus.CANCELLED:
+            for c in counters:
+                c.cancelled += 1
+            self.window.add(finished_at, CANCELLED)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "totals": self.totals,
+            "lastCreatedAt": self.last_created,
+            "breakdowns": {
+                name: {key: counters.as_dict() for key, counters in slices.items()}
+                for name, slices in self.slices.items()
+            },
+            "rates": self.window.rates(datetime.utcnow()),
+        }
+
+
+class StatsAggregator:
+    """O(1) generation and training statistics maintained from job events"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.generation = JobStats({
+            "byScenario": lambda job: job.config.scenarioType.value,
+            "byPrivacyLevel": lambda job: job.config.privacyLevel.value,
+        })
+        self.training = JobStats()
+
+    def on_job_event(self, kind: str, previous: Optional[BaseModel], job: BaseModel) -> None:
+        getattr(self, kind).record(previous, job)
+
+    def load(self, store: "JobStore") -> None:
+        """Seed the aggregates from every stored job at startup, replacing any earlier ones"""
+        self.reset()
+        for stats, list_jobs in (
+            (self.generation, store.list_generation_jobs),
+            (self.training, store.list_training_jobs),
+        ):
+            offset = 0
+            while True:
+                jobs = list_jobs(limit=SEED_PAGE_SIZE, offset=offset)
+                for job in jobs:
+                    stats.record(None, job)
+                if len(jobs) < SEED_PAGE_SIZE:
+                    break
+                offset += SEED_PAGE_SIZE
+
+# Singleton instance
+job_stats = StatsAggregator()
@@ -0,0 +1,496 @@
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, String, Text, DateTime, Integer, Float,
+    Index, select, delete, func, event, and_, or_
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from models.schemas import GenerationJob, SyntheticDataset, TrainingJob, WeightVector, JobStatus
+
+# Any SQLAlchemy URL works; SQLite keeps development dependency-free
+JOB_STORE_URL = os.getenv("JOB_STORE_URL", "sqlite:///./deepcal.db")
+
+ACTIVE_STATUSES = (JobStatus.PENDING.value, JobStatus.RUNNING.value)
+
+# A claim whose job row has not appeared after this long was left by a crashed submission
+CLAIM_GRACE_SECONDS = 60
+CLAIM_ATTEMPTS = 3
+
+
+class JobStore(ABC):
+    """Persistence for generation jobs, datasets, training jobs and weight matrices"""
+
+    @abstractmethod
+    def put_generation_job(self, job: GenerationJob, if_unfinished: bool = False) -> bool: ...
+
+    @abstractmethod
+    def get_generation_job(self, job_id: str) -> Optional[GenerationJob]: ...
+
+    @abstractmethod
+    def list_generation_jobs(self, status: Optional[JobStatus] = None, limit: Optional[int] = None, offset: int = 0) -> List[GenerationJob]: ...
+
+    @abstractmethod
+    def count_generation_jobs(self, status: JobStatus, created_before: Optional[datetime] = None) -> int: ...
+
+    @abstractmethod
+    def put_dataset(self, dataset: SyntheticDataset) -> None: ...
+
+    @abstractmethod
+    def get_dataset(self, dataset_id: str) -> Optional[SyntheticDataset]: ...
+
+    @abstractmethod
+    def get_dataset_by_job(self, job_id: str) -> Optional[SyntheticDataset]: ...
+
+    @abstractmethod
+    def get_latest_dataset(self) -> Optional[SyntheticDataset]: ...
+
+    @abstractmethod
+    def list_datasets(self, limit: Optional[int] = None, offset: int = 0) -> List[SyntheticDataset]: ...
+
+    @abstractmethod
+    def delete_dataset(self, dataset_id: str) -> bool: ...
+
+    @abstractmethod
+    def put_training_job(self, job: TrainingJob, if_unfinished: bool = False) -> bool: ...
+
+    @abstractmethod
+    def get_training_job(self, job_id: str) -> Optional[TrainingJob]: ...
+
+    @abstractmethod
+    def list_training_jobs(self, status: Optional[JobStatus] = None, limit: Optional[int] = None, offset: int = 0) -> List[TrainingJob]: ...
+
+    @abstractmethod
+    def put_weight_matrix(self, matrix_id: str, weights: WeightVector) -> None: ...
+
+    @abstractmethod
+    def get_weight_matrix(self, matrix_id: str) -> Optional[WeightVector]: ...
+
+    @abstractmethod
+    def count_weight_matrices(self) -> int: ...
+
+    @abstractmethod
+    def set_job_owner(self, kind: str, job_id: str, owner: str) -> None: ...
+
+    @abstractmethod
+    def touch_process(self, owner: str, seen_at: datetime) -> None: ...
+
+    @abstractmethod
+    def fail_orphaned_jobs(self, error: str, alive_since: datetime) -> int: ...
+
+    @abstractmethod
+    def claim_submission(
+        self, kind: str, claims: List[Tuple[str, Optional[datetime]]], job_id: str, fingerprint: str
+    ) -> Tuple[str, str]: ...
+
+    @abstractmethod
+    def release_submissions(self, job_id: str) -> None: ...
+
+    @abstractmethod
+    def touch_job_leases(self, kind: str, job_ids: Optional[List[str]], seen_at: datetime) -> None: ...
+
+    @abstractmethod
+    def abandoned_jobs(self, kind: str, seen_before: datetime) -> List[str]: ...
+
+    @abstractmethod
+    def add_scenario_pool_entry(self, scenario: str, job_id: str, base_version: str) -> None: ...
+
+    @abstractmethod
+    def scenario_pool_entries(self, scenario: str) -> List[Tuple[str, str, datetime]]: ...
+
+    @abstractmethod
+    def take_scenario_pool_entry(self, job_id: str) -> bool: ...
+
+
+metadata = MetaData()
+
+generation_jobs = Table(
+    "generation_jobs", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("status", String(16), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("records_generated", Integer),
+    Column("payload", Text, nullable=False),
+    Index("ix_generation_jobs_status", "status"),
+    Index("ix_generation_jobs_created_at", "created_at"),
+)
+
+datasets = Table(
+    "datasets", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("job_id", String(36), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("payload", Text, nullable=False),
+    Index("ix_datasets_job_id", "job_id"),
+    Index("ix_datasets_created_at", "created_at"),
+)
+
+training_jobs = Table(
+    "training_jobs", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("status", String(16), nullable=False),
+    Column("dataset_id", String(64), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("accuracy", Float),
+    Column("payload", Text, nullable=False),
+    Index("ix_training_jobs_status", "status"),
+    Index("ix_training_jobs_created_at", "created_at"),
+)
+
+weight_matrices = Table(
+    "weight_matrices", metadata,
+    Column("id", String(128), primary_key=True),
+    Column("updated_at", DateTime, nullable=False),
+    Column("payload", Text, nullable=False),
+)
+
+# Idempotency keys and request fingerprints, each claimed by one job
+job_submissions = Table(
+    "job_submissions", metadata,
+    Column("key", String(160), primary_key=True),
+    Column("kind", String(16), nullable=False),
+    Column("job_id", String(36), nullable=False),
+    Column("fingerprint", String(64), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    # NULL: the claim holds while the job is pending or running
+    Column("expires_at", DateTime),
+    Index("ix_job_submissions_job_id", "job_id"),
+    Index("ix_job_submissions_expires_at", "expires_at"),
+)
+
+# When a client last polled or streamed each unfinished job
+job_leases = Table(
+    "job_leases", metadata,
+    Column("job_id", String(36), primary_key=True),
+    Column("kind", String(16), nullable=False),
+    Column("seen_at", DateTime, nullable=False),
+)
+
+# The API process running each local job, and when each such process last reported in
+job_owners = Table(
+    "job_owners", metadata,
+    Column("job_id", String(36), primary_key=True),
+    Column("kind", String(16), nullable=False),
+    Column("owner", String(36), nullable=False),
+    Index("ix_job_owners_owner", "owner"),
+)
+
+job_processes = Table(
+    "job_processes", metadata,
+    Column("owner", String(36), primary_key=True),
+    Column("seen_at", DateTime, nullable=False),
+)
+
+# Generation jobs held for the scenario endpoints, with the base history version they were started on
+scenario_pool = Table(
+    "scenario_pool", metadata,
+    Column("job_id", String(36), primary_key=True),
+    Column("scenario", String(32), nullable=False),
+    Column("base_version", String(128), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_scenario_pool_scenario", "scenario"),
+)
+# Datasets still waiting in the scenario pool belong to nobody yet and are not listed
+NOT_POOLED = datasets.c.job_id.not_in(select(scenario_pool.c.job_id))
+
+JOB_TABLES = {"generation": generation_jobs, "training": training_jobs}
+
+
+class SQLJobStore(JobStore):
+    """Job store on any SQLAlchemy engine, with indexed lookups on id, job id, status and creation time"""
+
+    def __init__(self, url: str = JOB_STORE_URL):
+        self.engine = self._create_engine(url)
+        metadata.create_all(self.engine)
+
+    def _create_engine(self, url: str) -> Engine:
+        if not url.startswith("sqlite"):
+            return create_engine(url, pool_pre_ping=True)
+
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _configure_sqlite(dbapi_connection, _):
+            # WAL lets readers proceed while a job is being written
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return engine
+
+    def _upsert(self, table: Table, key: str, values: Dict[str, Any], if_unfinished: bool = False) -> bool:
+        """Insert or update a row; with ``if_unfinished`` a job row that has settled is left alone and False returned"""
+        with self.engine.begin() as conn:
+            query = table.update().where(table.c.id == key)
+            if if_unfinished:
+                query = query.where(table.c.status.in_(ACTIVE_STATUSES))
+            updated = conn.execute(query.values(**values))
+            if updated.rowcount == 0:
+                if if_unfinished and conn.execute(select(table.c.id).where(table.c.id == key)).first() is not None:
+                    return False
+                conn.execute(table.insert().values(id=key, **values))
+        return True
+
+    def _fetch_payload(self, query) -> Optional[str]:
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar()
+
+    def _fetch_payloads(self, query, limit: Optional[int], offset: int) -> List[str]:
+        if limit is not None:
+            query = query.limit(limit)
+        if offset:
+            query = query.offset(offset)
+        with self.engine.connect() as conn:
+            return list(conn.execute(query).scalars())
+
+    # Generation jobs
+    def put_generation_job(self, job: GenerationJob, if_unfinished: bool = False) -> bool:
+        return self._upsert(generation_jobs, job.id, {
+            "status": job.status.value,
+            "created_at": job.createdAt,
+            "records_generated": job.recordsGenerated,
+            "payload": job.model_dump_json(),
+        }, if_unfinished)
+
+    def get_generation_job(self, job_id: str) -> Optional[GenerationJob]:
+        payload = self._fetch_payload(select(generation_jobs.c.payload).where(generation_jobs.c.id == job_id))
+        return GenerationJob.model_validate_json(payload) if payload else None
+
+    def list_generation_jobs(self, status: Optional[JobStatus] = None, limit: Optional[int] = None, offset: int = 0) -> List[GenerationJob]:
+        query = select(generation_jobs.c.payload).order_by(generation_jobs.c.created_at)
+        if status is not None:
+            query = query.where(generation_jobs.c.status == status.value)
+        return [GenerationJob.model_validate_json(p) for p in self._fetch_payloads(query, limit, offset)]
+
+    def count_generation_jobs(self, status: JobStatus, created_before: Optional[datetime] = None) -> int:
+        query = select(func.count()).select_from(generation_jobs).where(generation_jobs.c.status == status.value)
+        if created_before is not None:
+            query = query.where(generation_jobs.c.created_at < created_before)
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar_one()
+
+    # Datasets
+    def put_dataset(self, dataset: SyntheticDataset) -> None:
+        self._upsert(datasets, dataset.id, {
+            "job_id": dataset.jobId,
+            "created_at": dataset.metadata.generatedAt,
+            "payload": dataset.model_dump_json(),
+        })
+
+    def get_dataset(self, dataset_id: str) -> Optional[SyntheticDataset]:
+        payload = self._fetch_payload(select(datasets.c.payload).where(datasets.c.id == dataset_id))
+        return SyntheticDataset.model_validate_json(payload) if payload else None
+
+    def get_dataset_by_job(self, job_id: str) -> Optional[SyntheticDataset]:
+        payload = self._fetch_payload(select(datasets.c.payload).where(datasets.c.job_id == job_id).limit(1))
+        return SyntheticDataset.model_validate_json(payload) if payload else None
+
+    def get_latest_dataset(self) -> Optional[SyntheticDataset]:
+        query = select(datasets.c.payload).where(NOT_POOLED).order_by(datasets.c.created_at.desc()).limit(1)
+        payload = self._fetch_payload(query)
+        return SyntheticDataset.model_validate_json(payload) if payload else None
+
+    def list_datasets(self, limit: Optional[int] = None, offset: int = 0) -> List[SyntheticDataset]:
+        query = select(datasets.c.payload).where(NOT_POOLED).order_by(datasets.c.created_at)
+        return [SyntheticDataset.model_validate_json(p) for p in self._fetch_payloads(query, limit, offset)]
+
+    def delete_dataset(self, dataset_id: str) -> bool:
+        with self.engine.begin() as conn:
+            return conn.execute(delete(datasets).where(datasets.c.id == dataset_id)).rowcount > 0
+
+    # Training jobs
+    def put_training_job(self, job: TrainingJob, if_unfinished: bool = False) -> bool:
+        return self._upsert(training_jobs, job.id, {
+            "status": job.status.value,
+            "dataset_id": job.datasetId,
+            "created_at": job.createdAt,
+            "accuracy": job.accuracy,
+            "payload": job.model_dump_json(),
+        }, if_unfinished)
+
+    def get_training_job(self, job_id: str) -> Optional[TrainingJob]:
+        payload = self._fetch_payload(select(training_jobs.c.payload).where(training_jobs.c.id == job_id))
+        return TrainingJob.model_validate_json(payload) if payload else None
+
+    def list_training_jobs(self, status: Optional[JobStatus] = None, limit: Optional[int] = None, offset: int = 0) -> List[TrainingJob]:
+        query = select(training_jobs.c.payload).order_by(training_jobs.c.created_at)
+        if status is not None:
+            query = query.where(training_jobs.c.status == status.value)
+        return [TrainingJob.model_validate_json(p) for p in self._fetch_payloads(query, limit, offset)]
+
+    # Weight matrices
+    def put_weight_matrix(self, matrix_id: str, weights: WeightVector) -> None:
+        self._upsert(weight_matrices, matrix_id, {
+            "updated_at": datetime.utcnow(),
+            "payload": weights.model_dump_json(),
+        })
+
+    def get_weight_matrix(self, matrix_id: str) -> Optional[WeightVector]:
+        payload = self._fetch_payload(select(weight_matrices.c.payload).where(weight_matrices.c.id == matrix_id))
+        return WeightVector.model_validate_json(payload) if payload else None
+
+    def count_weight_matrices(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(weight_matrices)).scalar()
+
+    # Recovery
+    def set_job_owner(self, kind: str, job_id: str, owner: str) -> None:
+        """Record the process a job runs in; set before the job is stored"""
+        with self.engine.begin() as conn:
+            conn.execute(job_owners.insert().values(job_id=job_id, kind=kind, owner=owner))
+
+    def touch_process(self, owner: str, seen_at: datetime) -> None:
+        with self.engine.begin() as conn:
+            updated = conn.execute(job_processes.update().where(job_processes.c.owner == owner).values(seen_at=seen_at))
+            if updated.rowcount == 0:
+                conn.execute(job_processes.insert().values(owner=owner, seen_at=seen_at))
+
+    def fail_orphaned_jobs(self, error: str, alive_since: datetime) -> int:
+        """Mark pending or running jobs as failed unless their process has reported in since ``alive_since``"""
+        failed = 0
+        now = datetime.utcnow()
+        live_owners = select(job_processes.c.owner).where(job_processes.c.seen_at >= alive_since)
+        owned = select(job_owners.c.job_id).where(job_owners.c.owner.in_(live_owners))
+        for kind, table in JOB_TABLES.items():
+            model = GenerationJob if kind == "generation" else TrainingJob
+            with self.engine.begin() as conn:
+                rows = conn.execute(select(table.c.id, table.c.payload).where(
+                    table.c.status.in_(ACTIVE_STATUSES), table.c.id.not_in(owned)
+                )).all()
+                for job_id, payload in rows:
+                    job = model.model_validate_json(payload)
+                    job.status = JobStatus.FAILED
+                    job.error = error
+                    job.completedAt = now
+                    conn.execute(table.update().where(table.c.id == job_id).values(
+                        status=job.status.value, payload=job.model_dump_json()
+                    ))
+                failed += len(rows)
+                # Owners only matter while both they and their job are alive
+                finished = select(table.c.id).where(table.c.status.not_in(ACTIVE_STATUSES))
+                conn.execute(delete(job_owners).where(
+                    job_owners.c.kind == kind,
+                    or_(job_owners.c.job_id.in_(finished), job_owners.c.owner.not_in(live_owners))
+                ))
+        with self.engine.begin() as conn:
+            conn.execute(delete(job_processes).where(job_processes.c.seen_at < alive_since))
+        return failed
+
+    # Submissions
+    def claim_submission(
+        self, kind: str, claims: List[Tuple[str, Optional[datetime]]], job_id: str, fingerprint: str
+    ) -> Tuple[str, str]:
+        """Claim every key for ``job_id`` unless one is still held.
+
+        Returns the holding job's id and request fingerprint: ``job_id`` and
+        ``fingerprint`` when this call won. When another job holds a key for
+        the same request, the keys it lacks are claimed for that job, so an
+        Idempotency-Key sent with a duplicate still finds the job after the
+        duplicate's other claims lapse. The primary key makes concurrent
+        claims from any process settle on one winner.
+        """
+        keys = [key for key, _ in claims]
+        for attempt in range(CLAIM_ATTEMPTS):
+            now = datetime.utcnow()
+            try:
+                with self.engine.begin() as conn:
+                    self._expire_submissions(conn, kind, now)
+                    held = {
+                        row.key: (row.job_id, row.fingerprint)
+                        for row in conn.execute(select(job_submissions).where(job_submissions.c.key.in_(keys)))
+                    }
+                    holder = next((held[key] for key in keys if key in held), None)
+                    if holder is not None and holder[1] != fingerprint:
+                        # A key reused for a different request; the caller rejects it
+                        return holder
+                    holder_id = holder[0] if holder is not None else job_id
+                    missing = [(key, expires_at) for key, expires_at in claims if key not in held]
+                    if missing:
+                        conn.execute(job_submissions.insert(), [
+                            {"key": key, "kind": kind, "job_id": holder_id, "fingerprint": fingerprint,
+                             "created_at": now, "expires_at": expires_at}
+                            for key, expires_at in missing
+                        ])
+                    return holder_id, fingerprint
+            except IntegrityError:
+                # Another submission claimed a key first; read its claim
+                if attempt == CLAIM_ATTEMPTS - 1:
+                    raise
+
+    def _expire_submissions(self, conn, kind: str, now: datetime) -> None:
+        """Drop expired claims and claims whose job has settled or never appeared"""
+        jobs = JOB_TABLES[kind]
+        job_status = select(jobs.c.status).where(jobs.c.id == job_submissions.c.job_id).scalar_subquery()
+        conn.execute(delete(job_submissions).where(
+            job_submissions.c.kind == kind,
+            or_(
+                job_submissions.c.expires_at < now,
+                and_(job_submissions.c.expires_at.is_(None), job_status.not_in(ACTIVE_STATUSES)),
+                and_(
+                    job_status.is_(None),
+                    job_submissions.c.created_at < now - timedelta(seconds=CLAIM_GRACE_SECONDS)
+                ),
+            )
+        ))
+
+    def release_submissions(self, job_id: str) -> None:
+        """Drop the claims of a job that could not be created"""
+        with self.engine.begin() as conn:
+            conn.execute(delete(job_submissions).where(job_submissions.c.job_id == job_id))
+
+    # Leases
+    def touch_job_leases(self, kind: str, job_ids: Optional[List[str]], seen_at: datetime) -> None:
+        """Renew the leases of ``job_ids``, or of every unfinished job of ``kind`` when None"""
+        jobs = JOB_TABLES[kind]
+        with self.engine.begin() as conn:
+            if job_ids is None:
+                job_ids = list(conn.execute(select(jobs.c.id).where(jobs.c.status.in_(ACTIVE_STATUSES))).scalars())
+            for job_id in job_ids:
+                updated = conn.execute(job_leases.update().where(job_leases.c.job_id == job_id).values(seen_at=seen_at))
+                if updated.rowcount == 0:
+                    conn.execute(job_leases.insert().values(job_id=job_id, kind=kind, seen_at=seen_at))
+
+    def abandoned_jobs(self, kind: str, seen_before: datetime) -> List[str]:
+        """Unfinished jobs last seen, or created if never seen, before ``seen_before``"""
+        jobs = JOB_TABLES[kind]
+        last_seen = func.coalesce(job_leases.c.seen_at, jobs.c.created_at)
+        query = (
+            select(jobs.c.id)
+            .select_from(jobs.outerjoin(job_leases, job_leases.c.job_id == jobs.c.id))
+            .where(jobs.c.status.in_(ACTIVE_STATUSES), last_seen < seen_before)
+        )
+        with self.engine.begin() as conn:
+            # Leases of finished jobs are no longer needed
+            finished = select(jobs.c.id).where(jobs.c.status.not_in(ACTIVE_STATUSES))
+            conn.execute(delete(job_leases).where(job_leases.c.kind == kind, job_leases.c.job_id.in_(finished)))
+            return list(conn.execute(query).scalars())
+
+    # Scenario pool
+    def add_scenario_pool_entry(self, scenario: str, job_id: str, base_version: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(scenario_pool.insert().values(
+                job_id=job_id, scenario=scenario, base_version=base_version, created_at=datetime.utcnow()
+            ))
+
+    def scenario_pool_entries(self, scenario: str) -> List[Tuple[str, str, datetime]]:
+        """Job id, base version and pooling time of a scenario's entries, oldest first"""
+        query = (
+            select(scenario_pool.c.job_id, scenario_pool.c.base_version, scenario_pool.c.created_at)
+            .where(scenario_pool.c.scenario == scenario)
+            .order_by(scenario_pool.c.created_at)
+        )
+        with self.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(query)]
+
+    def take_scenario_pool_entry(self, job_id: str) -> bool:
+        """Remove an entry from the pool; only one caller, in any process, gets True"""
+        with self.engine.begin() as conn:
+            return conn.execute(delete(scenario_pool).where(scenario_pool.c.job_id == job_id)).rowcount > 0
+
+
+def create_job_store(url: str = JOB_STORE_URL) -> JobStore:
+    """Create the job store configured by JOB_STORE_URL"""
+    return SQLJobStore(url)
@@ -0,0 +1,98 @@
+import os
+import time
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional, Tuple
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from services.job_store import JobStore
+
+# A retried request with the same Idempotency-Key returns the original job for this long
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+# Submitting a request identical to a pending or running job returns that job
+DEDUPLICATE_ACTIVE_JOBS = os.getenv("DEDUPLICATE_ACTIVE_JOBS", "true").lower() == "true"
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 100
+
+# How long a duplicate waits for the submission holding its claim to store its job
+CLAIM_WAIT_SECONDS = 5.0
+CLAIM_POLL_SECONDS = 0.05
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an Idempotency-Key is sent again with a different request"""
+
+
+class SubmissionInProgress(Exception):
+    """Raised when the submission a request duplicates has not stored its job in time"""
+
+
+def request_fingerprint(request: BaseModel) -> str:
+    """Hash of a request's canonical JSON; equal requests hash equally whatever their field order"""
+    return hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+
+
+def submission_claims(kind: str, fingerprint: str, idempotency_key: Optional[str] = None) -> List[Tuple[str, Optional[datetime]]]:
+    """Claim keys for a submission with their expiry, the idempotency key first.
+
+    A claim without expiry holds while its job is pending or running.
+    """
+    claims = []
+    if idempotency_key:
+        if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise ValueError(f"Idempotency-Key must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+        expires_at = datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+        claims.append((f"{kind}:key:{idempotency_key}", expires_at))
+    if DEDUPLICATE_ACTIVE_JOBS:
+        claims.append((f"{kind}:request:{fingerprint}", None))
+    return claims
+
+
+def claim_job(store: "JobStore", kind: str, request: BaseModel, job_id: str, idempotency_key: Optional[str] = None) -> Optional[str]:
+    """Claim a submission for ``job_id``, or return the id of the job that already holds it.
+
+    The claim is atomic in the job store, so concurrent identical requests
+    in any API process end up with one job between them. Callers that fail
+    to create the job after winning must release the claim.
+    """
+    fingerprint = request_fingerprint(request)
+    claims = submission_claims(kind, fingerprint, idempotency_key)
+    if not claims:
+        return None
+    holder, holder_fingerprint = store.claim_submission(kind, claims, job_id, fingerprint)
+    if holder == job_id:
+        return None
+    if holder_fingerprint != fingerprint:
+        raise IdempotencyKeyReused("Idempotency-Key was already used for a different request")
+    return holder
+
+
+async def claim_or_find_job(
+    store: "JobStore",
+    kind: str,
+    request: BaseModel,
+    job_id: str,
+    idempotency_key: Optional[str],
+    find_job: Callable[[str], Awaitable[Optional[Any]]]
+) -> Optional[Any]:
+    """The job a submission duplicates, or None once ``job_id`` holds the claim and may be submitted.
+
+    A concurrent duplicate may hold the claim before it has stored its job;
+    the job is waited for rather than a second one submitted under an id
+    that holds no claim. If it does not appear in time, SubmissionInProgress
+    is raised. A holder that gives up releases its claim, which the next
+    attempt then wins.
+    """
+    deadline = time.monotonic() + CLAIM_WAIT_SECONDS
+    while True:
+        holder = await asyncio.to_thread(claim_job, store, kind, request, job_id, idempotency_key)
+        if holder is None:
+            return None
+        existing = await find_job(holder)
+        if existing is not None:
+            return existing
+        if time.monotonic() >= deadline:
+            raise SubmissionInProgress("An identical submission is still being created, retry shortly")
+        await asyncio.sleep(CLAIM_POLL_SECONDS)
@@ -0,0 +1,312 @@
+import os
+import time
+import uuid
+import ctypes
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Set
+from multiprocessing.process import BaseProcess
+from services.workers import job_processes
+
+if TYPE_CHECKING:
+    from services.job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+# Wall-clock limit per job, from start of work to result; 0 disables
+GENERATION_TIMEOUT_SECONDS = float(os.getenv("GENERATION_TIMEOUT_SECONDS", "3600"))
+TRAINING_TIMEOUT_SECONDS = float(os.getenv("TRAINING_TIMEOUT_SECONDS", "1800"))
+# Resident memory limit per job process; 0 disables
+JOB_MEMORY_LIMIT_MB = int(os.getenv("JOB_MEMORY_LIMIT_MB", "4096"))
+# Unfinished jobs nobody has polled or streamed for this long are cancelled; 0 disables
+JOB_ABANDON_SECONDS = float(os.getenv("JOB_ABANDON_SECONDS", "900"))
+
+# How often a job process is checked for a result, its deadline and its memory
+SUPERVISOR_POLL_SECONDS = 0.5
+# How often abandoned jobs are looked for
+REAP_INTERVAL_SECONDS = 60.0
+# A watched job's lease is written at most this often per process
+LEASE_TOUCH_SECONDS = 30.0
+# Grace period between SIGTERM and SIGKILL for a stopped job process
+TERMINATE_GRACE_SECONDS = 5.0
+# How often this process reports in as alive, and how long a silent process is given before its jobs count as orphaned
+PROCESS_HEARTBEAT_SECONDS = 15.0
+PROCESS_DEAD_AFTER_SECONDS = 60.0
+
+# Owner of the local jobs this process runs
+PROCESS_ID = str(uuid.uuid4())
+
+
+class JobAborted(Exception):
+    """Raised when the supervisor stops a job for exceeding a limit"""
+
+
+class JobTimedOut(JobAborted):
+    pass
+
+
+class JobMemoryExceeded(JobAborted):
+    def __init__(self, message: Optional[str] = None):
+        super().__init__(message or f"Job exceeded its {JOB_MEMORY_LIMIT_MB}MB memory limit")
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process, where /proc is available"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _run_child(conn, fn: Callable, args: tuple, kwargs: dict):
+    """Entry point of a job process: run ``fn`` and send back its result or exception"""
+    try:
+        outcome = (True, fn(*args, **kwargs))
+    except BaseException as e:
+        outcome = (False, e)
+    try:
+        conn.send(outcome)
+    except Exception as e:
+        # The exception or result did not pickle; its message still explains the failure
+        conn.send((False, RuntimeError(str(outcome[1]) if not outcome[0] else f"Job result could not be sent: {e}")))
+    finally:
+        conn.close()
+
+
+class MemoryWatchdog:
+    """Memory limit for a job that runs in the calling process, e.g. a Celery task.
+
+    While the block runs, a thread polls the process's resident memory and,
+    past ``limit_mb``, raises JobMemoryExceeded in the thread that entered
+    the block. The exception lands at the job's next Python instruction, so
+    a single long native call finishes first.
+    """
+
+    def __init__(self, limit_mb: int = JOB_MEMORY_LIMIT_MB, interval: float = SUPERVISOR_POLL_SECONDS):
+        self.limit_bytes = limit_mb * 1024 * 1024
+        self.interval = interval
+        self.exceeded = False
+        self._target: Optional[int] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MemoryWatchdog":
+        if self.limit_bytes > 0:
+            self._target = threading.get_ident()
+            self._thread = threading.Thread(target=self._watch, name="job-memory-watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self._lock:
+            self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            rss = _rss_bytes(os.getpid())
+            if rss is None or rss <= self.limit_bytes:
+                continue
+            with self._lock:
+                # Never raised once the block has been left
+                if not self._stopped.is_set():
+                    self.exceeded = True
+                    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                        ctypes.c_ulong(self._target), ctypes.py_object(JobMemoryExceeded)
+                    )
+            return
+
+
+class JobSupervisor:
+    """Owns the tasks and processes of one kind of background job.
+
+    Every job runs as a tracked asyncio task, so it can be cancelled by id;
+    the heavy part runs in its own process, so cancelling, a deadline or a
+    memory limit can stop it without disturbing other jobs. Clients watching
+    a job renew its lease in the job store, and jobs whose lease lapses are
+    reported as abandoned.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        store: "JobStore",
+        max_workers: int,
+        timeout_seconds: float,
+        memory_limit_mb: int = JOB_MEMORY_LIMIT_MB,
+        abandon_seconds: float = JOB_ABANDON_SECONDS
+    ):
+        self.kind = kind
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024
+        self.abandon_seconds = abandon_seconds
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._processes: Set[BaseProcess] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._touched: Dict[str, float] = {}
+
+    def start(self, job_id: str, coro: Coroutine) -> asyncio.Task:
+        """Run a job's coroutine as a task that ``cancel`` can reach"""
+        task = asyncio.create_task(coro)
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return task
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job's task, terminating its process; False if it is not running here"""
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def running(self) -> List[str]:
+        return list(self._tasks)
+
+    async def run_process(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_tick: Optional[Callable[[], Awaitable[None]]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """Run ``fn`` in a new process within the worker, deadline and memory limits.
+
+        At most ``max_workers`` processes run at once; callers wait for a
+        slot. ``on_tick`` is awaited on every poll, e.g. to publish progress.
+        Cancelling the caller terminates the process.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        async with self._slots:
+            receiver, sender = job_processes.Pipe(duplex=False)
+            # ``fn`` and its arguments are pickled into the new process, so ``fn`` must be module-level
+            process = job_processes.Process(target=_run_child, args=(sender, fn, args, kwargs), daemon=True)
+            # Tracked before it exists, so neither a cancel nor close can miss it
+            self._processes.add(process)
+            # Starting a process and pickling its arguments into it takes long enough to stall the loop
+            starting = asyncio.ensure_future(asyncio.to_thread(process.start))
+            finished = False
+            try:
+                # A cancel during the start must still reach the cleanup below
+                await asyncio.shield(starting)
+                sender.close()
+                deadline = time.monotonic() + self.timeout_seconds if self.timeout_seconds > 0 else None
+                while True:
+                    if receiver.poll():
+                        try:
+                            ok, value = receiver.recv()
+                        except EOFError:
+                            # Killed before it could answer, e.g. by the OOM killer
+                            await asyncio.to_thread(process.join, TERMINATE_GRACE_SECONDS)
+                            raise RuntimeError(f"Job process exited with code {process.exitcode}")
+                        finished = True
+                        if not ok:
+                            raise value
+                        return value
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise JobTimedOut(f"Job exceeded its {self.timeout_seconds:.0f}s time limit")
+                    rss = _rss_bytes(process.pid) if self.memory_limit_bytes else None
+                    if rss is not None and rss > self.memory_limit_bytes:
+                        raise JobMemoryExceeded(
+                            f"Job exceeded its {self.memory_limit_bytes // (1024 * 1024)}MB memory limit"
+                        )
+                    if on_tick is not None:
+                        await on_tick()
+                    await asyncio.sleep(SUPERVISOR_POLL_SECONDS)
+            finally:
+                if not starting.done():
+                    # The start completes even though the caller was cancelled; wait to stop the child
+                    await asyncio.wait({starting})
+                sender.close()
+                receiver.close()
+                self._processes.discard(process)
+                if finished:
+                    # The result is in; let the process exit on its own
+                    await asyncio.to_thread(process.join, TERMINATE_GRACE_SECONDS)
+                if process.is_alive():
+                    await asyncio.to_thread(self._terminate, process)
+
+    @staticmethod
+    def _terminate(process: BaseProcess):
+        if process.pid is None:
+            # Not started; whoever is starting it stops it afterwards
+            return
+        process.terminate()
+        process.join(TERMINATE_GRACE_SECONDS)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def close(self):
+        """Cancel every task and stop every job process"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks = {}
+        for process in list(self._processes):
+            self._terminate(process)
+        self._processes = set()
+
+    # Leases
+    def watch(self, job_id: str):
+        """Record that a client is following a job; writes are throttled per job"""
+        if self.abandon_seconds <= 0:
+            return
+        now = time.monotonic()
+        if now - self._touched.get(job_id, float("-inf")) < LEASE_TOUCH_SECONDS:
+            return
+        self._touched[job_id] = now
+        self.store.touch_job_leases(self.kind, [job_id], datetime.utcnow())
+
+    def watch_all(self):
+        """Renew the lease of every unfinished job, for streams that follow them all"""
+        if self.abandon_seconds > 0:
+            self.store.touch_job_leases(self.kind, None, datetime.utcnow())
+
+    def abandoned(self) -> List[str]:
+        """Unfinished jobs whose lease, or creation when never watched, lapsed"""
+        if self.abandon_seconds <= 0:
+            return []
+        self._touched = {
+            job_id: touched for job_id, touched in self._touched.items()
+            if time.monotonic() - touched < LEASE_TOUCH_SECONDS
+        }
+        return self.store.abandoned_jobs(self.kind, datetime.utcnow() - timedelta(seconds=self.abandon_seconds))
+
+
+async def reap_abandoned_jobs(interval: float = REAP_INTERVAL_SECONDS):
+    """Cancel abandoned jobs of every created job service, forever"""
+    from services.dependencies import get_mostly_service, get_training_service
+
+    while True:
+        await asyncio.sleep(interval)
+        for provider in (get_mostly_service, get_training_service):
+            if not provider.created:
+                continue
+            try:
+                await provider().reap_abandoned()
+            except Exception as e:
+                logger.warning("Reaping abandoned jobs failed: %s", e)
+
+
+def recover_orphaned_jobs(store: "JobStore") -> int:
+    """Fail unfinished jobs whose process has died; jobs of live processes, e.g. other API workers, are left alone"""
+    alive_since = datetime.utcnow() - timedelta(seconds=PROCESS_DEAD_AFTER_SECONDS)
+    return store.fail_orphaned_jobs("Interrupted by server restart", alive_since)
+
+
+async def report_alive(store: "JobStore", interval: float = PROCESS_HEARTBEAT_SECONDS):
+    """Record that this process, and so every local job it runs, is alive, forever"""
+    while True:
+        try:
+            await asyncio.to_thread(store.touch_process, PROCESS_ID, datetime.utcnow())
+        except Exception as e:
+            logger.warning("Recording the process heartbeat failed: %s", e)
+        await asyncio.sleep(interval)
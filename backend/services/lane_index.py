@@ -0,0 +1,207 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from services.shipment_features import BASE_DATA_PATH, parse_numeric, shipment_cost, transit_days
+from services.shipment_history import shipment_history
+
+# Lanes are keyed on these columns, in this order
+LANE_COLUMNS = ("origin_country", "destination_country", "carrier")
+
+EARTH_RADIUS_KM = 6371.0088
+
+COST_PER_KG_PERCENTILES = (10, 50, 90)
+
+# Rough (lat_min, lat_max, lon_min, lon_max) per country, used to catch transposed or misplaced coordinates
+COUNTRY_BOUNDS = {
+    "kenya": (-4.7, 5.0, 33.9, 41.9),
+    "benin": (6.2, 12.4, 0.8, 3.9),
+    "burundi": (-4.5, -2.3, 29.0, 30.9),
+    "central africa republic": (2.2, 11.0, 14.4, 27.5),
+    "central african republic": (2.2, 11.0, 14.4, 27.5),
+    "chad": (7.4, 23.5, 13.5, 24.0),
+    "comoros": (-12.5, -11.3, 43.2, 44.6),
+    "congo brazzaville": (-5.1, 3.7, 11.1, 18.7),
+    "congo kinshasa": (-13.5, 5.4, 12.2, 31.3),
+    "dr congo": (-13.5, 5.4, 12.2, 31.3),
+    "cote d'ivoire": (4.3, 10.8, -8.6, -2.5),
+    # Spelled with a lower-case L in the embedded shipment history
+    "cote d'lvoire": (4.3, 10.8, -8.6, -2.5),
+    "eritrea": (12.4, 18.0, 36.4, 43.2),
+    "eswatini": (-27.4, -25.7, 30.8, 32.2),
+    "ethiopia": (3.4, 14.9, 33.0, 48.0),
+    "ghana": (4.7, 11.2, -3.3, 1.2),
+    "guinea": (7.2, 12.7, -15.1, -7.6),
+    "guinea bissau": (10.9, 12.7, -16.8, -13.6),
+    "madagascar": (-25.7, -11.9, 43.2, 50.5),
+    "malawi": (-17.2, -9.4, 32.7, 35.9),
+    "mauritius": (-20.6, -19.9, 57.3, 57.8),
+    "mayotte": (-13.1, -12.6, 45.0, 45.3),
+    "nigeria": (4.2, 13.9, 2.7, 14.7),
+    "rwanda": (-2.9, -1.0, 28.8, 30.9),
+    "sao tome": (-0.1, 1.7, 6.4, 7.5),
+    "senegal": (12.3, 16.7, -17.6, -11.3),
+    "sierra leone": (6.9, 10.0, -13.3, -10.2),
+    "south sudan": (3.5, 12.3, 23.4, 36.0),
+    "sudan": (8.6, 22.3, 21.8, 38.6),
+    "tanzania": (-11.8, -1.0, 29.3, 40.5),
+    "togo": (6.1, 11.2, -0.2, 1.9),
+    "uganda": (-1.5, 4.3, 29.5, 35.1),
+    "zambia": (-18.1, -8.2, 21.9, 33.8),
+    "zimbabwe": (-22.5, -15.6, 25.2, 33.1),
+}
+COUNTRY_BOUNDS_MARGIN_DEG = 1.0
+
+LaneKey = Tuple[str, str, str]
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in kilometres between coordinate arrays given in degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def plausible_coordinates(country: pd.Series, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Coordinates checked against the country they are recorded for.
+
+    Pairs inside the country's bounds are kept, transposed pairs that fit
+    once swapped are swapped back, and anything else becomes NaN. Countries
+    without bounds only need coordinates within the valid degree ranges.
+    """
+    bounds = np.array([
+        COUNTRY_BOUNDS.get(name, (np.nan,) * 4)
+        for name in country.astype("string").fillna("").str.strip().str.lower()
+    ], dtype=float).reshape(len(country), 4)
+    lat_min, lat_max, lon_min, lon_max = bounds.T
+    margin = COUNTRY_BOUNDS_MARGIN_DEG
+
+    def inside(lat, lon):
+        return (
+            (lat >= lat_min - margin) & (lat <= lat_max + margin)
+            & (lon >= lon_min - margin) & (lon <= lon_max + margin)
+        )
+
+    known = ~np.isnan(lat_min)
+    as_recorded = np.where(known, inside(lat, lon), (np.abs(lat) <= 90) & (np.abs(lon) <= 180))
+    transposed = known & ~as_recorded & inside(lon, lat)
+    return (
+        np.where(as_recorded, lat, np.where(transposed, lon, np.nan)),
+        np.where(as_recorded, lon, np.where(transposed, lat, np.nan)),
+    )
+
+
+def _coordinates(df: pd.DataFrame, side: str) -> Tuple[np.ndarray, np.ndarray]:
+    country = df[f"{side}_country"] if f"{side}_country" in df.columns else pd.Series([""] * len(df))
+    return plausible_coordinates(country, _numeric(df, f"{side}_latitude"), _numeric(df, f"{side}_longitude"))
+
+
+def lane_key(origin: str, destination: str, carrier: str) -> LaneKey:
+    """Case- and padding-insensitive lane key"""
+    return (origin.strip().lower(), destination.strip().lower(), carrier.strip().lower())
+
+
+def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+    return parse_numeric(df[column]) if column in df.columns else np.full(len(df), np.nan)
+
+
+class LaneIndex:
+    """Per-lane aggregates of a shipment history held as parallel column arrays.
+
+    Lane ``i`` is described by ``keys[i]`` and ``columns[name][i]``; lookup
+    by lane key is one dict probe.
+    """
+
+    def __init__(self, version: str, keys: List[Tuple[str, str, str]], columns: Dict[str, np.ndarray]):
+        self.version = version
+        self.keys = keys
+        self.columns = columns
+        self._positions = {lane_key(*key): i for i, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def position(self, origin: str, destination: str, carrier: str) -> Optional[int]:
+        return self._positions.get(lane_key(origin, destination, carrier))
+
+    def lane(self, i: int) -> Dict[str, Any]:
+        """Lane ``i`` as a plain dict, NaN statistics as None"""
+        origin, destination, carrier = self.keys[i]
+        stats = {name: values[i].item() for name, values in self.columns.items()}
+        stats = {name: None if isinstance(v, float) and np.isnan(v) else v for name, v in stats.items()}
+        return {"origin": origin, "destination": destination, "carrier": carrier, **stats}
+
+    def lookup(self, origin: str, destination: str, carrier: str) -> Optional[Dict[str, Any]]:
+        i = self.position(origin, destination, carrier)
+        return None if i is None else self.lane(i)
+
+
+def build_lane_index(df: pd.DataFrame, version: str = "") -> LaneIndex:
+    """Aggregate shipments per (origin, destination, carrier) lane in one grouped pass.
+
+    Distances come from coordinates checked against their country; a lane
+    whose coordinates are all implausible has no distance. Cost is the
+    carrier cost, or the lowest forwarder quote where none was recorded.
+    Transit days run from collection to arrival; the delivered rate is the
+    share of shipments whose status is "Delivered".
+    """
+    cost = shipment_cost(df)
+    weight = _numeric(df, "weight_kg")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cost_per_kg = np.where(weight > 0, cost / weight, np.nan)
+    delivered = (
+        df["delivery_status"].fillna("").str.strip().str.lower().eq("delivered").to_numpy(dtype=float)
+        if "delivery_status" in df.columns else np.full(len(df), np.nan)
+    )
+
+    rows = pd.DataFrame({col: df[col].astype("string").fillna("").str.strip() for col in LANE_COLUMNS})
+    rows["distanceKm"] = haversine_km(*_coordinates(df, "origin"), *_coordinates(df, "destination"))
+    rows["cost"] = cost
+    rows["weight"] = weight
+    rows["volume"] = _numeric(df, "volume_cbm")
+    rows["costPerKg"] = cost_per_kg
+    rows["transitDays"] = transit_days(df)
+    rows["delivered"] = delivered
+
+    groups = rows.groupby(list(LANE_COLUMNS), sort=True)
+    sums = groups[["cost", "weight", "volume"]].sum(min_count=1)
+    means = groups[["distanceKm", "cost", "weight", "volume", "transitDays", "delivered"]].mean()
+    per_kg = groups["costPerKg"].quantile([p / 100 for p in COST_PER_KG_PERCENTILES]).unstack()
+    transit_p90 = groups["transitDays"].quantile(0.9)
+
+    columns = {
+        "shipments": groups.size().to_numpy(dtype=np.int64),
+        "distanceKm": means["distanceKm"].to_numpy(),
+        "totalCost": sums["cost"].to_numpy(),
+        "meanCost": means["cost"].to_numpy(),
+        "totalWeightKg": sums["weight"].to_numpy(),
+        "meanWeightKg": means["weight"].to_numpy(),
+        "totalVolumeCbm": sums["volume"].to_numpy(),
+        "meanVolumeCbm": means["volume"].to_numpy(),
+        **{
+            f"costPerKgP{p}": per_kg[p / 100].to_numpy(dtype=float)
+            for p in COST_PER_KG_PERCENTILES
+        },
+        "meanTransitDays": means["transitDays"].to_numpy(),
+        "p90TransitDays": transit_p90.to_numpy(dtype=float),
+        "deliveredRate": means["delivered"].to_numpy(),
+    }
+    keys = [tuple(key) for key in means.index.to_list()]
+    return LaneIndex(version, keys, columns)
+
+
+_lock = threading.Lock()
+_cached: Dict[str, LaneIndex] = {}
+
+
+def history_lane_index(path: str = BASE_DATA_PATH) -> LaneIndex:
+    """Lane index of the base shipment history, rebuilt only when its content changes"""
+    version = shipment_history.version(path)
+    index = _cached.get(path)
+    if index is None or index.version != version:
+        with _lock:
+            index = _cached.get(path)
+            if index is None or index.version != version:
+                index = build_lane_index(shipment_history.frame(path), version)
+                _cached[path] = index
+    return index
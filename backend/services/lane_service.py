@@ -0,0 +1,32 @@
+import asyncio
+from typing import Optional
+from models.schemas import LaneIndexResponse, LaneStats
+from services.lane_index import history_lane_index
+
+
+class LaneService:
+    async def lanes(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        carrier: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> LaneIndexResponse:
+        """Precomputed lane statistics, looked up directly when the full lane key is given"""
+        index = await asyncio.to_thread(history_lane_index)
+        if origin is not None and destination is not None and carrier is not None:
+            lane = index.lookup(origin, destination, carrier)
+            matches = [lane] if lane is not None else []
+        else:
+            filters = [(i, value.strip().lower()) for i, value in enumerate((origin, destination, carrier)) if value is not None]
+            matches = [
+                index.lane(i) for i, key in enumerate(index.keys)
+                if all(key[field].lower() == value for field, value in filters)
+            ]
+        page = matches[offset:offset + limit if limit is not None else None]
+        return LaneIndexResponse(
+            version=index.version,
+            total=len(matches),
+            lanes=[LaneStats(**lane) for lane in page]
+        )
@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.metrics import external_call
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "300"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+
+class GroqBackend:
+    """Chat completions through the async Groq client"""
+
+    def __init__(self):
+        from groq import AsyncGroq
+
+        self.api_key = os.getenv("GROQ_API_KEY")
+
+        if not self.api_key:
+            raise ValueError("GROQ_API_KEY environment variable is required")
+
+        self.client = AsyncGroq(api_key=self.api_key)
+
+    async def complete(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        with external_call("groq", "chat_completion"):
+            completion = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        return completion.choices[0].message.content
+
+
+class StubBackend:
+    """Offline backend for tests and local runs without a Groq key.
+
+    ``responder`` receives the model and messages and returns the completion
+    text; by default every prompt gets an empty JSON object, which sends
+    GroqService down its documented fallbacks.
+    """
+
+    def __init__(self, responder: Optional[Callable[[str, List[Dict[str, str]]], str]] = None):
+        self.responder = responder or (lambda model, messages: "{}")
+        self.calls = 0
+
+    async def complete(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        self.calls += 1
+        return self.responder(model, messages)
+
+
+def create_llm_backend(name: str = LLM_BACKEND):
+    """Create the backend selected by LLM_BACKEND ("groq" or "stub")"""
+    if name == "stub":
+        return StubBackend()
+    if name == "groq":
+        return GroqBackend()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+class LLMClient:
+    """Completion client with a TTL+LRU response cache, in-flight coalescing and a concurrency cap.
+
+    Identical requests (same model, messages, temperature and max_tokens)
+    share one backend call while it is in flight, and its result while it
+    is cached. Failures are never cached, nor are completions the caller's
+    ``parse`` rejects.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_concurrency: int = LLM_MAX_CONCURRENCY
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_concurrency = max_concurrency
+
+        self._cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def cache_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.0,
+        max_tokens: int = 256,
+        parse: Optional[Callable[[str], Any]] = None
+    ) -> Any:
+        """Return the completion, from cache, a shared in-flight call or a new backend call.
+
+        With ``parse`` the parsed completion is returned instead of its text,
+        and a completion ``parse`` raises on is not cached.
+        """
+        key = self.cache_key(model, messages, temperature, max_tokens)
+
+        cached = self._get_cached(key)
+        if cached is not None:
+            self.hits += 1
+            return parse(cached) if parse is not None else cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, model, messages, temperature, max_tokens, parse))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        # A caller going away must not cancel the call other callers share
+        text = await asyncio.shield(task)
+        # Each caller parses its own copy, so callers may modify the result
+        return parse(text) if parse is not None else text
+
+    async def _fetch(
+        self,
+        key: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        parse: Optional[Callable[[str], Any]]
+    ) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            text = await self.backend.complete(model, messages, temperature, max_tokens)
+        if parse is not None:
+            # Raises for output the caller cannot use; that must not be served again for the TTL
+            parse(text)
+        self._put_cached(key, text)
+        return text
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Mark failures as retrieved even when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _get_cached(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def _put_cached(self, key: str, text: str):
+        self._cache[key] = (time.monotonic() + self.ttl_seconds, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "cacheEntries": len(self._cache),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,125 @@
+import numpy as np
+from typing import Tuple
+from models.schemas import WeightVector, AHPConsistency
+
+# Criteria order used for every decision matrix column
+CRITERIA = ("cost", "time", "reliability", "risk")
+
+# True where a larger value is better (benefit), False for cost-type criteria
+BENEFIT_CRITERIA = np.array([False, False, True, False])
+
+# Saaty's random consistency index, indexed by matrix order
+RANDOM_INDEX = (0.0, 0.0, 0.0, 0.58, 0.90, 1.12, 1.24, 1.32, 1.41, 1.45, 1.49)
+
+# Judgments with a consistency ratio above this should be revised
+CONSISTENCY_THRESHOLD = 0.1
+
+
+def weights_to_array(weights: WeightVector) -> np.ndarray:
+    """Convert a weight vector to a normalized array in CRITERIA order"""
+    w = np.array([getattr(weights, name) for name in CRITERIA], dtype=float)
+    total = w.sum()
+    if total <= 0:
+        raise ValueError("Weight vector must have a positive sum")
+    return w / total
+
+
+def topsis_gaps(matrix: np.ndarray, benefit: np.ndarray = BENEFIT_CRITERIA) -> Tuple[np.ndarray, np.ndarray]:
+    """Squared per-criterion gaps to the ideal and anti-ideal solutions.
+
+    ``matrix`` has shape (..., alternatives, criteria), typically (lanes,
+    alternatives, criteria); padded alternatives are marked with NaN. Because
+    weights are non-negative, weighting commutes with the ideal/anti-ideal
+    extremes, so these gaps are weight-independent and can be reused to score
+    any number of weight vectors.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+
+    # Vector normalization per lane and criterion
+    denom = np.sqrt(np.nansum(matrix * matrix, axis=-2, keepdims=True))
+    denom[denom == 0] = 1.0
+    normalized = matrix / denom
+
+    best = np.nanmax(normalized, axis=-2, keepdims=True)
+    worst = np.nanmin(normalized, axis=-2, keepdims=True)
+    ideal = np.where(benefit, best, worst)
+    anti_ideal = np.where(benefit, worst, best)
+    return (normalized - ideal) ** 2, (normalized - anti_ideal) ** 2
+
+
+def closeness_coefficient(d_plus: np.ndarray, d_minus: np.ndarray) -> np.ndarray:
+    """Relative closeness to the ideal solution, NaN for padded alternatives"""
+    total = d_plus + d_minus
+    with np.errstate(invalid="ignore", divide="ignore"):
+        closeness = d_minus / total
+    # A lane whose alternatives are all identical is a tie, not a failure
+    return np.where(total == 0, 1.0, closeness)
+
+
+def topsis_scores(matrix: np.ndarray, weights: np.ndarray, benefit: np.ndarray = BENEFIT_CRITERIA) -> np.ndarray:
+    """Score a batch of decision matrices with TOPSIS.
+
+    ``weights`` may be a single vector of shape (criteria,), one vector per
+    lane, (lanes, criteria), or any array that broadcasts against the gaps.
+    Returns the closeness coefficients with shape (..., alternatives).
+    """
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim == 2:
+        weights = weights[:, np.newaxis, :]
+    squared = weights * weights
+
+    gap_plus, gap_minus = topsis_gaps(matrix, benefit)
+    d_plus = np.sqrt((gap_plus * squared).sum(axis=-1))
+    d_minus = np.sqrt((gap_minus * squared).sum(axis=-1))
+    return closeness_coefficient(d_plus, d_minus)
+
+
+def batch_scores(gaps: Tuple[np.ndarray, np.ndarray], weights: np.ndarray) -> np.ndarray:
+    """TOPSIS closeness for many weight vectors at once.
+
+    ``weights`` has shape (candidates, criteria); the weighted distances reduce
+    to one matrix product per side. Returns (candidates, rows, alternatives).
+    """
+    gap_plus, gap_minus = gaps
+    squared = (weights * weights).T
+    scores = closeness_coefficient(np.sqrt(gap_plus @ squared), np.sqrt(gap_minus @ squared))
+    return np.moveaxis(scores, -1, 0)
+
+
+def rank_order(scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (order, ranks) for a batch of scores, best first, NaN last"""
+    filled = np.where(np.isnan(scores), -np.inf, scores)
+    order = np.argsort(-filled, axis=-1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[-1] + 1), axis=-1)
+    return order, ranks
+
+
+def ahp_weights(pairwise: np.ndarray) -> Tuple[np.ndarray, AHPConsistency]:
+    """Derive AHP priority weights and Saaty consistency from a pairwise matrix"""
+    pairwise = np.asarray(pairwise, dtype=float)
+    n = pairwise.shape[0]
+    if pairwise.shape != (n, n) or n == 0:
+        raise ValueError("Pairwise comparison matrix must be square")
+    if np.any(pairwise <= 0):
+        raise ValueError("Pairwise comparison values must be positive")
+    if not np.allclose(pairwise * pairwise.T, 1.0, rtol=1e-3):
+        raise ValueError("Pairwise comparison matrix must be reciprocal")
+
+    eigenvalues, eigenvectors = np.linalg.eig(pairwise)
+    principal = np.argmax(eigenvalues.real)
+    lambda_max = float(eigenvalues[principal].real)
+    weights = np.abs(eigenvectors[:, principal].real)
+    weights = weights / weights.sum()
+
+    ci = (lambda_max - n) / (n - 1) if n > 1 else 0.0
+    ri = RANDOM_INDEX[n] if n < len(RANDOM_INDEX) else RANDOM_INDEX[-1]
+    cr = ci / ri if ri > 0 else 0.0
+
+    consistency = AHPConsistency(
+        lambdaMax=lambda_max,
+        consistencyIndex=ci,
+        consistencyRatio=cr,
+        isConsistent=cr <= CONSISTENCY_THRESHOLD
+    )
+    return weights, consistency
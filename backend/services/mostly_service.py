@@ -2,14 +2,26 @@
 import os
 import asyncio
 import pandas as pd
-import hashlib
-from typing import Optional, Dict, Any, List
-from mostlyai import MostlyAI
-from models.schemas import SyntheticDataConfig, GenerationJob, JobStatus, SyntheticDataset, DatasetMetadata, PrivacyMetrics
+from typing import Optional, Dict, Any, List, Iterator
+from models.schemas import SyntheticDataConfig, GenerationJob, JobStatus, SyntheticDataset, DatasetMetadata, PrivacyMetrics, DatasetPage
+from services.dependencies import get_job_store
+from services.job_events import job_events, TERMINAL_STATUSES
+from services.job_stats import job_stats
+from services.dataset_files import dataset_files
+from services.metrics import record_external_calls
+from services.job_submissions import claim_or_find_job
+from services.job_supervisor import GENERATION_TIMEOUT_SECONDS, PROCESS_ID, JobSupervisor
+from services.generation_worker import run_generation
+from services.workers import JOB_BACKEND, GenerationQueueFull, JobSettled, ProgressReporter, shared_manager
 from datetime import datetime
 import uuid
 import json
 
+# Generation runs in supervised worker processes fed from a bounded FIFO queue
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "2"))
+GENERATION_QUEUE_CAPACITY = int(os.getenv("GENERATION_QUEUE_CAPACITY", "50"))
+
+
 class MostlyAIService:
     def __init__(self):
         self.api_key = os.getenv("MOSTLY_API_KEY")
@@ -18,171 +30,376 @@ class MostlyAIService:
         if not self.api_key:
             raise ValueError("MOSTLY_API_KEY environment variable is required")
         
-        self.client = MostlyAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+        self.store = get_job_store()
+        self.files = dataset_files
+        
+        # One process per running job, so each can be cancelled, timed out or memory-capped
+        self.supervisor = JobSupervisor("generation", self.store, GENERATION_WORKERS, GENERATION_TIMEOUT_SECONDS)
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumers: List[asyncio.Task] = []
         
-        # In-memory job storage (in production, use Redis or database)
-        self.jobs: Dict[str, GenerationJob] = {}
-        self.datasets: Dict[str, SyntheticDataset] = {}
+        # Queue positions come from enqueue sequence numbers: O(1) per lookup
+        self._sequence: Dict[str, int] = {}
+        self._enqueued = 0
+        self._dequeued = 0
 
-    async def start_generation(self, config: SyntheticDataConfig) -> GenerationJob:
-        """Start synthetic data generation job"""
+    def close(self):
+        """Stop queue consumers and worker processes"""
+        for consumer in self._consumers:
+            consumer.cancel()
+        self._consumers = []
+        self.supervisor.close()
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker; reads the store with the Celery backend"""
+        if JOB_BACKEND == "celery":
+            # The queue is shared by every API process, so count it in the store
+            return self.store.count_generation_jobs(JobStatus.PENDING)
+        return self._enqueued - self._dequeued
+
+    async def start_generation(
+        self, config: SyntheticDataConfig, idempotency_key: Optional[str] = None, deduplicate: bool = True
+    ) -> GenerationJob:
+        """Queue a synthetic data generation job.
+
+        A retry with the same idempotency key, or a config identical to a
+        pending or running job, returns the existing job instead. With
+        ``deduplicate=False`` a new job is always created, e.g. when each
+        job must produce its own dataset.
+        """
         job_id = str(uuid.uuid4())
+        if deduplicate:
+            existing = await claim_or_find_job(
+                self.store, "generation", config, job_id, idempotency_key, self.get_job_status
+            )
+            if existing is not None:
+                return existing
+        
+        try:
+            return await self._submit_generation(job_id, config)
+        except BaseException:
+            await asyncio.to_thread(self.store.release_submissions, job_id)
+            raise
+
+    async def _submit_generation(self, job_id: str, config: SyntheticDataConfig) -> GenerationJob:
+        if await asyncio.to_thread(self.queue_depth) >= GENERATION_QUEUE_CAPACITY:
+            raise GenerationQueueFull(
+                f"Generation queue is full ({GENERATION_QUEUE_CAPACITY} jobs waiting), retry later"
+            )
+        
+        if JOB_BACKEND == "celery":
+            job = await self._new_job(job_id, config, await asyncio.to_thread(self.queue_depth) + 1)
+            from services.tasks import generate_dataset
+            # The task id is the job id, so cancelling can revoke it
+            await asyncio.to_thread(generate_dataset.apply_async, (job_id,), task_id=job_id)
+            return job
+        
+        # Owned by this process, so restart recovery elsewhere leaves it alone while this process lives
+        await asyncio.to_thread(self.store.set_job_owner, "generation", job_id, PROCESS_ID)
+        job = await self._new_job(job_id, config, self.queue_depth() + 1)
         
+        # Sequenced only once stored, with no await before queueing, so positions follow queue order
+        self._enqueued += 1
+        self._sequence[job_id] = self._enqueued
+        self._ensure_consumers()
+        self._queue.put_nowait(job_id)
+        
+        return job
+
+    async def _new_job(self, job_id: str, config: SyntheticDataConfig, queue_position: int) -> GenerationJob:
         job = GenerationJob(
             id=job_id,
             status=JobStatus.PENDING,
             progress=0,
             config=config,
-            createdAt=datetime.utcnow()
+            createdAt=datetime.utcnow(),
+            queuePosition=queue_position
         )
         
-        self.jobs[job_id] = job
-        
-        # Start background task
-        asyncio.create_task(self._run_generation(job_id))
-        
+        await asyncio.to_thread(self.store.put_generation_job, job)
+        job_events.publish("generation", None, job)
         return job
 
+    def _ensure_consumers(self):
+        """Start one queue consumer per worker process"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if not self._consumers:
+            self._consumers = [
+                asyncio.create_task(self._consume()) for _ in range(GENERATION_WORKERS)
+            ]
+
+    async def _consume(self):
+        """Pull queued jobs in FIFO order and run them one at a time"""
+        while True:
+            job_id = await self._queue.get()
+            self._dequeued += 1
+            self._sequence.pop(job_id, None)
+            try:
+                # Waiting rather than awaiting keeps the consumer alive when the job is cancelled
+                await asyncio.wait({self.supervisor.start(job_id, self._run_generation(job_id))})
+            finally:
+                self._queue.task_done()
+
     async def _run_generation(self, job_id: str):
-        """Background task to run synthetic data generation"""
+        """Run synthetic data generation in a supervised worker process"""
+        job = await asyncio.to_thread(self.store.get_generation_job, job_id)
+        if job is None or job.status != JobStatus.PENDING:
+            # Cancelled while it was queued
+            return
+        state = {"job": job}
+        dataset_id = str(uuid.uuid4())
+        # Starting the manager on first use takes a moment; keep it off the event loop
+        progress = (await asyncio.to_thread(shared_manager)).Value("i", job.progress)
+
+        async def publish_progress():
+            if progress.value != state["job"].progress:
+                state["job"] = await self._update_job_async(state["job"], progress=progress.value)
+
         try:
-            job = self.jobs[job_id]
-            job.status = JobStatus.RUNNING
-            job.progress = 10
-            
-            # Load base dataset (embedded_shipments.csv)
-            base_data_path = "../public/embedded_shipments.csv"
-            df = pd.read_csv(base_data_path)
-            
-            job.progress = 20
-            
-            # Configure generator based on scenario type
-            generator_config = self._build_generator_config(job.config, df)
-            
-            job.progress = 30
-            
-            # Train generator
-            generator = self.client.train(data=df, **generator_config)
-            
-            job.progress = 60
-            
-            # Generate synthetic data
-            target_size = int(len(df) * job.config.syntheticRatio)
-            synthetic_data = self.client.generate(generator, size=target_size)
-            
-            job.progress = 90
-            
-            # Create dataset
-            dataset = self._create_dataset(job_id, synthetic_data, job.config)
-            self.datasets[dataset.id] = dataset
-            
-            # Complete job
-            job.status = JobStatus.COMPLETED
-            job.progress = 100
-            job.completedAt = datetime.utcnow()
-            job.recordsGenerated = len(synthetic_data)
-            
+            state["job"] = await self._update_job_async(job, status=JobStatus.RUNNING, progress=10, queuePosition=None)
+            result = await self.supervisor.run_process(
+                run_generation, dataset_id, job.config, self.api_key, self.base_url,
+                progress=progress, on_tick=publish_progress
+            )
+            await asyncio.to_thread(self._store_dataset, state["job"], dataset_id, result)
+            await self._update_job_async(state["job"], **self._completion(result))
+        except asyncio.CancelledError:
+            # A stopped worker may have left a partial Parquet file behind
+            self._discard_dataset(dataset_id)
+            raise
+        except JobSettled:
+            # Cancelled while it ran; nobody will ask for what it wrote
+            await asyncio.to_thread(self._discard_dataset, dataset_id)
         except Exception as e:
-            job = self.jobs[job_id]
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            job.completedAt = datetime.utcnow()
-
-    def _build_generator_config(self, config: SyntheticDataConfig, df: pd.DataFrame) -> Dict[str, Any]:
-        """Build MOSTLY AI generator configuration"""
-        base_config = {
-            "name": f"DeepCAL Synthetic Generator - {config.scenarioType.value}",
-            "privacy_level": config.privacyLevel.value,
-        }
-        
-        # Scenario-specific configurations
-        if config.scenarioType == "stress_test":
-            base_config.update({
-                "augmentation_ratio": 1.5,
-                "noise_level": 0.1,
-                "outlier_detection": True
-            })
-        elif config.scenarioType == "seasonal_variation":
-            base_config.update({
-                "time_series_augmentation": True,
-                "seasonal_patterns": True
-            })
-        
-        return base_config
+            await asyncio.to_thread(self._discard_dataset, dataset_id)
+            await self._fail_job_async(state["job"], str(e))
+
+    async def cancel_job(self, job_id: str, reason: str = "Cancelled by request") -> Optional[GenerationJob]:
+        """Cancel a pending or running job and stop its worker; settled jobs are returned unchanged"""
+        job = await asyncio.to_thread(self.store.get_generation_job, job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job
+        try:
+            # Settled first: the store then rejects the worker's updates, which stops it at its next one
+            job = await self._update_job_async(
+                job, status=JobStatus.CANCELLED, error=reason, completedAt=datetime.utcnow(), queuePosition=None
+            )
+        except JobSettled:
+            # It finished while being cancelled
+            return await asyncio.to_thread(self.store.get_generation_job, job_id)
+        if JOB_BACKEND == "celery":
+            # Revoking is a broadcast that may arrive late or not at all; it saves the rest of the work
+            from services.celery_app import celery_app
+            await asyncio.to_thread(celery_app.control.revoke, job_id, terminate=True)
+        self.supervisor.cancel(job_id)
+        return job
 
-    def _create_dataset(self, job_id: str, synthetic_data: pd.DataFrame, config: SyntheticDataConfig) -> SyntheticDataset:
-        """Create synthetic dataset with metadata"""
+    def watch_job(self, job_id: str):
+        """Note that a client is following a job, keeping it from being reaped as abandoned"""
+        self.supervisor.watch(job_id)
+
+    async def reap_abandoned(self):
+        """Cancel unfinished jobs no client has followed for JOB_ABANDON_SECONDS"""
+        for job_id in await asyncio.to_thread(self.supervisor.abandoned):
+            await self.cancel_job(job_id, "Abandoned: no client followed the job")
+
+    def execute_generation(self, job_id: str):
+        """Run a queued generation job in the calling process, as a Celery task does"""
+        job = self.store.get_generation_job(job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            # Already settled, e.g. a late acknowledgement redelivered the task
+            return
+        state = {"job": job}
         dataset_id = str(uuid.uuid4())
-        
-        # Calculate privacy metrics (simplified)
-        privacy_metrics = PrivacyMetrics(
-            kAnonymity=5,  # Would calculate real k-anonymity
-            lDiversity=3,  # Would calculate real l-diversity
-            tCloseness=0.1  # Would calculate real t-closeness
-        )
-        
-        # Create source hash
-        source_hash = hashlib.md5(synthetic_data.to_string().encode()).hexdigest()
-        
+
+        def report(value: int):
+            state["job"] = self._update_job(state["job"], progress=value)
+
+        try:
+            state["job"] = self._update_job(job, status=JobStatus.RUNNING, progress=10, queuePosition=None)
+            result = run_generation(
+                dataset_id, job.config, self.api_key, self.base_url,
+                progress=ProgressReporter(report, state["job"].progress)
+            )
+            self._store_dataset(state["job"], dataset_id, result)
+            self._update_job(state["job"], **self._completion(result))
+        except JobSettled:
+            # Cancelled while it ran; nobody will ask for what it wrote
+            self._discard_dataset(dataset_id)
+        except Exception as e:
+            self._discard_dataset(dataset_id)
+            # Celery's soft time limit raises an exception without a message
+            self._fail_job(state["job"], str(e) or type(e).__name__)
+
+    def _store_dataset(self, job: GenerationJob, dataset_id: str, result: Dict[str, Any]):
+        """Record the dataset a worker wrote"""
+        record_external_calls("mostly_ai", result.get("externalCalls", {}))
+        self.store.put_dataset(self._create_dataset(job.id, dataset_id, result, job.config))
+
+    @staticmethod
+    def _completion(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Changes that mark a job completed with the dataset its worker wrote"""
+        return {
+            "status": JobStatus.COMPLETED,
+            "progress": 100,
+            "completedAt": datetime.utcnow(),
+            "recordsGenerated": result["recordCount"],
+            "generatorCacheHit": result["cacheHit"],
+        }
+
+    def _update_job(self, job: GenerationJob, **changes) -> GenerationJob:
+        """Persist a new version of an unfinished job and publish what changed.
+
+        Raises JobSettled, leaving the stored job alone, when the job has
+        finished in the meantime, e.g. because it was cancelled.
+        """
+        updated = self._write_job(job, changes)
+        job_events.publish("generation", job, updated)
+        return updated
+
+    async def _update_job_async(self, job: GenerationJob, **changes) -> GenerationJob:
+        """_update_job on the event loop: the store write runs in a thread, the event is published here"""
+        updated = await asyncio.to_thread(self._write_job, job, changes)
+        job_events.publish("generation", job, updated)
+        return updated
+
+    def _write_job(self, job: GenerationJob, changes: Dict[str, Any]) -> GenerationJob:
+        updated = job.model_copy(update=changes)
+        if not self.store.put_generation_job(updated, if_unfinished=True):
+            raise JobSettled(job.id)
+        return updated
+
+    def _fail_job(self, job: GenerationJob, error: str):
+        """Mark a job failed unless it has already finished"""
+        try:
+            self._update_job(job, status=JobStatus.FAILED, error=error, completedAt=datetime.utcnow())
+        except JobSettled:
+            pass
+
+    async def _fail_job_async(self, job: GenerationJob, error: str):
+        """_fail_job on the event loop"""
+        try:
+            await self._update_job_async(job, status=JobStatus.FAILED, error=error, completedAt=datetime.utcnow())
+        except JobSettled:
+            pass
+
+    def _discard_dataset(self, dataset_id: str):
+        """Remove what a stopped or failed worker left behind"""
+        self.store.delete_dataset(dataset_id)
+        self.files.delete(dataset_id)
+
+    def _create_dataset(self, job_id: str, dataset_id: str, result: Dict[str, Any], config: SyntheticDataConfig) -> SyntheticDataset:
+        """Create synthetic dataset metadata for rows a worker wrote to Parquet"""
         metadata = DatasetMetadata(
             generatedAt=datetime.utcnow(),
-            recordCount=len(synthetic_data),
-            sourceHash=source_hash,
+            recordCount=result["recordCount"],
+            sourceHash=result["sourceHash"],
             scenario=config.scenarioType.value,
-            privacyMetrics=privacy_metrics
+            privacyMetrics=PrivacyMetrics(**result["privacyMetrics"]),
+            columns=result["columns"]
         )
         
         dataset = SyntheticDataset(
             id=dataset_id,
             jobId=job_id,
-            records=synthetic_data.to_dict('records'),
             metadata=metadata
         )
         
         return dataset
 
     async def get_job_status(self, job_id: str) -> Optional[GenerationJob]:
-        """Get generation job status"""
-        return self.jobs.get(job_id)
+        """Get generation job status with its live queue position"""
+        job = await asyncio.to_thread(self.store.get_generation_job, job_id)
+        if job and JOB_BACKEND == "celery" and job.status == JobStatus.PENDING:
+            ahead = await asyncio.to_thread(
+                self.store.count_generation_jobs, JobStatus.PENDING, created_before=job.createdAt
+            )
+            job.queuePosition = ahead + 1
+        elif job and job_id in self._sequence:
+            job.queuePosition = self._sequence[job_id] - self._dequeued
+        return job
+
+    async def get_dataset(self, job_id: str, include_records: bool = False) -> Optional[SyntheticDataset]:
+        """Get synthetic dataset by job ID, optionally loading all rows"""
+        dataset = await asyncio.to_thread(self.store.get_dataset_by_job, job_id)
+        if dataset and include_records:
+            table = await asyncio.to_thread(self.files.read_page, dataset.id)
+            dataset.records = table.to_pylist()
+        return dataset
 
-    async def get_dataset(self, job_id: str) -> Optional[SyntheticDataset]:
-        """Get synthetic dataset by job ID"""
-        for dataset in self.datasets.values():
-            if dataset.jobId == job_id:
-                return dataset
-        return None
+    async def get_dataset_by_id(self, dataset_id: str) -> Optional[SyntheticDataset]:
+        """Get synthetic dataset by dataset ID"""
+        return await asyncio.to_thread(self.store.get_dataset, dataset_id)
 
-    async def list_datasets(self) -> List[SyntheticDataset]:
-        """List all synthetic datasets"""
-        return list(self.datasets.values())
+    async def get_latest_dataset(self) -> Optional[SyntheticDataset]:
+        """Get the most recently generated synthetic dataset"""
+        return await asyncio.to_thread(self.store.get_latest_dataset)
+
+    async def list_datasets(self, limit: Optional[int] = None, offset: int = 0) -> List[SyntheticDataset]:
+        """List synthetic datasets, oldest first"""
+        return await asyncio.to_thread(self.store.list_datasets, limit=limit, offset=offset)
+
+    async def load_dataset_frame(self, dataset_id: str) -> Optional[pd.DataFrame]:
+        """Load all rows of a dataset as a DataFrame"""
+        if not await asyncio.to_thread(self.store.get_dataset, dataset_id):
+            return None
+        table = await asyncio.to_thread(self.files.read_page, dataset_id)
+        return table.to_pandas()
+
+    async def read_dataset_page(
+        self, dataset_id: str, offset: int, limit: int, columns: Optional[List[str]] = None
+    ) -> Optional[DatasetPage]:
+        """Read one page of dataset rows with optional column projection"""
+        dataset = await asyncio.to_thread(self.store.get_dataset, dataset_id)
+        if not dataset:
+            return None
+        table = await asyncio.to_thread(self.files.read_page, dataset_id, offset, limit, columns)
+        # Rows come straight from our own Parquet file; validating each one buys nothing
+        return DatasetPage.model_construct(
+            datasetId=dataset_id,
+            offset=offset,
+            limit=limit,
+            total=dataset.metadata.recordCount,
+            columns=table.column_names,
+            records=table.to_pylist()
+        )
+
+    async def stream_dataset(
+        self, dataset_id: str, fmt: str, offset: int = 0, limit: Optional[int] = None,
+        columns: Optional[List[str]] = None
+    ) -> Optional[Iterator[bytes]]:
+        """Stream dataset rows as NDJSON or an Arrow IPC stream"""
+        if not await asyncio.to_thread(self.store.get_dataset, dataset_id):
+            return None
+        # Validate the projection before any bytes are sent
+        await asyncio.to_thread(self.files.schema, dataset_id, columns)
+        if fmt == "arrow":
+            return self.files.stream_arrow(dataset_id, offset, limit, columns)
+        return self.files.stream_ndjson(dataset_id, offset, limit, columns)
 
     async def delete_dataset(self, dataset_id: str) -> bool:
         """Delete synthetic dataset"""
-        if dataset_id in self.datasets:
-            del self.datasets[dataset_id]
-            return True
-        return False
+        deleted = await asyncio.to_thread(self.store.delete_dataset, dataset_id)
+        if deleted:
+            await asyncio.to_thread(self.files.delete, dataset_id)
+        return deleted
 
     async def get_generation_stats(self) -> Dict[str, Any]:
-        """Get generation statistics"""
-        total_jobs = len(self.jobs)
-        completed_jobs = sum(1 for job in self.jobs.values() if job.status == JobStatus.COMPLETED)
-        total_records = sum(job.recordsGenerated or 0 for job in self.jobs.values() if job.recordsGenerated)
-        
-        last_generation = "Never"
-        if self.jobs:
-            latest_job = max(self.jobs.values(), key=lambda j: j.createdAt)
-            last_generation = latest_job.createdAt.isoformat()
+        """Get generation statistics from the incrementally maintained aggregates"""
+        stats = job_stats.generation.snapshot()
+        totals = stats["totals"]
+        last_created = stats["lastCreatedAt"]
+        queued_jobs = await asyncio.to_thread(self.queue_depth)
         
         return {
-            "totalJobs": total_jobs,
-            "completedJobs": completed_jobs,
-            "totalRecords": total_records,
-            "lastGeneration": last_generation
+            "totalJobs": totals.jobs,
+            "completedJobs": totals.completed,
+            "failedJobs": totals.failed,
+            "cancelledJobs": totals.cancelled,
+            "totalRecords": totals.records,
+            "lastGeneration": last_created.isoformat() if last_created else "Never",
+            "queuedJobs": queued_jobs,
+            **stats["breakdowns"],
+            "rates": stats["rates"]
         }
-
-# Singleton instance
-mostly_service = MostlyAIService()
@@ -0,0 +1,91 @@
+import numpy as np
+from typing import Optional, Tuple
+from services.mcda import BENEFIT_CRITERIA, topsis_gaps
+
+# Scoring methods accepted by ranking and training
+METHODS = ("topsis", "neutrosophic")
+
+# Component order of the last axis of every (..., 3) neutrosophic array
+TRUTH, INDETERMINACY, FALSITY = 0, 1, 2
+
+
+def crisp_to_neutrosophic(
+    matrix: np.ndarray, indeterminacy: Optional[np.ndarray] = None, benefit: np.ndarray = BENEFIT_CRITERIA
+) -> np.ndarray:
+    """Turn a crisp (..., alternatives, criteria) decision matrix into (T, I, F) triples.
+
+    Truth is the min-max position of a value among the lane's alternatives,
+    oriented so that 1 is best for both benefit and cost criteria; falsity is
+    its complement. ``indeterminacy`` broadcasts against the matrix and
+    defaults to 0. Padded (NaN) alternatives stay NaN. Returns a contiguous
+    (..., alternatives, criteria, 3) array.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    low = np.nanmin(matrix, axis=-2, keepdims=True)
+    high = np.nanmax(matrix, axis=-2, keepdims=True)
+    spread = high - low
+    with np.errstate(invalid="ignore", divide="ignore"):
+        position = np.where(spread > 0, (matrix - low) / spread, 1.0)
+    truth = np.where(benefit, position, np.where(spread > 0, 1.0 - position, 1.0))
+    truth = np.where(np.isnan(matrix), np.nan, truth)
+
+    tif = np.empty(matrix.shape + (3,))
+    tif[..., TRUTH] = truth
+    tif[..., INDETERMINACY] = 0.0 if indeterminacy is None else np.clip(indeterminacy, 0.0, 1.0)
+    tif[..., FALSITY] = 1.0 - truth
+    tif[np.isnan(matrix)] = np.nan
+    return tif
+
+
+def score_function(tif: np.ndarray) -> np.ndarray:
+    """Single-valued neutrosophic score (2 + T - I - F) / 3, in [0, 1]"""
+    return (2.0 + tif[..., TRUTH] - tif[..., INDETERMINACY] - tif[..., FALSITY]) / 3.0
+
+
+def accuracy_function(tif: np.ndarray) -> np.ndarray:
+    """Single-valued neutrosophic accuracy T - F, in [-1, 1]"""
+    return tif[..., TRUTH] - tif[..., FALSITY]
+
+
+def weighted_aggregate(tif: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted mean of the (T, I, F) triples over the criteria axis.
+
+    Maps (..., alternatives, criteria, 3) to (..., alternatives, 3). The
+    product-form SVN weighted average saturates at T = 1 for any alternative
+    that is best on a single criterion once truth is min-max scaled, so the
+    arithmetic form is used to keep the aggregate informative.
+    """
+    w = np.asarray(weights, dtype=float)
+    return np.einsum("...ck,c->...k", tif, w / w.sum())
+
+
+def neutrosophic_gaps(tif: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Squared per-criterion distances to the neutrosophic ideal and anti-ideal.
+
+    The ideal takes the largest truth and the smallest indeterminacy and
+    falsity among a lane's alternatives, the anti-ideal the reverse; the
+    distance is the normalized Euclidean one over (T, I, F). Like
+    ``services.mcda.topsis_gaps`` the result does not depend on the weights,
+    so ``services.mcda.batch_scores`` turns it into closeness coefficients for
+    any number of weight vectors.
+    """
+    best = np.nanmax(tif, axis=-3, keepdims=True)
+    worst = np.nanmin(tif, axis=-3, keepdims=True)
+    # Truth is better high, indeterminacy and falsity better low
+    higher_is_better = np.array([True, False, False])
+    ideal = np.where(higher_is_better, best, worst)
+    anti_ideal = np.where(higher_is_better, worst, best)
+    gap_plus = ((tif - ideal) ** 2).sum(axis=-1) / 3.0
+    gap_minus = ((tif - anti_ideal) ** 2).sum(axis=-1) / 3.0
+    return gap_plus, gap_minus
+
+
+def decision_gaps(
+    matrix: np.ndarray, method: str = "topsis", indeterminacy: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Weight-independent TOPSIS gaps of a crisp decision matrix, classic or neutrosophic"""
+    if method == "neutrosophic":
+        return neutrosophic_gaps(crisp_to_neutrosophic(matrix, indeterminacy))
+    if method == "topsis":
+        return topsis_gaps(matrix)
+    raise ValueError(f"Unknown scoring method {method!r}; expected one of {', '.join(METHODS)}")
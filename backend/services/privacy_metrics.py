@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional, Sequence, Tuple
+from services.shipment_features import parse_numeric
+
+# Columns an attacker could link on; weight_band is derived from weight_kg
+QUASI_IDENTIFIERS = tuple(
+    col.strip() for col in os.getenv(
+        "PRIVACY_QUASI_IDENTIFIERS", "origin_country,destination_country,item_category,weight_band"
+    ).split(",") if col.strip()
+)
+SENSITIVE_COLUMN = os.getenv("PRIVACY_SENSITIVE_COLUMN", "carrier_cost")
+
+WEIGHT_BAND_EDGES_KG = (0, 100, 500, 1000, 5000, 10000, np.inf)
+
+# Numeric sensitive values are bucketed into quantile bins before measuring diversity
+SENSITIVE_BINS = 10
+
+
+def add_weight_band(df: pd.DataFrame) -> pd.DataFrame:
+    """Return df with a categorical weight_band column derived from weight_kg"""
+    if "weight_band" in df.columns or "weight_kg" not in df.columns:
+        return df
+    weight = parse_numeric(df["weight_kg"])
+    band = np.searchsorted(WEIGHT_BAND_EDGES_KG, weight, side="right") - 1
+    band[np.isnan(weight)] = -1
+    return df.assign(weight_band=band)
+
+
+def equivalence_classes(df: pd.DataFrame, quasi_identifiers: Sequence[str]) -> np.ndarray:
+    """Dense class id per row for the combination of quasi-identifier values"""
+    codes = np.zeros(len(df), dtype=np.int64)
+    for col in quasi_identifiers:
+        col_codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+        codes = codes * len(uniques) + col_codes
+        # Re-densify so the mixed radix never overflows
+        _, codes = np.unique(codes, return_inverse=True)
+    return codes
+
+
+def sensitive_categories(values: pd.Series, bins: int = SENSITIVE_BINS) -> Tuple[np.ndarray, bool]:
+    """Category per row (-1 where missing) and whether the categories are ordered.
+
+    Numbers become ordered quantile bins; anything else becomes unordered codes.
+    """
+    numeric = parse_numeric(values)
+    if np.isfinite(numeric).sum() >= max(0.5 * len(values), 1):
+        finite = numeric[np.isfinite(numeric)]
+        edges = np.unique(np.quantile(finite, np.linspace(0, 1, bins + 1)[1:-1]))
+        binned = np.searchsorted(edges, numeric, side="right")
+        # Tied quantiles leave empty bins; drop them so they do not stretch the ordered distance
+        categories = np.full(len(values), -1, dtype=np.int64)
+        _, categories[np.isfinite(numeric)] = np.unique(binned[np.isfinite(numeric)], return_inverse=True)
+        return categories, True
+    codes, _ = pd.factorize(values.astype("string"), sort=True)
+    return codes, False
+
+
+def earth_movers_distance(class_dist: np.ndarray, global_dist: np.ndarray, ordered: bool) -> np.ndarray:
+    """EMD of each class distribution (row) from the global one.
+
+    Ordered categories use the ordered distance |i - j| / (m - 1), which
+    reduces to cumulative sums; unordered ones use the equal distance, where
+    EMD is half the total variation.
+    """
+    if ordered:
+        n_categories = class_dist.shape[1]
+        return np.abs(np.cumsum(class_dist - global_dist, axis=1)).sum(axis=1) / (n_categories - 1)
+    return 0.5 * np.abs(class_dist - global_dist).sum(axis=1)
+
+
+def compute_privacy_metrics(
+    df: pd.DataFrame,
+    quasi_identifiers: Optional[Sequence[str]] = None,
+    sensitive_column: str = SENSITIVE_COLUMN
+) -> Dict[str, Any]:
+    """k-anonymity, distinct l-diversity and t-closeness in a few grouped array passes.
+
+    Every row is assigned to an equivalence class over the quasi-identifiers
+    and the sensitive attribute is reduced to ordered categories; one
+    (classes x categories) contingency table then yields all three metrics.
+    t-closeness is the largest ordered earth-mover distance between a class's
+    sensitive distribution and the dataset-wide one.
+    """
+    df = add_weight_band(df)
+    quasi_identifiers = [col for col in (quasi_identifiers or QUASI_IDENTIFIERS) if col in df.columns]
+
+    if len(df) == 0:
+        return {"kAnonymity": 0, "lDiversity": 0, "tCloseness": 0.0,
+                "equivalenceClasses": 0, "quasiIdentifiers": quasi_identifiers}
+
+    classes = equivalence_classes(df, quasi_identifiers)
+    n_classes = int(classes.max()) + 1
+    k_anonymity = int(np.bincount(classes, minlength=n_classes).min())
+
+    l_diversity, t_closeness = 0, 0.0
+    if sensitive_column in df.columns:
+        categories, ordered = sensitive_categories(df[sensitive_column])
+        known = categories >= 0
+        n_categories = int(categories.max()) + 1 if known.any() else 0
+        if n_categories > 0:
+            counts = np.bincount(
+                classes[known] * n_categories + categories[known],
+                minlength=n_classes * n_categories
+            ).reshape(n_classes, n_categories)
+            counts = counts[counts.sum(axis=1) > 0]
+
+            l_diversity = int((counts > 0).sum(axis=1).min())
+
+            class_dist = counts / counts.sum(axis=1, keepdims=True)
+            global_dist = counts.sum(axis=0) / counts.sum()
+            if n_categories > 1:
+                t_closeness = float(earth_movers_distance(class_dist, global_dist, ordered).max())
+
+    return {
+        "kAnonymity": k_anonymity,
+        "lDiversity": l_diversity,
+        "tCloseness": t_closeness,
+        "equivalenceClasses": n_classes,
+        "quasiIdentifiers": quasi_identifiers
+    }
@@ -0,0 +1,200 @@
+import os
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+from services.shipment_features import BASE_DATA_PATH, parse_numeric
+from services.shipment_history import load_base_shipments
+
+# A column is numeric when at least this share of its non-empty values parse as numbers
+NUMERIC_SHARE = 0.8
+
+# Categorical distributions compare this many most frequent reference values, the rest pooled
+TOP_CATEGORIES = 50
+
+# Interquartile-range multiplier for outlier fences
+OUTLIER_IQR = 1.5
+
+# Identifier-like columns carry no distributional signal
+EXCLUDED_COLUMNS = ("request_reference", "comments", "item_description")
+
+SCORE_WEIGHTS = {
+    "univariate": 0.4,
+    "bivariate": 0.3,
+    "duplicates": 0.1,
+    "copies": 0.1,
+    "outliers": 0.1,
+}
+
+
+class ReferenceProfile:
+    """Precomputed distributions of the reference data that every analysis compares against"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns = [c for c in df.columns if c not in EXCLUDED_COLUMNS]
+        self.numeric: Dict[str, np.ndarray] = {}
+        self.categorical: Dict[str, pd.Series] = {}
+        self.fences: Dict[str, Tuple[float, float]] = {}
+
+        for col in self.columns:
+            values = parse_numeric(df[col])
+            present = df[col].notna().sum()
+            finite = values[np.isfinite(values)]
+            if present and len(finite) >= NUMERIC_SHARE * present:
+                self.numeric[col] = np.sort(finite)
+                q1, q3 = np.quantile(finite, [0.25, 0.75]) if len(finite) else (0.0, 0.0)
+                spread = OUTLIER_IQR * (q3 - q1)
+                self.fences[col] = (q1 - spread, q3 + spread)
+            else:
+                self.categorical[col] = _normalized_text(df[col]).value_counts(normalize=True)
+
+        numeric_frame = pd.DataFrame({col: parse_numeric(df[col]) for col in self.numeric})
+        self.correlation = numeric_frame.corr() if len(self.numeric) > 1 else pd.DataFrame()
+        self.row_hashes = np.unique(_row_hashes(df, self.columns))
+        self.outlier_rate = _outlier_rate(numeric_frame, self.fences)
+
+
+def _normalized_text(values: pd.Series) -> pd.Series:
+    return values.astype("string").str.strip().str.lower().fillna("<missing>")
+
+
+def _row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    present = [c for c in columns if c in df.columns]
+    frame = df[present].astype("string").fillna("")
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _outlier_rate(numeric_frame: pd.DataFrame, fences: Dict[str, Tuple[float, float]]) -> float:
+    """Share of rows with at least one numeric value outside the reference fences"""
+    if numeric_frame.empty:
+        return 0.0
+    values = numeric_frame[list(fences)].to_numpy(dtype=float)
+    low = np.array([fences[c][0] for c in fences])
+    high = np.array([fences[c][1] for c in fences])
+    outside = (values < low) | (values > high)
+    return float(outside.any(axis=1).mean())
+
+
+def ks_statistic(reference_sorted: np.ndarray, sample: np.ndarray) -> float:
+    """Two-sample Kolmogorov-Smirnov distance between a sorted reference and a sample"""
+    sample = np.sort(sample[np.isfinite(sample)])
+    if len(sample) == 0 or len(reference_sorted) == 0:
+        return 1.0
+    grid = np.concatenate([reference_sorted, sample])
+    cdf_ref = np.searchsorted(reference_sorted, grid, side="right") / len(reference_sorted)
+    cdf_sample = np.searchsorted(sample, grid, side="right") / len(sample)
+    return float(np.abs(cdf_ref - cdf_sample).max())
+
+
+def total_variation(reference: pd.Series, sample: pd.Series) -> float:
+    """Total variation distance over the top reference categories, with the rest pooled"""
+    sample_freq = sample.value_counts(normalize=True)
+    top = reference.index[:TOP_CATEGORIES]
+    ref = reference.reindex(top, fill_value=0.0).to_numpy()
+    syn = sample_freq.reindex(top, fill_value=0.0).to_numpy()
+    ref_other = max(1.0 - ref.sum(), 0.0)
+    syn_other = max(1.0 - syn.sum(), 0.0)
+    return float(0.5 * (np.abs(ref - syn).sum() + abs(ref_other - syn_other)))
+
+
+@lru_cache(maxsize=4)
+def _cached_reference(path: str, mtime: float) -> ReferenceProfile:
+    return ReferenceProfile(load_base_shipments(path))
+
+
+def reference_profile(path: str = BASE_DATA_PATH) -> ReferenceProfile:
+    """Reference profile of the base shipments, rebuilt when the file changes"""
+    return _cached_reference(path, os.path.getmtime(path))
+
+
+def analyze_quality(synthetic: pd.DataFrame, reference: ReferenceProfile) -> Dict[str, Any]:
+    """Compare a synthetic dataset against the reference profile over all rows"""
+    if synthetic.empty:
+        raise ValueError("Dataset is empty")
+
+    univariate: Dict[str, float] = {}
+    numeric_frame = pd.DataFrame(index=synthetic.index)
+    for col, ref_sorted in reference.numeric.items():
+        if col in synthetic.columns:
+            values = parse_numeric(synthetic[col])
+            numeric_frame[col] = values
+            univariate[col] = ks_statistic(ref_sorted, values)
+    for col, ref_freq in reference.categorical.items():
+        if col in synthetic.columns:
+            univariate[col] = total_variation(ref_freq, _normalized_text(synthetic[col]))
+
+    correlation_drift = 0.0
+    shared = [c for c in reference.correlation.columns if c in numeric_frame.columns]
+    if len(shared) > 1:
+        ref_corr = reference.correlation.loc[shared, shared].to_numpy()
+        syn_corr = numeric_frame[shared].corr().to_numpy()
+        upper = np.triu_indices(len(shared), k=1)
+        diff = np.abs(ref_corr[upper] - syn_corr[upper])
+        correlation_drift = float(np.nanmean(diff)) if np.isfinite(diff).any() else 0.0
+
+    hashes = _row_hashes(synthetic, reference.columns)
+    duplicate_rate = float(pd.Series(hashes).duplicated().mean())
+    copy_rate = float(np.isin(hashes, reference.row_hashes).mean())
+
+    fences = {c: f for c, f in reference.fences.items() if c in numeric_frame.columns}
+    outlier_rate = _outlier_rate(numeric_frame[list(fences)], fences) if fences else 0.0
+    outlier_excess = max(outlier_rate - reference.outlier_rate, 0.0)
+
+    mean_distance = float(np.mean(list(univariate.values()))) if univariate else 1.0
+    components = {
+        "univariate": 1.0 - mean_distance,
+        "bivariate": 1.0 - min(correlation_drift, 1.0),
+        "duplicates": 1.0 - duplicate_rate,
+        "copies": 1.0 - copy_rate,
+        "outliers": 1.0 - min(outlier_excess, 1.0),
+    }
+    score = 100.0 * sum(SCORE_WEIGHTS[name] * value for name, value in components.items())
+
+    metrics = {
+        "rows": int(len(synthetic)),
+        "columnsCompared": len(univariate),
+        "meanUnivariateDistance": mean_distance,
+        "univariateDistances": dict(sorted(univariate.items(), key=lambda item: -item[1])),
+        "correlationDrift": correlation_drift,
+        "duplicateRate": duplicate_rate,
+        "referenceCopyRate": copy_rate,
+        "outlierRate": outlier_rate,
+        "referenceOutlierRate": reference.outlier_rate,
+        "components": components,
+    }
+    return {
+        "qualityScore": round(score, 1),
+        "analysis": summarize(metrics),
+        "recommendations": recommendations(metrics),
+        "metrics": metrics,
+    }
+
+
+def summarize(metrics: Dict[str, Any]) -> str:
+    worst = list(metrics["univariateDistances"].items())[:3]
+    worst_text = ", ".join(f"{col} ({dist:.2f})" for col, dist in worst) or "none"
+    return (
+        f"Compared {metrics['rows']} rows over {metrics['columnsCompared']} columns. "
+        f"Mean univariate distance {metrics['meanUnivariateDistance']:.3f}, "
+        f"correlation drift {metrics['correlationDrift']:.3f}, "
+        f"duplicate rate {metrics['duplicateRate']:.1%}, "
+        f"reference copy rate {metrics['referenceCopyRate']:.1%}, "
+        f"outlier rate {metrics['outlierRate']:.1%} (reference {metrics['referenceOutlierRate']:.1%}). "
+        f"Largest distribution gaps: {worst_text}."
+    )
+
+
+def recommendations(metrics: Dict[str, Any]) -> List[str]:
+    advice = []
+    drifted = [col for col, dist in metrics["univariateDistances"].items() if dist > 0.3]
+    if drifted:
+        advice.append(f"Review generator fidelity for {', '.join(drifted[:5])}")
+    if metrics["correlationDrift"] > 0.2:
+        advice.append("Numeric relationships drift from the reference; train longer or with more base rows")
+    if metrics["duplicateRate"] > 0.05:
+        advice.append("Reduce duplicate synthetic rows")
+    if metrics["referenceCopyRate"] > 0.01:
+        advice.append("Synthetic rows copy reference records; raise the privacy level")
+    if metrics["outlierRate"] - metrics["referenceOutlierRate"] > 0.05:
+        advice.append("Adjust outlier handling; synthetic data has more extreme values than the reference")
+    return advice or ["No significant quality issues detected"]
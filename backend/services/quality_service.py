@@ -0,0 +1,26 @@
+import asyncio
+import logging
+import pandas as pd
+from typing import Any, Dict, List
+from services.dependencies import ServiceUnavailable, get_groq_service
+from services.quality_analyzer import analyze_quality, reference_profile
+from services.metrics import fallbacks
+
+logger = logging.getLogger(__name__)
+
+
+class QualityService:
+    async def analyze(self, dataset: List[Dict[str, Any]], narrative: bool = False) -> Dict[str, Any]:
+        """Score a synthetic dataset locally; narrative=true asks Groq to explain the scores when it is configured"""
+        report = await asyncio.to_thread(lambda: analyze_quality(pd.DataFrame(dataset), reference_profile()))
+        if not narrative:
+            return report
+
+        try:
+            groq_service = await asyncio.to_thread(get_groq_service)
+        except ServiceUnavailable as e:
+            # The scores stand on their own; keep the local summary
+            logger.warning("No dataset narrative, Groq is unavailable: %s", e)
+            fallbacks.inc(service="groq", operation="analyze_dataset")
+            return report
+        return await groq_service.narrate_quality(report)
@@ -0,0 +1,88 @@
+import os
+import asyncio
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import Optional, List
+from models.schemas import QuoteScoringResponse, ScoredShipment
+from services.mcda import topsis_scores, weights_to_array
+from services.dependencies import get_ranking_service
+from services.shipment_features import (
+    BASE_DATA_PATH, FORWARDER_COLUMNS, FORWARDER_LABELS,
+    quote_matrix, awarded_index, forwarder_profiles, decision_matrix, read_shipment_upload
+)
+from services.shipment_history import load_base_shipments
+
+
+@lru_cache(maxsize=4)
+def _cached_profiles(path: str, mtime: float) -> np.ndarray:
+    df = load_base_shipments(path)
+    quotes = quote_matrix(df)
+    return forwarder_profiles(df, quotes, awarded_index(df))
+
+
+def history_profiles(path: str = BASE_DATA_PATH) -> np.ndarray:
+    """Forwarder (time, reliability, risk) from the base shipment history, rebuilt when the file changes"""
+    return _cached_profiles(path, os.path.getmtime(path))
+
+
+def score_quotes(df: pd.DataFrame, weights: np.ndarray, profiles: np.ndarray) -> List[ScoredShipment]:
+    """Score every row's forwarder quotes with TOPSIS in one batched pass"""
+    quotes = quote_matrix(df)
+    # Rows without a single quote have nothing to rank
+    scores = np.full(quotes.shape, np.nan)
+    has_quote = ~np.isnan(quotes).all(axis=1)
+    if has_quote.any():
+        scores[has_quote] = topsis_scores(decision_matrix(quotes[has_quote], profiles), weights)
+
+    quoted = ~np.isnan(scores)
+    best = np.argmax(np.where(quoted, scores, -np.inf), axis=1)
+    has_best = quoted.any(axis=1)
+    best_cost = quotes[np.arange(len(df)), best]
+    references = (
+        df["request_reference"].astype("string").tolist()
+        if "request_reference" in df.columns else [None] * len(df)
+    )
+
+    shipments = []
+    for row, (row_scores, row_quoted, b, ok, cost, ref) in enumerate(zip(
+        scores.tolist(), quoted.tolist(), best.tolist(), has_best.tolist(), best_cost.tolist(), references
+    )):
+        shipments.append(ScoredShipment(
+            row=row,
+            requestReference=None if ref is None or pd.isna(ref) else ref,
+            bestForwarder=FORWARDER_COLUMNS[b] if ok else None,
+            bestForwarderName=FORWARDER_LABELS[FORWARDER_COLUMNS[b]] if ok else None,
+            bestCost=cost if ok else None,
+            scores={col: s for col, s, q in zip(FORWARDER_COLUMNS, row_scores, row_quoted) if q}
+        ))
+    return shipments
+
+
+class QuoteService:
+    def __init__(self):
+        self.ranking = get_ranking_service()
+
+    async def score_upload(
+        self, content: bytes, filename: str, weight_matrix_id: str = "latest"
+    ) -> Optional[QuoteScoringResponse]:
+        """Pick the best forwarder for every shipment in an uploaded file; the API caps its size"""
+        weights = await self.ranking.resolve_weights(weight_matrix_id)
+        if weights is None:
+            return None
+
+        def score() -> List[ScoredShipment]:
+            df = read_shipment_upload(content, filename)
+            if not any(col in df.columns for col in FORWARDER_COLUMNS):
+                raise ValueError(f"Upload has none of the forwarder columns {', '.join(FORWARDER_COLUMNS)}")
+            return score_quotes(df, weights_to_array(weights), history_profiles())
+
+        shipments = await asyncio.to_thread(score)
+        scored = sum(1 for s in shipments if s.bestForwarder is not None)
+        return QuoteScoringResponse(
+            weightMatrixId=weight_matrix_id,
+            weights=weights,
+            scoredRows=scored,
+            unscoredRows=len(shipments) - scored,
+            shipments=shipments
+        )
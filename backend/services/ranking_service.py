@@ -0,0 +1,167 @@
+import asyncio
+import numpy as np
+from typing import List, Optional
+from models.schemas import (
+    WeightVector, RankingRequest, RankingResponse, LaneRanking, RankedAlternative,
+    SensitivityRequest, SensitivityResponse, LaneSensitivity, AlternativeStability, WeightThreshold
+)
+from services.mcda import (
+    CRITERIA, CONSISTENCY_THRESHOLD, weights_to_array, batch_scores, rank_order, ahp_weights
+)
+from services.neutrosophic import (
+    crisp_to_neutrosophic, neutrosophic_gaps, decision_gaps, weighted_aggregate, score_function, accuracy_function
+)
+from services.sensitivity import weight_sensitivity
+from services.dependencies import get_training_service
+
+
+class RankingService:
+    def __init__(self):
+        self.training = get_training_service()
+
+    async def resolve_weights(self, matrix_id: str) -> Optional[WeightVector]:
+        """Look up a stored weight matrix, falling back to defaults for 'latest'"""
+        if matrix_id == "latest":
+            return await self.training.get_latest_weights()
+        return await self.training.get_weight_matrix(matrix_id)
+
+    async def rank(self, request: RankingRequest) -> Optional[RankingResponse]:
+        """Rank every lane of a request in a single batched TOPSIS pass"""
+        consistency = None
+        if request.pairwiseMatrix is not None:
+            w, consistency = ahp_weights(np.array(request.pairwiseMatrix, dtype=float))
+            if len(w) != len(CRITERIA):
+                raise ValueError(f"Pairwise comparison matrix must be {len(CRITERIA)}x{len(CRITERIA)}")
+            if not consistency.isConsistent:
+                raise ValueError(
+                    f"AHP judgments are inconsistent (CR={consistency.consistencyRatio:.3f} > {CONSISTENCY_THRESHOLD})"
+                )
+            weights = WeightVector(**dict(zip(CRITERIA, w.tolist())))
+        else:
+            weights = await self.resolve_weights(request.weightMatrixId)
+            if weights is None:
+                return None
+            w = weights_to_array(weights)
+
+        matrix = self._build_matrix(request)
+        neutrosophic = None
+        if request.method == "neutrosophic":
+            tif = crisp_to_neutrosophic(matrix, self._build_indeterminacy(request))
+            gaps = neutrosophic_gaps(tif)
+            aggregate = weighted_aggregate(tif, w)
+            neutrosophic = (score_function(aggregate).tolist(), accuracy_function(aggregate).tolist())
+        else:
+            gaps = decision_gaps(matrix)
+        scores = batch_scores(gaps, w[np.newaxis, :])[0]
+        order, ranks = rank_order(scores)
+
+        lanes: List[LaneRanking] = []
+        for l, (lane, lane_order, lane_scores, lane_ranks) in enumerate(zip(
+            request.lanes, order.tolist(), scores.tolist(), ranks.tolist()
+        )):
+            count = len(lane.alternatives)
+            ranking = [
+                RankedAlternative(
+                    id=lane.alternatives[i].id,
+                    score=lane_scores[i],
+                    rank=lane_ranks[i],
+                    neutrosophicScore=neutrosophic[0][l][i] if neutrosophic else None,
+                    neutrosophicAccuracy=neutrosophic[1][l][i] if neutrosophic else None
+                )
+                for i in lane_order[:count]
+            ]
+            lanes.append(LaneRanking(
+                laneId=lane.laneId,
+                bestAlternative=ranking[0].id,
+                ranking=ranking
+            ))
+
+        return RankingResponse(
+            weightMatrixId="ahp" if request.pairwiseMatrix is not None else request.weightMatrixId,
+            weights=weights,
+            consistency=consistency,
+            lanes=lanes
+        )
+
+    async def sensitivity(self, request: SensitivityRequest) -> Optional[SensitivityResponse]:
+        """Monte Carlo rank stability and winner-flip thresholds under perturbed weights"""
+        weights = await self.resolve_weights(request.weightMatrixId)
+        if weights is None:
+            return None
+        w = weights_to_array(weights)
+
+        gaps = decision_gaps(self._build_matrix(request), request.method, self._build_indeterminacy(request))
+        result = await asyncio.to_thread(
+            weight_sensitivity, gaps, w, request.samples, request.concentration,
+            request.thresholdSteps, request.seed
+        )
+
+        lanes: List[LaneSensitivity] = []
+        for i, lane in enumerate(request.lanes):
+            count = len(lane.alternatives)
+            ids = [alt.id for alt in lane.alternatives]
+            probabilities = result["rankProbabilities"][i, :count, :count]
+            expected = probabilities @ np.arange(1, count + 1)
+            winner = int(result["baseWinner"][i])
+
+            alternatives = [
+                AlternativeStability(
+                    id=ids[a],
+                    baseScore=float(result["baseScores"][i, a]),
+                    baseRank=int(result["baseRanks"][i, a]),
+                    winProbability=float(probabilities[a, 0]),
+                    expectedRank=float(expected[a]),
+                    rankProbabilities=probabilities[a].tolist()
+                )
+                for a in range(count)
+            ]
+            thresholds = [
+                WeightThreshold(
+                    criterion=criterion,
+                    baseWeight=float(w[c]),
+                    lowerWeight=self._threshold(result["lowerWeight"][c, i]),
+                    lowerWinner=ids[result["lowerWinner"][c, i]] if result["lowerWinner"][c, i] >= 0 else None,
+                    upperWeight=self._threshold(result["upperWeight"][c, i]),
+                    upperWinner=ids[result["upperWinner"][c, i]] if result["upperWinner"][c, i] >= 0 else None
+                )
+                for c, criterion in enumerate(CRITERIA)
+            ]
+            lanes.append(LaneSensitivity(
+                laneId=lane.laneId,
+                baseWinner=ids[winner],
+                winnerStability=float(probabilities[winner, 0]),
+                alternatives=alternatives,
+                thresholds=thresholds
+            ))
+
+        return SensitivityResponse(
+            weightMatrixId=request.weightMatrixId,
+            weights=weights,
+            samples=request.samples,
+            concentration=request.concentration,
+            lanes=lanes
+        )
+
+    @staticmethod
+    def _threshold(value: float) -> Optional[float]:
+        return None if np.isnan(value) else float(value)
+
+    def _build_indeterminacy(self, request: RankingRequest) -> np.ndarray:
+        """Per-criterion indeterminacy shaped like the decision matrix, 0 where not given"""
+        width = max(len(lane.alternatives) for lane in request.lanes)
+        indeterminacy = np.zeros((len(request.lanes), width, len(CRITERIA)))
+        for i, lane in enumerate(request.lanes):
+            for j, alt in enumerate(lane.alternatives):
+                if alt.indeterminacy is not None:
+                    indeterminacy[i, j] = [getattr(alt.indeterminacy, name) for name in CRITERIA]
+        return indeterminacy
+
+    def _build_matrix(self, request: RankingRequest) -> np.ndarray:
+        """Pack lanes into a NaN-padded (lanes, alternatives, criteria) array"""
+        width = max(len(lane.alternatives) for lane in request.lanes)
+        matrix = np.full((len(request.lanes), width, len(CRITERIA)), np.nan)
+        for i, lane in enumerate(request.lanes):
+            matrix[i, :len(lane.alternatives)] = [
+                [alt.cost, alt.time, alt.reliability, alt.risk] for alt in lane.alternatives
+            ]
+        return matrix
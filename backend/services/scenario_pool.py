@@ -0,0 +1,187 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from models.schemas import GenerationJob, JobStatus, SyntheticDataConfig
+from services.dependencies import ServiceUnavailable, get_job_store, get_mostly_service, get_scenario_pool
+from services.job_events import TERMINAL_STATUSES
+from services.workers import GenerationQueueFull
+
+logger = logging.getLogger(__name__)
+
+# Datasets kept ready or in flight per scenario; 0 disables the pool
+SCENARIO_POOL_SIZE = int(os.getenv("SCENARIO_POOL_SIZE", "2"))
+# Pooled datasets older than this are regenerated, as are those from an older base history; 0 disables
+SCENARIO_POOL_MAX_AGE_SECONDS = float(os.getenv("SCENARIO_POOL_MAX_AGE_SECONDS", "86400"))
+
+# How often the warmer checks the pool for stale or missing datasets
+POOL_CHECK_SECONDS = 60.0
+# The first fill waits for startup, and the first requests, to finish
+POOL_START_DELAY_SECONDS = 10.0
+
+# The fixed stress-test configurations behind /api/scenarios/{scenario}
+SCENARIOS: Dict[str, SyntheticDataConfig] = {
+    "peak_season": SyntheticDataConfig(
+        baseDatasetSize=1000,
+        syntheticRatio=3.0,
+        privacyLevel="high",
+        scenarioType="stress_test"
+    ),
+    "supply_disruption": SyntheticDataConfig(
+        baseDatasetSize=800,
+        syntheticRatio=2.5,
+        privacyLevel="high",
+        scenarioType="stress_test"
+    ),
+    "economic_downturn": SyntheticDataConfig(
+        baseDatasetSize=1200,
+        syntheticRatio=2.0,
+        privacyLevel="medium",
+        scenarioType="stress_test"
+    ),
+}
+
+
+def base_history_version() -> str:
+    """Version of the base shipment history that new datasets are generated from"""
+    from services.shipment_history import shipment_history
+
+    return shipment_history.version()
+
+
+class ScenarioPool:
+    """Generation jobs for the fixed scenarios, started before anyone asks.
+
+    Each scenario keeps up to ``size`` jobs, completed or in flight, recorded
+    in the job store with the base history version they were started on.
+    Acquiring one removes it from the pool and tops the pool up in the
+    background. Entries from an older base history or past ``max_age_seconds``
+    are discarded and regenerated.
+    """
+
+    def __init__(self, size: int = SCENARIO_POOL_SIZE, max_age_seconds: float = SCENARIO_POOL_MAX_AGE_SECONDS):
+        self.store = get_job_store()
+        self.mostly_service = get_mostly_service()
+        self.size = size
+        self.max_age_seconds = max_age_seconds
+        self._top_up_task: Optional[asyncio.Task] = None
+        self._top_up_again = False
+
+    def close(self):
+        """Stop a running top-up; pooled jobs stay in the store for the next start"""
+        if self._top_up_task is not None:
+            self._top_up_task.cancel()
+
+    async def acquire(self, scenario: str) -> GenerationJob:
+        """A completed pooled job, else an in-flight one, else a newly started job"""
+        job = await asyncio.to_thread(self._take, scenario) if self.size > 0 else None
+        if job is None:
+            job = await self.mostly_service.start_generation(SCENARIOS[scenario])
+        self.schedule_top_up()
+        return job
+
+    def _take(self, scenario: str) -> Optional[GenerationJob]:
+        current = base_history_version()
+        ready: List[GenerationJob] = []
+        in_flight: List[GenerationJob] = []
+        for job_id, version, pooled_at in self.store.scenario_pool_entries(scenario):
+            if self._stale(version, pooled_at, current):
+                continue
+            job = self.store.get_generation_job(job_id)
+            if job is None:
+                continue
+            if job.status == JobStatus.COMPLETED:
+                ready.append(job)
+            elif job.status not in TERMINAL_STATUSES:
+                in_flight.append(job)
+        # Another process may take the same entry first; only one take succeeds
+        for job in ready + in_flight:
+            if self.store.take_scenario_pool_entry(job.id):
+                return job
+        return None
+
+    def _stale(self, version: str, pooled_at: datetime, current: str) -> bool:
+        if version != current:
+            return True
+        return self.max_age_seconds > 0 and pooled_at < datetime.utcnow() - timedelta(seconds=self.max_age_seconds)
+
+    def schedule_top_up(self):
+        """Top the pool up in the background; calls during a top-up run it once more afterwards"""
+        if self.size <= 0:
+            return
+        if self._top_up_task is not None and not self._top_up_task.done():
+            self._top_up_again = True
+            return
+        self._top_up_task = asyncio.create_task(self._top_up_until_settled())
+
+    async def _top_up_until_settled(self):
+        self._top_up_again = True
+        while self._top_up_again:
+            self._top_up_again = False
+            try:
+                await self.top_up()
+            except Exception as e:
+                logger.warning("Topping up the scenario pool failed: %s", e)
+
+    async def top_up(self):
+        """Drop failed and stale entries, keep in-flight ones alive and fill every scenario to ``size``"""
+        current = await asyncio.to_thread(base_history_version)
+        for scenario, config in SCENARIOS.items():
+            live, stale = await asyncio.to_thread(self._sweep, scenario, current)
+            for job in stale:
+                await self._discard(job)
+
+            for _ in range(self.size - len(live)):
+                try:
+                    job = await self.mostly_service.start_generation(config, deduplicate=False)
+                except GenerationQueueFull:
+                    # Requests come first; the next check tries again
+                    return
+                await asyncio.to_thread(self.store.add_scenario_pool_entry, scenario, job.id, current)
+
+    def _sweep(self, scenario: str, current: str) -> Tuple[List[GenerationJob], List[GenerationJob]]:
+        """Take a scenario's failed and stale entries out of the pool; returns its live jobs and the stale ones"""
+        live: List[GenerationJob] = []
+        stale: List[GenerationJob] = []
+        for job_id, version, pooled_at in self.store.scenario_pool_entries(scenario):
+            job = self.store.get_generation_job(job_id)
+            if job is None or job.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+                self.store.take_scenario_pool_entry(job_id)
+            elif self._stale(version, pooled_at, current):
+                if self.store.take_scenario_pool_entry(job_id):
+                    stale.append(job)
+            else:
+                live.append(job)
+
+        in_flight = [job.id for job in live if job.status not in TERMINAL_STATUSES]
+        if in_flight:
+            # No client follows pooled jobs; the pool does, so they are not reaped as abandoned
+            self.store.touch_job_leases("generation", in_flight, datetime.utcnow())
+        return live, stale
+
+    async def _discard(self, job: GenerationJob):
+        """Stop or delete a stale pooled job; nobody has been given it"""
+        if job.status not in TERMINAL_STATUSES:
+            await self.mostly_service.cancel_job(job.id, "Replaced by a newer scenario dataset")
+            return
+        dataset = await self.mostly_service.get_dataset(job.id)
+        if dataset is not None:
+            await self.mostly_service.delete_dataset(dataset.id)
+
+
+async def warm_scenario_pool(interval: float = POOL_CHECK_SECONDS):
+    """Keep the scenario pool topped up, forever"""
+    await asyncio.sleep(POOL_START_DELAY_SECONDS)
+    unavailable = False
+    while True:
+        try:
+            # Creating the pool creates the generation service, whose imports are heavy
+            pool = await asyncio.to_thread(get_scenario_pool)
+            pool.schedule_top_up()
+            unavailable = False
+        except ServiceUnavailable as e:
+            if not unavailable:
+                logger.warning("Scenario pool is not warming: %s", e)
+            unavailable = True
+        await asyncio.sleep(interval)
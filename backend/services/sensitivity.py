@@ -0,0 +1,124 @@
+import os
+import numpy as np
+from typing import Dict, Optional, Tuple
+from services.mcda import batch_scores, rank_order
+
+# Upper bound on (samples x lanes x alternatives x criteria) scored per chunk;
+# small enough that each chunk's scores stay cache-resident
+SENSITIVITY_CHUNK_ELEMENTS = int(os.getenv("SENSITIVITY_CHUNK_ELEMENTS", "2000000"))
+
+# Dirichlet parameters are floored here so zero weights can still be perturbed
+MIN_CONCENTRATION = 1e-3
+
+
+def dirichlet_weights(
+    weights: np.ndarray, samples: int, concentration: float, rng: np.random.Generator
+) -> np.ndarray:
+    """Draw weight vectors around ``weights``; larger concentration means less noise"""
+    alpha = np.maximum(concentration * weights, MIN_CONCENTRATION)
+    return rng.dirichlet(alpha, size=samples)
+
+
+def _chunk_size(gaps: Tuple[np.ndarray, np.ndarray]) -> int:
+    return max(1, SENSITIVITY_CHUNK_ELEMENTS // max(gaps[0].size, 1))
+
+
+def rank_distribution(gaps: Tuple[np.ndarray, np.ndarray], samples: np.ndarray) -> np.ndarray:
+    """Share of weight samples that put each alternative at each rank.
+
+    Scores are computed in chunks of samples with one matrix product each and
+    tallied straight from the sort order with a single bincount per chunk.
+    Returns (lanes, alternatives, ranks) probabilities; padded alternatives
+    rank last.
+    """
+    lanes, alternatives = gaps[0].shape[:2]
+    counts = np.zeros(lanes * alternatives * alternatives, dtype=np.int64)
+    # Flat index of (lane, alternative, rank) is (lane * A + alternative) * A + rank
+    offsets = (np.arange(lanes) * alternatives * alternatives)[:, np.newaxis] + np.arange(alternatives)
+
+    step = _chunk_size(gaps)
+    for start in range(0, len(samples), step):
+        scores = batch_scores(gaps, samples[start:start + step])
+        order = np.argsort(-np.nan_to_num(scores, nan=-np.inf), axis=-1, kind="stable")
+        counts += np.bincount((offsets + order * alternatives).ravel(), minlength=counts.size)
+    return counts.reshape(lanes, alternatives, alternatives) / max(len(samples), 1)
+
+
+def one_at_a_time_weights(weights: np.ndarray, steps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Weight vectors sweeping each criterion from 0 to 1, the others rescaled in proportion.
+
+    Returns the grid of swept values, shape (steps + 1,), and the weight
+    vectors, shape (criteria, steps + 1, criteria).
+    """
+    n = len(weights)
+    grid = np.linspace(0.0, 1.0, steps + 1)
+    sweeps = np.empty((n, len(grid), n))
+    for c in range(n):
+        others = np.delete(weights, c)
+        share = others / others.sum() if others.sum() > 0 else np.full(n - 1, 1.0 / (n - 1))
+        sweeps[c] = np.insert(share[np.newaxis, :] * (1.0 - grid[:, np.newaxis]), c, grid, axis=1)
+    return grid, sweeps
+
+
+def winner_thresholds(
+    gaps: Tuple[np.ndarray, np.ndarray], weights: np.ndarray, base_winner: np.ndarray, steps: int
+) -> Dict[str, np.ndarray]:
+    """Nearest single-criterion weights below and above the current ones where the winner changes.
+
+    Returns arrays of shape (criteria, lanes); weights are NaN and winners -1
+    where the winner holds over the whole sweep in that direction.
+    """
+    n = len(weights)
+    grid, sweeps = one_at_a_time_weights(weights, steps)
+    winners = np.argmax(
+        np.nan_to_num(batch_scores(gaps, sweeps.reshape(-1, n)), nan=-np.inf), axis=-1
+    ).reshape(n, len(grid), -1)
+
+    flipped = winners != base_winner[np.newaxis, np.newaxis, :]
+    below = flipped & (grid[np.newaxis, :] < weights[:, np.newaxis])[..., np.newaxis]
+    above = flipped & (grid[np.newaxis, :] > weights[:, np.newaxis])[..., np.newaxis]
+
+    # Closest flip below is the last flagged grid point, above the first
+    lower_index = len(grid) - 1 - np.argmax(below[:, ::-1, :], axis=1)
+    upper_index = np.argmax(above, axis=1)
+    has_lower, has_upper = below.any(axis=1), above.any(axis=1)
+
+    lower_winner = np.take_along_axis(winners, lower_index[:, np.newaxis, :], axis=1)[:, 0, :]
+    upper_winner = np.take_along_axis(winners, upper_index[:, np.newaxis, :], axis=1)[:, 0, :]
+    return {
+        "lowerWeight": np.where(has_lower, grid[lower_index], np.nan),
+        "lowerWinner": np.where(has_lower, lower_winner, -1),
+        "upperWeight": np.where(has_upper, grid[upper_index], np.nan),
+        "upperWinner": np.where(has_upper, upper_winner, -1),
+    }
+
+
+def weight_sensitivity(
+    gaps: Tuple[np.ndarray, np.ndarray],
+    weights: np.ndarray,
+    samples: int,
+    concentration: float,
+    threshold_steps: int,
+    seed: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """Monte Carlo rank stability and winner-flip thresholds for a batch of lanes.
+
+    ``gaps`` are the weight-independent TOPSIS gaps of a NaN-padded (lanes,
+    alternatives, criteria) decision matrix, classic or neutrosophic; they are
+    computed once and every weight sample costs one matrix product.
+    """
+    base_scores = batch_scores(gaps, weights[np.newaxis, :])[0]
+    base_order, base_ranks = rank_order(base_scores)
+    base_winner = base_order[:, 0]
+
+    rng = np.random.default_rng(seed)
+    distribution = rank_distribution(gaps, dirichlet_weights(weights, samples, concentration, rng))
+    thresholds = winner_thresholds(gaps, weights, base_winner, threshold_steps)
+
+    return {
+        "baseScores": base_scores,
+        "baseRanks": base_ranks,
+        "baseWinner": base_winner,
+        "rankProbabilities": distribution,
+        **thresholds,
+    }
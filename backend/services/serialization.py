@@ -0,0 +1,66 @@
+import os
+import decimal
+import orjson
+from typing import Any, Dict, Iterable
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+
+# Re-validate row payloads against their response model before sending them;
+# rows come from our own Parquet files, so this is off unless debugging
+VALIDATE_RESPONSE_RECORDS = os.getenv("VALIDATE_RESPONSE_RECORDS", "false").lower() == "true"
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types orjson does not serialize natively"""
+    if isinstance(value, BaseModel):
+        return model_content(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode(errors="replace")
+    return str(value)
+
+
+def model_content(model: BaseModel) -> Dict[str, Any]:
+    """A model's fields as plain Python values, with row lists passed through untouched.
+
+    ``records`` fields hold plain dicts read from Parquet; dumping them
+    through pydantic walks every value of every row for no change, so they
+    are handed to orjson as they are.
+    """
+    if "records" not in type(model).model_fields:
+        return model.model_dump()
+    content = model.model_dump(exclude={"records"})
+    content["records"] = model.records
+    return content
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def dumps_lines(rows: Iterable[Dict[str, Any]]) -> bytes:
+    """Newline-delimited JSON for a batch of rows"""
+    return b"".join(
+        orjson.dumps(row, default=_default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE) for row in rows
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; also accepts pydantic models without validating them again.
+
+    NaN and infinity become null instead of the invalid JSON tokens the
+    standard library writes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def records_response(model: BaseModel) -> Any:
+    """Return a row-carrying model as-is, or serialized directly unless VALIDATE_RESPONSE_RECORDS is set"""
+    if VALIDATE_RESPONSE_RECORDS:
+        return model
+    return FastJSONResponse(model)
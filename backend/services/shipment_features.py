@@ -0,0 +1,167 @@
+import io
+import os
+import re
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Base shipment history shared by generation and training
+BASE_DATA_PATH = os.getenv("BASE_DATA_PATH", "../public/embedded_shipments.csv")
+
+# Per-forwarder quote columns of the embedded_shipments.csv schema
+FORWARDER_COLUMNS = (
+    "kuehne_nagel",
+    "scan_global_logistics",
+    "dhl_express",
+    "dhl_global",
+    "bwosi",
+    "agl",
+    "siginon",
+    "freight_in_time",
+)
+
+FORWARDER_LABELS = {
+    "kuehne_nagel": "Kuehne + Nagel",
+    "scan_global_logistics": "Scan Global Logistics",
+    "dhl_express": "DHL Express",
+    "dhl_global": "DHL Global",
+    "bwosi": "Bwosi",
+    "agl": "AGL",
+    "siginon": "Siginon",
+    "freight_in_time": "Freight In Time",
+}
+
+# Free-text award names that do not normalize onto a column name
+FORWARDER_ALIASES = {
+    "scanglobal": "scan_global_logistics",
+    "siginonlogistics": "siginon",
+    "kuehnenagel": "kuehne_nagel",
+}
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+_FORWARDER_INDEX = {_normalize_name(col): i for i, col in enumerate(FORWARDER_COLUMNS)}
+_FORWARDER_INDEX.update({alias: FORWARDER_COLUMNS.index(col) for alias, col in FORWARDER_ALIASES.items()})
+
+
+def read_shipment_upload(content: bytes, filename: str = "") -> pd.DataFrame:
+    """Parse an uploaded shipment file in the base schema: Parquet, TSV or CSV"""
+    name = filename.lower()
+    if name.endswith(".parquet") or content[:4] == b"PAR1":
+        return pd.read_parquet(io.BytesIO(content))
+    first_line = content.split(b"\n", 1)[0]
+    sep = "\t" if name.endswith(".tsv") or b"\t" in first_line else ","
+    return pd.read_csv(io.BytesIO(content), sep=sep)
+
+
+def parse_numeric(values) -> np.ndarray:
+    """Parse numbers that may carry thousands separators, e.g. "18,681" """
+    series = pd.Series(values)
+    if not pd.api.types.is_numeric_dtype(series):
+        series = series.astype(str).str.replace(",", "", regex=False).str.strip()
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, copy=True)
+
+
+def quote_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Forwarder quotes as a (rows, forwarders) array, NaN where no quote was given"""
+    quotes = np.full((len(df), len(FORWARDER_COLUMNS)), np.nan)
+    for j, col in enumerate(FORWARDER_COLUMNS):
+        if col in df.columns:
+            quotes[:, j] = parse_numeric(df[col])
+    quotes[quotes <= 0] = np.nan
+    return quotes
+
+
+def shipment_cost(df: pd.DataFrame) -> np.ndarray:
+    """Carrier cost per shipment, or the lowest forwarder quote where no carrier cost was recorded"""
+    cost = parse_numeric(df["carrier_cost"]) if "carrier_cost" in df.columns else np.full(len(df), np.nan)
+    quotes = quote_matrix(df)
+    quoted = ~np.isnan(quotes).all(axis=1)
+    lowest = np.full(len(df), np.nan)
+    lowest[quoted] = np.nanmin(quotes[quoted], axis=1)
+    return np.where(cost > 0, cost, lowest)
+
+
+def awarded_index(df: pd.DataFrame, column: str = "final_quote_awarded") -> np.ndarray:
+    """Map award names onto forwarder column indices, -1 where unmatched"""
+    if column not in df.columns:
+        return np.full(len(df), -1, dtype=int)
+    names = df[column].fillna("").map(_normalize_name)
+    return names.map(_FORWARDER_INDEX).fillna(-1).to_numpy(dtype=int)
+
+
+def transit_days(df: pd.DataFrame) -> np.ndarray:
+    """Days between collection and arrival, NaN where either date is missing"""
+    if "date_of_collection" not in df.columns or "date_of_arrival_destination" not in df.columns:
+        return np.full(len(df), np.nan)
+    collected = pd.to_datetime(df["date_of_collection"], format="%d-%b-%y", errors="coerce")
+    arrived = pd.to_datetime(df["date_of_arrival_destination"], format="%d-%b-%y", errors="coerce")
+    days = (arrived - collected).dt.days.to_numpy(dtype=float, copy=True)
+    days[days < 0] = np.nan
+    return days
+
+
+def forwarder_profiles(df: pd.DataFrame, quotes: np.ndarray, awarded: np.ndarray) -> np.ndarray:
+    """Estimate (time, reliability, risk) per forwarder from shipment history.
+
+    Time is the mean transit of the forwarder's awarded shipments, reliability
+    the smoothed share of those delivered, and risk the coefficient of
+    variation of its cost-per-kg quotes. Forwarders without history fall back
+    to the fleet-wide values.
+    """
+    n_forwarders = len(FORWARDER_COLUMNS)
+    days = transit_days(df)
+    delivered = (
+        df["delivery_status"].fillna("").str.strip().str.lower().eq("delivered").to_numpy()
+        if "delivery_status" in df.columns else np.zeros(len(df), dtype=bool)
+    )
+
+    matched = awarded >= 0
+    award_counts = np.bincount(awarded[matched], minlength=n_forwarders).astype(float)
+    delivered_counts = np.bincount(awarded[matched & delivered], minlength=n_forwarders).astype(float)
+    reliability = (delivered_counts + 1.0) / (award_counts + 2.0)
+
+    timed = matched & ~np.isnan(days)
+    day_sums = np.bincount(awarded[timed], weights=days[timed], minlength=n_forwarders)
+    day_counts = np.bincount(awarded[timed], minlength=n_forwarders)
+    fleet_days = np.nanmean(days) if timed.any() else 0.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        time = np.where(day_counts > 0, day_sums / day_counts, fleet_days)
+
+    weight = parse_numeric(df["weight_kg"]) if "weight_kg" in df.columns else np.full(len(df), np.nan)
+    weight[weight <= 0] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # Forwarders that never quoted produce all-NaN columns
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        per_kg = quotes / weight[:, np.newaxis]
+        risk = np.nanstd(per_kg, axis=0) / np.nanmean(per_kg, axis=0)
+    fleet_risk = np.nanmean(risk) if np.isfinite(risk).any() else 0.0
+    risk = np.where(np.isfinite(risk), risk, fleet_risk)
+
+    return np.column_stack([time, reliability, risk])
+
+
+def decision_matrix(quotes: np.ndarray, profiles: np.ndarray) -> np.ndarray:
+    """Combine per-row quotes with per-forwarder (time, reliability, risk) profiles.
+
+    Returns a (rows, forwarders, criteria) array in ``services.mcda.CRITERIA``
+    order; forwarders that did not quote on a row are NaN across all criteria.
+    """
+    matrix = np.empty(quotes.shape + (4,))
+    matrix[..., 0] = quotes
+    matrix[..., 1:] = profiles[np.newaxis, :, :]
+    matrix[np.isnan(quotes)] = np.nan
+    return matrix
+
+
+def build_decision_matrix(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Build the (rows, forwarders, criteria) decision matrix and award indices
+    with forwarder profiles estimated from the same rows."""
+    quotes = quote_matrix(df)
+    awarded = awarded_index(df)
+    profiles = forwarder_profiles(df, quotes, awarded)
+    return decision_matrix(quotes, profiles), awarded
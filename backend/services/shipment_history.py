@@ -0,0 +1,152 @@
+import os
+import glob
+import hashlib
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.compute as pc
+from typing import Dict, Tuple
+from services.shipment_features import BASE_DATA_PATH, FORWARDER_COLUMNS
+
+# Typed copies of the shipment history live here, one Arrow IPC file per source version
+SHIPMENT_CACHE_DIR = os.getenv("SHIPMENT_CACHE_DIR", "./shipment_cache")
+
+# Bump when the schema or parsing changes so cached files are rebuilt
+SCHEMA_VERSION = 1
+
+# Columns parsed to float64; they carry thousands separators in the source, e.g. "18,681".
+# Every other column is kept as text.
+NUMERIC_COLUMNS = (
+    "origin_latitude",
+    "origin_longitude",
+    "destination_latitude",
+    "destination_longitude",
+    "carrier_cost",
+    *FORWARDER_COLUMNS,
+    "weight_kg",
+    "volume_cbm",
+)
+
+HASH_CHUNK_BYTES = 1 << 20
+
+# What is left of a number once thousands separators and padding are stripped
+NUMBER_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def parse_numeric_column(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Text like " 18,681 " to float64; anything that is not a number becomes null"""
+    text = pc.utf8_trim_whitespace(pc.replace_substring(values, ",", ""))
+    valid = pc.match_substring_regex(text, NUMBER_PATTERN)
+    return pc.cast(pc.if_else(valid, text, pa.scalar(None, pa.string())), pa.float64())
+
+
+def parse_shipments(path: str) -> pa.Table:
+    """Parse the tab-separated history into an Arrow table with the declared column types"""
+    with open(path, newline="") as f:
+        header = f.readline().rstrip("\r\n").split("\t")
+    table = pv.read_csv(
+        path,
+        parse_options=pv.ParseOptions(delimiter="\t"),
+        # Read everything as text first; numbers need their separators stripped
+        convert_options=pv.ConvertOptions(
+            column_types={col: pa.string() for col in header}, strings_can_be_null=True
+        ),
+    )
+    for i, col in enumerate(table.column_names):
+        if col in NUMERIC_COLUMNS:
+            table = table.set_column(i, col, parse_numeric_column(table.column(i)))
+    return table
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ShipmentHistory:
+    """Parse-once, memory-mapped cache of a shipment history file.
+
+    The first reader of a source version parses it and writes an
+    uncompressed Arrow IPC file named after the source's content hash;
+    every later reader, in any process, memory-maps that file, so the OS
+    page cache holds one copy shared by API and worker processes. A change
+    of mtime or size triggers a rehash, and a new hash a rebuild.
+    """
+
+    def __init__(self, directory: str = SHIPMENT_CACHE_DIR):
+        self.directory = directory
+        # Source path -> ((mtime, size), cache file, mapped table)
+        self._tables: Dict[str, Tuple[Tuple[float, int], str, pa.Table]] = {}
+        self._lock = threading.Lock()
+
+    def cache_path(self, path: str, digest: str) -> str:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.directory, f"{stem}-v{SCHEMA_VERSION}-{digest[:16]}.arrow")
+
+    def _current(self, path: str) -> Tuple[Tuple[float, int], str, pa.Table]:
+        stat = os.stat(path)
+        version = (stat.st_mtime, stat.st_size)
+        cached = self._tables.get(path)
+        if cached is not None and cached[0] == version:
+            return cached
+        with self._lock:
+            cached = self._tables.get(path)
+            if cached is None or cached[0] != version:
+                cache_path = self._ensure_cached(path)
+                cached = (version, cache_path, self._map(cache_path))
+                self._tables[path] = cached
+        return cached
+
+    def table(self, path: str = BASE_DATA_PATH) -> pa.Table:
+        """The typed, memory-mapped history; reparsed only when the source content changes"""
+        return self._current(path)[2]
+
+    def version(self, path: str = BASE_DATA_PATH) -> str:
+        """Identifier of the source content and schema; changes exactly when the typed table does"""
+        return os.path.splitext(os.path.basename(self._current(path)[1]))[0]
+
+    def frame(self, path: str = BASE_DATA_PATH) -> pd.DataFrame:
+        """The history as a new DataFrame that callers are free to modify"""
+        return self.table(path).to_pandas()
+
+    def _ensure_cached(self, path: str) -> str:
+        cache_path = self.cache_path(path, file_digest(path))
+        if os.path.exists(cache_path):
+            return cache_path
+
+        os.makedirs(self.directory, exist_ok=True)
+        table = parse_shipments(path)
+        # Write then rename so concurrent readers never map a partial file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, cache_path)
+        self._remove_stale(path, cache_path)
+        return cache_path
+
+    def _remove_stale(self, path: str, current: str) -> None:
+        # Processes still mapping an old file keep it readable after unlink
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for old in glob.glob(os.path.join(self.directory, f"{stem}-v*.arrow")):
+            if old != current:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _map(cache_path: str) -> pa.Table:
+        return pa.ipc.open_file(pa.memory_map(cache_path, "r")).read_all()
+
+
+def load_base_shipments(path: str = BASE_DATA_PATH) -> pd.DataFrame:
+    """Load the base shipment history with typed numeric columns"""
+    return shipment_history.frame(path)
+
+# Singleton instance
+shipment_history = ShipmentHistory()
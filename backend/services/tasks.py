@@ -0,0 +1,25 @@
+from services.celery_app import celery_app
+from services.dependencies import get_mostly_service, get_training_service
+from services.job_supervisor import GENERATION_TIMEOUT_SECONDS, TRAINING_TIMEOUT_SECONDS, TERMINATE_GRACE_SECONDS, MemoryWatchdog
+
+# Tasks only carry job ids; the job store is the source of truth for config
+# and progress, and every update is published on the shared event bus.
+
+
+def time_limits(seconds: float) -> dict:
+    """The soft limit lets the task record its failure; the hard limit follows if it does not stop"""
+    if seconds <= 0:
+        return {}
+    return {"soft_time_limit": seconds, "time_limit": seconds + TERMINATE_GRACE_SECONDS}
+
+
+@celery_app.task(name="deepcal.generate_dataset", **time_limits(GENERATION_TIMEOUT_SECONDS))
+def generate_dataset(job_id: str) -> None:
+    with MemoryWatchdog():
+        get_mostly_service().execute_generation(job_id)
+
+
+@celery_app.task(name="deepcal.train_weights", **time_limits(TRAINING_TIMEOUT_SECONDS))
+def train_weights(job_id: str) -> None:
+    with MemoryWatchdog():
+        get_training_service().execute_training(job_id)
@@ -7,124 +7,307 @@ from datetime import datetime
 import uuid
 import json
 from models.schemas import TrainingJob, TrainingJobRequest, JobStatus, WeightVector
+from services.mcda import CRITERIA, weights_to_array
+from services.dataset_files import dataset_files
+from services.dependencies import get_job_store
+from services.job_events import job_events, TERMINAL_STATUSES
+from services.job_stats import job_stats
+from services.job_submissions import claim_or_find_job
+from services.job_supervisor import PROCESS_ID, TRAINING_TIMEOUT_SECONDS, JobSupervisor
+from services.shipment_history import load_base_shipments
+from services.weight_fitting import fit_weights
+from services.workers import JOB_BACKEND, JobSettled, ProgressReporter, shared_manager
+
+# Weight fitting runs in supervised worker processes, one per core by default
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", str(os.cpu_count() or 1)))
+TRAINING_MAX_ITERATIONS = int(os.getenv("TRAINING_MAX_ITERATIONS", "200"))
 
 class TrainingService:
     def __init__(self):
-        # In-memory storage (in production, use database)
-        self.training_jobs: Dict[str, TrainingJob] = {}
-        self.weight_matrices: Dict[str, WeightVector] = {}
+        self.store = get_job_store()
         
         # Load default weights
-        self.weight_matrices["default"] = WeightVector(
+        self.default_weights = WeightVector(
             cost=0.35,
             time=0.35,
             reliability=0.2,
             risk=0.1
         )
+        if self.store.get_weight_matrix("default") is None:
+            self.store.put_weight_matrix("default", self.default_weights)
+
+        # One process per running job, so each can be cancelled, timed out or memory-capped
+        self.supervisor = JobSupervisor("training", self.store, TRAINING_WORKERS, TRAINING_TIMEOUT_SECONDS)
+
+    def close(self):
+        """Stop training tasks and worker processes"""
+        self.supervisor.close()
 
-    async def start_training(self, request: TrainingJobRequest) -> TrainingJob:
-        """Start model training job"""
+    async def start_training(self, request: TrainingJobRequest, idempotency_key: Optional[str] = None) -> TrainingJob:
+        """Start model training job.
+
+        A retry with the same idempotency key, or a request identical to a
+        pending or running job, returns the existing job instead.
+        """
         job_id = str(uuid.uuid4())
+        existing = await claim_or_find_job(
+            self.store, "training", request, job_id, idempotency_key, self.get_training_job
+        )
+        if existing is not None:
+            return existing
         
+        try:
+            return await self._submit_training(job_id, request)
+        except BaseException:
+            await asyncio.to_thread(self.store.release_submissions, job_id)
+            raise
+
+    async def _submit_training(self, job_id: str, request: TrainingJobRequest) -> TrainingJob:
         job = TrainingJob(
             id=job_id,
             status=JobStatus.PENDING,
             progress=0,
             datasetId=request.datasetId,
             weights=request.weights,
+            modelType=request.modelType,
             createdAt=datetime.utcnow()
         )
         
-        self.training_jobs[job_id] = job
+        if JOB_BACKEND != "celery":
+            # Owned by this process, so restart recovery elsewhere leaves it alone while this process lives
+            await asyncio.to_thread(self.store.set_job_owner, "training", job_id, PROCESS_ID)
+        await asyncio.to_thread(self.store.put_training_job, job)
+        job_events.publish("training", None, job)
         
         # Start background training task
-        asyncio.create_task(self._run_training(job_id))
+        if JOB_BACKEND == "celery":
+            from services.tasks import train_weights
+            # The task id is the job id, so cancelling can revoke it
+            await asyncio.to_thread(train_weights.apply_async, (job_id,), task_id=job_id)
+        else:
+            self.supervisor.start(job_id, self._run_training(job_id))
         
         return job
 
     async def _run_training(self, job_id: str):
-        """Background task to run model training"""
+        """Background task to fit criteria weights in a supervised worker process"""
+        job = await asyncio.to_thread(self.store.get_training_job, job_id)
+        if job is None or job.status != JobStatus.PENDING:
+            # Cancelled before it started
+            return
+        state = {"job": job}
+        # Workers report optimizer iterations through a shared counter
+        # Starting the manager on first use takes a moment; keep it off the event loop
+        iterations = (await asyncio.to_thread(shared_manager)).Value("i", 0)
+
+        async def publish_progress():
+            done = iterations.value
+            if done != state["job"].iterations:
+                state["job"] = await self._update_job_async(
+                    state["job"], iterations=done, progress=self._iteration_progress(done)
+                )
+
+        try:
+            state["job"] = await self._update_job_async(job, status=JobStatus.RUNNING, progress=5)
+
+            df = await asyncio.to_thread(self._load_training_data, job.datasetId)
+            state["job"] = await self._update_job_async(state["job"], progress=10)
+
+            result = await self.supervisor.run_process(
+                fit_weights,
+                df,
+                weights_to_array(job.weights),
+                TRAINING_MAX_ITERATIONS,
+                job.modelType or "topsis",
+                progress=iterations,
+                on_tick=publish_progress
+            )
+            trained = await asyncio.to_thread(self._store_weights, state["job"], result)
+            await self._update_job_async(state["job"], **self._completion(trained, result))
+
+        except JobSettled:
+            # Cancelled while it ran
+            pass
+        except Exception as e:
+            await self._fail_job_async(state["job"], str(e))
+
+    async def cancel_job(self, job_id: str, reason: str = "Cancelled by request") -> Optional[TrainingJob]:
+        """Cancel a pending or running job and stop its worker; settled jobs are returned unchanged"""
+        job = await asyncio.to_thread(self.store.get_training_job, job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job
+        try:
+            # Settled first: the store then rejects the worker's updates, which stops it at its next one
+            job = await self._update_job_async(
+                job, status=JobStatus.CANCELLED, error=reason, completedAt=datetime.utcnow()
+            )
+        except JobSettled:
+            # It finished while being cancelled
+            return await asyncio.to_thread(self.store.get_training_job, job_id)
+        if JOB_BACKEND == "celery":
+            # Revoking is a broadcast that may arrive late or not at all; it saves the rest of the work
+            from services.celery_app import celery_app
+            await asyncio.to_thread(celery_app.control.revoke, job_id, terminate=True)
+        self.supervisor.cancel(job_id)
+        return job
+
+    def watch_job(self, job_id: str):
+        """Note that a client is following a job, keeping it from being reaped as abandoned"""
+        self.supervisor.watch(job_id)
+
+    async def reap_abandoned(self):
+        """Cancel unfinished jobs no client has followed for JOB_ABANDON_SECONDS"""
+        for job_id in await asyncio.to_thread(self.supervisor.abandoned):
+            await self.cancel_job(job_id, "Abandoned: no client followed the job")
+
+    def execute_training(self, job_id: str):
+        """Fit a training job's weights in the calling process, as a Celery task does"""
+        job = self.store.get_training_job(job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            # Already settled, e.g. a late acknowledgement redelivered the task
+            return
+        state = {"job": job}
+
+        def report(done: int):
+            # Every iteration would be a store write; only publish when the percentage moves
+            if self._iteration_progress(done) != state["job"].progress:
+                state["job"] = self._update_job(state["job"], iterations=done, progress=self._iteration_progress(done))
+
         try:
-            job = self.training_jobs[job_id]
-            job.status = JobStatus.RUNNING
-            job.progress = 10
-            
-            # Simulate training process
-            await asyncio.sleep(2)  # Load data
-            job.progress = 30
-            
-            await asyncio.sleep(3)  # Feature engineering
-            job.progress = 50
-            
-            await asyncio.sleep(4)  # Train Neutrosophic engine
-            job.progress = 70
-            
-            await asyncio.sleep(2)  # Validate TOPSIS weights
-            job.progress = 85
-            
-            await asyncio.sleep(1)  # Generate weight matrices
-            job.progress = 95
-            
-            # Store trained weights
-            self.weight_matrices[f"trained_{job_id}"] = job.weights
-            self.weight_matrices["latest"] = job.weights
-            
-            # Complete training
-            job.status = JobStatus.COMPLETED
-            job.progress = 100
-            job.completedAt = datetime.utcnow()
-            job.accuracy = 0.94 + (hash(job_id) % 100) / 1000  # Simulated accuracy
-            
+            state["job"] = self._update_job(job, status=JobStatus.RUNNING, progress=5)
+            df = self._load_training_data(job.datasetId)
+            state["job"] = self._update_job(state["job"], progress=10)
+            result = fit_weights(
+                df,
+                weights_to_array(job.weights),
+                TRAINING_MAX_ITERATIONS,
+                job.modelType or "topsis",
+                progress=ProgressReporter(report)
+            )
+            trained = self._store_weights(state["job"], result)
+            self._update_job(state["job"], **self._completion(trained, result))
+        except JobSettled:
+            # Cancelled while it ran
+            pass
         except Exception as e:
-            job = self.training_jobs[job_id]
-            job.status = JobStatus.FAILED
-            job.error = str(e)
-            job.completedAt = datetime.utcnow()
+            # Celery's soft time limit raises an exception without a message
+            self._fail_job(state["job"], str(e) or type(e).__name__)
+
+    @staticmethod
+    def _iteration_progress(done: int) -> int:
+        return 10 + int(85 * done / TRAINING_MAX_ITERATIONS)
+
+    def _store_weights(self, job: TrainingJob, result: Dict[str, Any]) -> WeightVector:
+        """Store a job's fitted weights as its own matrix and as the latest"""
+        current = self.store.get_training_job(job.id)
+        if current is None or current.status in TERMINAL_STATUSES:
+            # A cancelled job's weights must not become the latest
+            raise JobSettled(job.id)
+        trained = WeightVector(**dict(zip(CRITERIA, result["weights"])))
+        self.store.put_weight_matrix(f"trained_{job.id}", trained)
+        self.store.put_weight_matrix("latest", trained)
+        return trained
+
+    @staticmethod
+    def _completion(trained: WeightVector, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Changes that mark a job completed with its fitted weights"""
+        return {
+            "weights": trained,
+            "iterations": result["iterations"],
+            "accuracy": result["accuracy"],
+            "status": JobStatus.COMPLETED,
+            "progress": 100,
+            "completedAt": datetime.utcnow(),
+        }
+
+    def _update_job(self, job: TrainingJob, **changes) -> TrainingJob:
+        """Persist a new version of an unfinished job and publish what changed.
+
+        Raises JobSettled, leaving the stored job alone, when the job has
+        finished in the meantime, e.g. because it was cancelled.
+        """
+        updated = self._write_job(job, changes)
+        job_events.publish("training", job, updated)
+        return updated
+
+    async def _update_job_async(self, job: TrainingJob, **changes) -> TrainingJob:
+        """_update_job on the event loop: the store write runs in a thread, the event is published here"""
+        updated = await asyncio.to_thread(self._write_job, job, changes)
+        job_events.publish("training", job, updated)
+        return updated
+
+    def _write_job(self, job: TrainingJob, changes: Dict[str, Any]) -> TrainingJob:
+        updated = job.model_copy(update=changes)
+        if not self.store.put_training_job(updated, if_unfinished=True):
+            raise JobSettled(job.id)
+        return updated
+
+    def _fail_job(self, job: TrainingJob, error: str):
+        """Mark a job failed unless it has already finished"""
+        try:
+            self._update_job(job, status=JobStatus.FAILED, error=error, completedAt=datetime.utcnow())
+        except JobSettled:
+            pass
+
+    async def _fail_job_async(self, job: TrainingJob, error: str):
+        """_fail_job on the event loop"""
+        try:
+            await self._update_job_async(job, status=JobStatus.FAILED, error=error, completedAt=datetime.utcnow())
+        except JobSettled:
+            pass
+
+    def _load_training_data(self, dataset_id: str) -> pd.DataFrame:
+        """Load dataset records, using the base shipment history when no synthetic data exists yet"""
+        if dataset_id == "latest":
+            dataset = self.store.get_latest_dataset()
+            if dataset is None:
+                return load_base_shipments()
+            dataset_id = dataset.id
+        if self.store.get_dataset(dataset_id) is None:
+            raise ValueError(f"Dataset {dataset_id} not found")
+        return dataset_files.read_page(dataset_id).to_pandas()
 
     async def get_training_job(self, job_id: str) -> Optional[TrainingJob]:
         """Get training job status"""
-        return self.training_jobs.get(job_id)
+        return await asyncio.to_thread(self.store.get_training_job, job_id)
 
-    async def list_training_jobs(self) -> List[TrainingJob]:
-        """List all training jobs"""
-        return list(self.training_jobs.values())
+    async def list_training_jobs(
+        self, status: Optional[JobStatus] = None, limit: Optional[int] = None, offset: int = 0
+    ) -> List[TrainingJob]:
+        """List training jobs, oldest first"""
+        return await asyncio.to_thread(self.store.list_training_jobs, status=status, limit=limit, offset=offset)
 
     async def get_latest_weights(self) -> WeightVector:
         """Get latest trained weight vector"""
-        return self.weight_matrices.get("latest", self.weight_matrices["default"])
+        return (
+            await asyncio.to_thread(self.store.get_weight_matrix, "latest")
+            or await asyncio.to_thread(self.store.get_weight_matrix, "default")
+            or self.default_weights
+        )
 
     async def get_weight_matrix(self, matrix_id: str) -> Optional[WeightVector]:
         """Get specific weight matrix"""
-        return self.weight_matrices.get(matrix_id)
+        return await asyncio.to_thread(self.store.get_weight_matrix, matrix_id)
 
     async def save_weight_matrix(self, matrix_id: str, weights: WeightVector) -> bool:
         """Save weight matrix"""
-        self.weight_matrices[matrix_id] = weights
+        await asyncio.to_thread(self.store.put_weight_matrix, matrix_id, weights)
         return True
 
     async def get_training_stats(self) -> Dict[str, Any]:
-        """Get training statistics"""
-        total_jobs = len(self.training_jobs)
-        completed_jobs = sum(1 for job in self.training_jobs.values() if job.status == JobStatus.COMPLETED)
-        
-        avg_accuracy = 0.0
-        if completed_jobs > 0:
-            accuracies = [job.accuracy for job in self.training_jobs.values() 
-                         if job.accuracy is not None]
-            avg_accuracy = sum(accuracies) / len(accuracies) if accuracies else 0.0
-        
-        last_training = "Never"
-        if self.training_jobs:
-            latest_job = max(self.training_jobs.values(), key=lambda j: j.createdAt)
-            last_training = latest_job.createdAt.isoformat()
+        """Get training statistics from the incrementally maintained aggregates"""
+        stats = job_stats.training.snapshot()
+        totals = stats["totals"]
+        last_created = stats["lastCreatedAt"]
+        available_matrices = await asyncio.to_thread(self.store.count_weight_matrices)
         
         return {
-            "totalJobs": total_jobs,
-            "completedJobs": completed_jobs,
-            "averageAccuracy": avg_accuracy,
-            "lastTraining": last_training,
-            "availableMatrices": len(self.weight_matrices)
+            "totalJobs": totals.jobs,
+            "completedJobs": totals.completed,
+            "failedJobs": totals.failed,
+            "cancelledJobs": totals.cancelled,
+            "averageAccuracy": totals.average_accuracy,
+            "lastTraining": last_created.isoformat() if last_created else "Never",
+            "availableMatrices": available_matrices,
+            "rates": stats["rates"]
         }
-
-# Singleton instance
-training_service = TrainingService()
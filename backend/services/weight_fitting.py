@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+from services.mcda import batch_scores
+from services.neutrosophic import decision_gaps
+from services.shipment_features import FORWARDER_COLUMNS, awarded_index, build_decision_matrix
+
+# Functions in this module run inside worker processes: keep them free of
+# service singletons so importing them in a child stays cheap.
+
+# Sharpness of the choice model mapping TOPSIS closeness to award probability
+CHOICE_SHARPNESS = 10.0
+
+FINITE_DIFFERENCE_STEP = 1e-4
+
+
+def prepare_training_set(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep rows with at least two quotes where the awarded forwarder quoted"""
+    matrix, awarded = build_decision_matrix(df)
+    quoted = ~np.isnan(matrix[..., 0])
+    rows = np.arange(len(awarded))
+    usable = (awarded >= 0) & (quoted.sum(axis=1) >= 2)
+    usable &= quoted[rows, np.where(awarded >= 0, awarded, 0)]
+    return matrix[usable], awarded[usable]
+
+
+def history_indeterminacy(awarded: np.ndarray) -> np.ndarray:
+    """Indeterminacy of each forwarder's criteria, shaped (1, forwarders, criteria).
+
+    Quotes are firm, so cost is fully determinate; time, reliability and risk
+    are estimated from the forwarder's awarded shipments and grow less
+    certain the fewer of those there are.
+    """
+    awards = np.bincount(awarded[awarded >= 0], minlength=len(FORWARDER_COLUMNS))
+    indeterminacy = np.zeros((1, len(FORWARDER_COLUMNS), 4))
+    indeterminacy[0, :, 1:] = (1.0 / (awards + 1.0))[:, np.newaxis]
+    return indeterminacy
+
+
+def _softmax(theta: np.ndarray) -> np.ndarray:
+    exp = np.exp(theta - theta.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def award_log_loss(gaps: Tuple[np.ndarray, np.ndarray], awarded: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Mean negative log-likelihood of the awarded choices per weight vector"""
+    scores = batch_scores(gaps, np.atleast_2d(weights))
+    logits = np.where(np.isnan(scores), -np.inf, CHOICE_SHARPNESS * scores)
+    peak = logits.max(axis=-1, keepdims=True)
+    log_norm = np.log(np.exp(logits - peak).sum(axis=-1)) + peak[..., 0]
+    chosen = np.take_along_axis(logits, awarded[np.newaxis, :, np.newaxis], axis=-1)[..., 0]
+    return (log_norm - chosen).mean(axis=-1)
+
+
+def award_accuracy(gaps: Tuple[np.ndarray, np.ndarray], awarded: np.ndarray, weights: np.ndarray) -> float:
+    """Share of rows whose top-ranked forwarder is the one actually awarded"""
+    scores = batch_scores(gaps, np.atleast_2d(weights))[0]
+    best = np.argmax(np.where(np.isnan(scores), -np.inf, scores), axis=-1)
+    return float((best == awarded).mean())
+
+
+def fit_weights(
+    df: pd.DataFrame,
+    initial_weights: np.ndarray,
+    max_iterations: int = 200,
+    model_type: str = "topsis",
+    learning_rate: float = 0.05,
+    tolerance: float = 1e-6,
+    progress: Optional[Any] = None
+) -> Dict[str, Any]:
+    """Fit criteria weights that best reproduce the awarded forwarders.
+
+    Weights are kept on the simplex through a softmax parameterization and
+    optimized with Adam on central finite differences. ``model_type`` picks
+    classic or neutrosophic TOPSIS scoring. ``progress`` may be a shared
+    ``multiprocessing`` value that receives the current iteration.
+    """
+    matrix, awarded = prepare_training_set(df)
+    if len(awarded) == 0:
+        raise ValueError("Dataset has no rows with competing quotes and a matched award")
+    gaps = decision_gaps(matrix, model_type, history_indeterminacy(awarded_index(df)))
+
+    n = len(initial_weights)
+    theta = np.log(np.clip(np.asarray(initial_weights, dtype=float), 1e-6, None))
+    first_moment = np.zeros(n)
+    second_moment = np.zeros(n)
+    offsets = np.vstack([np.eye(n), -np.eye(n)]) * FINITE_DIFFERENCE_STEP
+
+    loss = float(award_log_loss(gaps, awarded, _softmax(theta))[0])
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        # All 2n perturbed candidates are evaluated in a single batch
+        losses = award_log_loss(gaps, awarded, _softmax(theta + offsets))
+        gradient = (losses[:n] - losses[n:]) / (2 * FINITE_DIFFERENCE_STEP)
+
+        first_moment = 0.9 * first_moment + 0.1 * gradient
+        second_moment = 0.999 * second_moment + 0.001 * gradient ** 2
+        step = (first_moment / (1 - 0.9 ** iteration)) / (np.sqrt(second_moment / (1 - 0.999 ** iteration)) + 1e-8)
+        theta = theta - learning_rate * step
+
+        new_loss = float(award_log_loss(gaps, awarded, _softmax(theta))[0])
+        if progress is not None:
+            progress.value = iteration
+        converged = abs(loss - new_loss) < tolerance
+        loss = new_loss
+        if converged:
+            break
+
+    weights = _softmax(theta)
+    return {
+        "weights": weights.tolist(),
+        "loss": loss,
+        "accuracy": award_accuracy(gaps, awarded, weights),
+        "iterations": iteration,
+        "samples": int(len(awarded))
+    }
@@ -0,0 +1,64 @@
+import os
+import multiprocessing
+from typing import Any, Callable, Optional
+from multiprocessing.managers import SyncManager
+
+# "local" runs jobs in processes supervised by this one; "celery" hands them to Celery
+# workers so any number of API processes share one view of every job
+JOB_BACKEND = os.getenv("JOB_BACKEND", "local")
+
+# Broker, result backend and job event bus; memory:// keeps everything in-process
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Job processes start from a clean fork server, or a fresh interpreter where there is
+# none, never as a fork of this process: its event loop, database pool and relay
+# threads may hold locks at the moment of the fork that a child would wait on forever
+job_processes = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+if job_processes.get_start_method() == "forkserver":
+    # Imported once in the fork server instead of in every job process
+    job_processes.set_forkserver_preload(["services.generation_worker", "services.weight_fitting"])
+
+_manager: Optional[SyncManager] = None
+
+
+class GenerationQueueFull(Exception):
+    """Raised when a generation job is submitted while the queue is at capacity"""
+
+
+class JobSettled(Exception):
+    """Raised when a worker updates a job that has already finished, e.g. was cancelled; the worker stops"""
+
+
+def shared_manager() -> SyncManager:
+    """Manager process for counters that worker processes report progress through.
+
+    Started on first use and shared by every service with job processes.
+    """
+    global _manager
+    if _manager is None:
+        _manager = job_processes.Manager()
+    return _manager
+
+
+class ProgressReporter:
+    """Stand-in for a shared counter when the work runs in this process.
+
+    Worker functions assign ``progress.value``; each change is handed to
+    ``callback`` instead of being polled.
+    """
+
+    def __init__(self, callback: Callable[[Any], None], value: Any = 0):
+        self._callback = callback
+        self._value = value
+
+    @property
+    def value(self) -> Any:
+        return self._value
+
+    @value.setter
+    def value(self, value: Any) -> None:
+        if value != self._value:
+            self._value = value
+            self._callback(value)
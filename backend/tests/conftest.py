@@ -0,0 +1,71 @@
+import os
+import uuid
+import tempfile
+import pytest
+
+# Services read their configuration at import, so the environment is set
+# before any test module imports them: Celery runs tasks eagerly and the
+# broker and job event bus live in-process on fakeredis.
+_workdir = tempfile.mkdtemp(prefix="deepcal-tests-")
+os.environ.update(
+    JOB_BACKEND="celery",
+    REDIS_URL="memory://",
+    CELERY_TASK_ALWAYS_EAGER="true",
+    JOB_STORE_URL=f"sqlite:///{os.path.join(_workdir, 'jobs.db')}",
+    DATASET_DIR=os.path.join(_workdir, "datasets"),
+    UPLOAD_DIR=os.path.join(_workdir, "uploads"),
+    GENERATOR_CACHE_DIR=os.path.join(_workdir, "generator_cache"),
+    SHIPMENT_CACHE_DIR=os.path.join(_workdir, "shipment_cache"),
+    MOSTLY_API_KEY="test",
+    LLM_BACKEND="stub",
+    SERVICE_WARMUP="false",
+    SCENARIO_POOL_SIZE="0",
+)
+
+
+class FakeGenerator:
+    def __init__(self, data):
+        self.id = str(uuid.uuid4())
+        self.data = data
+
+    def export_to_file(self, directory: str) -> str:
+        path = os.path.join(directory, f"{self.id}.zip")
+        with open(path, "wb") as f:
+            f.write(b"fake")
+        return path
+
+
+class FakeGenerators:
+    def __init__(self, registry):
+        self.registry = registry
+
+    def get(self, generator_id: str) -> FakeGenerator:
+        return self.registry[generator_id]
+
+    def import_from_file(self, path: str) -> FakeGenerator:
+        raise FileNotFoundError(path)
+
+
+class FakeMostlyAI:
+    """Trains instantly and samples synthetic rows from the training data"""
+
+    registry = {}
+
+    def __init__(self, api_key=None, base_url=None):
+        self.generators = FakeGenerators(self.registry)
+
+    def train(self, data, **config) -> FakeGenerator:
+        generator = FakeGenerator(data)
+        self.registry[generator.id] = generator
+        return generator
+
+    def generate(self, generator: FakeGenerator, size: int):
+        return generator.data.sample(size, replace=True, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture
+def fake_mostlyai(monkeypatch):
+    import services.generation_worker as generation_worker
+
+    monkeypatch.setattr(generation_worker, "MostlyAI", FakeMostlyAI)
+    return FakeMostlyAI
@@ -0,0 +1,126 @@
+import json
+import asyncio
+import httpx
+from services.job_events import TERMINAL_STATUSES, job_events, sse_stream
+
+GENERATION_CONFIG = {
+    "baseDatasetSize": 500, "syntheticRatio": 2.0, "privacyLevel": "medium", "scenarioType": "historical"
+}
+WEIGHTS = {"cost": 0.3, "time": 0.3, "reliability": 0.25, "risk": 0.15}
+FINISHED = {status.value for status in TERMINAL_STATUSES}
+EVENT_TIMEOUT_SECONDS = 30
+
+
+def run_with_api(test):
+    """Run ``test(client)`` against the app inside its lifespan, so the event relay is running"""
+    import main
+
+    async def run():
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await test(client)
+
+    asyncio.run(run())
+
+
+async def follow(kind: str):
+    """Start reading the SSE stream of every ``kind`` job; the task returns the events up to the first finished job"""
+    stream = sse_stream(job_events.subscribe(kind))
+
+    async def read():
+        events = []
+        async for message in stream:
+            lines = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+            event = json.loads(lines["data"])
+            events.append(event)
+            if event["status"] in FINISHED:
+                return events
+
+    subscribers = job_events.subscriber_count
+    task = asyncio.create_task(asyncio.wait_for(read(), EVENT_TIMEOUT_SECONDS))
+    while job_events.subscriber_count == subscribers:
+        await asyncio.sleep(0)
+    return task
+
+
+def test_events_cross_the_in_memory_event_bus():
+    assert job_events.transport is not None
+
+
+def test_generation_job_events_are_relayed_and_counted(fake_mostlyai):
+    async def test(client):
+        before = (await client.get("/api/synthetic/stats")).json()
+        events = await follow("generation")
+
+        response = await client.post("/api/synthetic/generate", json=GENERATION_CONFIG)
+        assert response.status_code == 200
+        job_id = response.json()["id"]
+
+        relayed = await events
+        assert {event["jobId"] for event in relayed} == {job_id}
+        assert relayed[0]["type"] == "snapshot"
+        assert relayed[-1]["status"] == "completed"
+        assert relayed[-1]["progress"] == 100
+
+        job = (await client.get(f"/api/synthetic/jobs/{job_id}")).json()
+        assert job["status"] == "completed"
+        assert job["recordsGenerated"] > 0
+
+        after = (await client.get("/api/synthetic/stats")).json()
+        assert after["totalJobs"] == before["totalJobs"] + 1
+        assert after["completedJobs"] == before["completedJobs"] + 1
+        assert after["totalRecords"] == before["totalRecords"] + job["recordsGenerated"]
+
+    run_with_api(test)
+
+
+def test_training_job_events_are_relayed_and_counted(fake_mostlyai):
+    async def test(client):
+        response = await client.post("/api/synthetic/generate", json=dict(GENERATION_CONFIG, baseDatasetSize=600))
+        job_id = response.json()["id"]
+        dataset = (await client.get(f"/api/synthetic/datasets/{job_id}", params={"includeRecords": "false"})).json()
+
+        before = (await client.get("/api/training/stats")).json()
+        events = await follow("training")
+
+        response = await client.post("/api/training/start", json={"datasetId": dataset["id"], "weights": WEIGHTS})
+        assert response.status_code == 200
+        training_id = response.json()["id"]
+
+        relayed = await events
+        assert {event["jobId"] for event in relayed} == {training_id}
+        assert relayed[-1]["status"] == "completed"
+
+        after = (await client.get("/api/training/stats")).json()
+        assert after["totalJobs"] == before["totalJobs"] + 1
+        assert after["completedJobs"] == before["completedJobs"] + 1
+
+    run_with_api(test)
+
+
+def test_only_unfinished_jobs_can_be_cancelled(fake_mostlyai):
+    from datetime import datetime
+    from models.schemas import GenerationJob, JobStatus, SyntheticDataConfig
+    from services.dependencies import get_job_store
+
+    async def test(client):
+        assert (await client.post("/api/synthetic/jobs/missing/cancel")).status_code == 404
+
+        job_id = (await client.post("/api/synthetic/generate", json=dict(GENERATION_CONFIG, baseDatasetSize=700))).json()["id"]
+        assert (await client.get(f"/api/synthetic/jobs/{job_id}")).json()["status"] == "completed"
+        response = await client.post(f"/api/synthetic/jobs/{job_id}/cancel")
+        assert response.status_code == 409
+
+        # Eager tasks finish before the request returns; a queued job is written directly
+        pending = GenerationJob(
+            id="queued-job", status=JobStatus.PENDING, progress=0,
+            config=SyntheticDataConfig(**GENERATION_CONFIG), createdAt=datetime.utcnow()
+        )
+        get_job_store().put_generation_job(pending)
+        response = await client.post("/api/synthetic/jobs/queued-job/cancel")
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelled"
+        assert (await client.post("/api/synthetic/jobs/queued-job/cancel")).status_code == 409
+
+    run_with_api(test)
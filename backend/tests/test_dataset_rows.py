@@ -0,0 +1,59 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+GENERATION_CONFIG = {
+    "baseDatasetSize": 800, "syntheticRatio": 2.0, "privacyLevel": "medium", "scenarioType": "historical"
+}
+
+
+@pytest.fixture
+def client():
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def dataset(client, fake_mostlyai):
+    job_id = client.post("/api/synthetic/generate", json=GENERATION_CONFIG).json()["id"]
+    return client.get(f"/api/synthetic/datasets/{job_id}").json()
+
+
+def test_datasets_come_without_their_rows_unless_asked(client, dataset):
+    assert dataset["records"] is None
+    full = client.get(f"/api/synthetic/datasets/{dataset['jobId']}", params={"includeRecords": "true"}).json()
+    assert len(full["records"]) == dataset["metadata"]["recordCount"]
+
+
+def test_pages_cover_every_row_once_in_order(client, dataset):
+    full = client.get(f"/api/synthetic/datasets/{dataset['jobId']}", params={"includeRecords": "true"}).json()
+    total = dataset["metadata"]["recordCount"]
+    limit = max(total // 3, 1)
+
+    rows = []
+    for offset in range(0, total, limit):
+        page = client.get(f"/api/synthetic/datasets/{dataset['id']}/rows", params={"offset": offset, "limit": limit}).json()
+        assert page["total"] == total
+        assert len(page["records"]) == min(limit, total - offset)
+        rows.extend(page["records"])
+    assert rows == full["records"]
+
+    past_end = client.get(f"/api/synthetic/datasets/{dataset['id']}/rows", params={"offset": total}).json()
+    assert past_end["records"] == []
+
+
+def test_ndjson_streams_the_same_projected_rows(client, dataset):
+    column = client.get(f"/api/synthetic/datasets/{dataset['id']}/rows", params={"limit": 1}).json()["columns"][0]
+    page = client.get(f"/api/synthetic/datasets/{dataset['id']}/rows", params={"limit": 5, "columns": column}).json()
+
+    response = client.get(
+        f"/api/synthetic/datasets/{dataset['id']}/rows", params={"limit": 5, "columns": column, "format": "ndjson"}
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == page["records"]
+
+
+def test_rows_of_a_missing_dataset_are_404(client):
+    assert client.get("/api/synthetic/datasets/missing/rows").status_code == 404
+    assert client.get("/api/synthetic/datasets/missing/rows", params={"format": "ndjson"}).status_code == 404
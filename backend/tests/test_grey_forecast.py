@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.grey_forecast import MAX_POINTS, class_ratio_test, fit_grey_models, forecast_lanes, lane_series
+
+# Liu Sifeng's textbook GM(1,1) example: a = -0.037202, b = 3.065318
+TEXTBOOK = [2.874, 3.278, 3.337, 3.390, 3.679]
+
+
+def fit(values, horizon=3):
+    series = np.full((1, MAX_POINTS), np.nan)
+    series[0, :len(values)] = values
+    return series, fit_grey_models(series, np.array([len(values)]), horizon)
+
+
+def shipments(values, carrier="DHL"):
+    """One lane's shipments, one per day, whose cost per kg is ``values``"""
+    dates = pd.date_range("2024-01-01", periods=len(values)).strftime("%d-%b-%y")
+    return pd.DataFrame({
+        "origin_country": "Kenya", "destination_country": "Uganda", "carrier": carrier,
+        "date_of_collection": dates, "weight_kg": "100",
+        "carrier_cost": [f"{100 * v:,.2f}" for v in values],
+    })
+
+
+def test_gm11_parameters_match_the_textbook_example():
+    _, fits = fit(TEXTBOOK)
+    gm = fits["gm11"]
+    assert gm["a"][0] == pytest.approx(-0.037202, abs=1e-5)
+    # b is fitted on the mean-scaled series
+    assert gm["b"][0] * np.mean(TEXTBOOK) == pytest.approx(3.065318, abs=1e-3)
+
+
+def test_gm11_forecast_follows_the_time_response():
+    _, fits = fit(TEXTBOOK, horizon=2)
+    a, b = fits["gm11"]["a"][0], fits["gm11"]["b"][0] * np.mean(TEXTBOOK)
+    # x0(k + 1) = (x0(1) - b / a) (1 - e^a) e^(-a k)
+    expected = [(TEXTBOOK[0] - b / a) * (1 - np.exp(a)) * np.exp(-a * k) for k in (5, 6)]
+    np.testing.assert_allclose(fits["gm11"]["forecast"][0], expected, rtol=1e-9)
+
+
+def test_gm11_extends_a_geometric_series():
+    _, fits = fit(5 * 1.08 ** np.arange(8))
+    np.testing.assert_allclose(fits["gm11"]["forecast"][0], 5 * 1.08 ** np.arange(8, 11), rtol=1e-3)
+
+
+def test_verhulst_fits_saturating_series_better():
+    _, fits = fit(10 / (1 + 9 * np.exp(-0.8 * np.arange(10))))
+    assert fits["verhulst"]["mape"][0] < 0.02 < fits["gm11"]["mape"][0]
+
+
+def test_class_ratio_test_rejects_erratic_series():
+    smooth, _ = fit(TEXTBOOK)
+    erratic, _ = fit([1.0, 5.0, 1.0, 5.0, 1.0])
+    assert class_ratio_test(np.vstack([smooth, erratic]), np.array([5, 5])).tolist() == [True, False]
+
+
+def test_lane_series_keeps_the_newest_points_in_date_order():
+    df = shipments(np.arange(1, MAX_POINTS + 6, dtype=float))
+    keys, series, counts = lane_series(df.iloc[::-1], "costPerKg")
+    assert keys.to_dict("records") == [{"origin_country": "Kenya", "destination_country": "Uganda", "carrier": "DHL"}]
+    assert counts.tolist() == [MAX_POINTS]
+    np.testing.assert_allclose(series[0], np.arange(6, MAX_POINTS + 6))
+
+
+def test_lanes_with_too_few_points_are_not_forecast():
+    df = pd.concat([shipments(TEXTBOOK), shipments([1.0, 1.1, 1.2], carrier="AGL")])
+    forecasts = forecast_lanes(df, "costPerKg", horizon=2)
+    assert [f["carrier"] for f in forecasts] == ["DHL"]
+    assert forecasts[0]["points"] == 5
+    assert forecasts[0]["lastObserved"] == pytest.approx(3.679)
+    assert forecasts[0]["ratioTestPassed"]
+    assert len(forecasts[0]["forecast"]) == 2
@@ -0,0 +1,139 @@
+import uuid
+import pytest
+from datetime import datetime
+from models.schemas import GenerationJob, JobStatus, SyntheticDataConfig, TrainingJob, WeightVector
+from services.dependencies import get_job_store, get_mostly_service, get_training_service
+
+GENERATION_CONFIG = SyntheticDataConfig(
+    baseDatasetSize=500, syntheticRatio=2.0, privacyLevel="medium", scenarioType="historical"
+)
+WEIGHTS = WeightVector(cost=0.3, time=0.3, reliability=0.25, risk=0.15)
+
+
+def pending_generation_job() -> GenerationJob:
+    job = GenerationJob(
+        id=str(uuid.uuid4()), status=JobStatus.PENDING, progress=0,
+        config=GENERATION_CONFIG, createdAt=datetime.utcnow()
+    )
+    get_job_store().put_generation_job(job)
+    return job
+
+
+def pending_training_job() -> TrainingJob:
+    job = TrainingJob(
+        id=str(uuid.uuid4()), status=JobStatus.PENDING, progress=0,
+        datasetId="latest", weights=WEIGHTS, createdAt=datetime.utcnow()
+    )
+    get_job_store().put_training_job(job)
+    return job
+
+
+def cancel_in_store(job):
+    """What a cancel from another process leaves in the store while the worker runs"""
+    store = get_job_store()
+    cancelled = job.model_copy(update={"status": JobStatus.CANCELLED, "completedAt": datetime.utcnow()})
+    if isinstance(job, GenerationJob):
+        store.put_generation_job(cancelled)
+    else:
+        store.put_training_job(cancelled)
+
+
+def test_conditional_writes_leave_settled_jobs_alone():
+    store = get_job_store()
+    job = pending_generation_job()
+    assert store.put_generation_job(job.model_copy(update={"status": JobStatus.RUNNING}), if_unfinished=True)
+    cancel_in_store(job)
+
+    assert not store.put_generation_job(job.model_copy(update={"status": JobStatus.RUNNING}), if_unfinished=True)
+    assert store.get_generation_job(job.id).status == JobStatus.CANCELLED
+
+
+def test_conditional_writes_insert_new_jobs():
+    store = get_job_store()
+    job = GenerationJob(
+        id=str(uuid.uuid4()), status=JobStatus.PENDING, progress=0,
+        config=GENERATION_CONFIG, createdAt=datetime.utcnow()
+    )
+    assert store.put_generation_job(job, if_unfinished=True)
+    assert store.get_generation_job(job.id).status == JobStatus.PENDING
+
+
+def test_generation_worker_stops_at_its_next_report_after_a_cancel(monkeypatch):
+    import services.mostly_service as mostly_service
+
+    job = pending_generation_job()
+    reached = []
+
+    def run_generation(dataset_id, config, api_key, base_url, progress=None):
+        cancel_in_store(job)
+        progress.value = 50
+        reached.append(dataset_id)
+        raise AssertionError("the worker kept going")
+
+    monkeypatch.setattr(mostly_service, "run_generation", run_generation)
+    get_mostly_service().execute_generation(job.id)
+
+    assert reached == []
+    settled = get_job_store().get_generation_job(job.id)
+    assert settled.status == JobStatus.CANCELLED
+    assert settled.progress != 50
+
+
+def test_generation_completing_after_a_cancel_keeps_it_cancelled(monkeypatch):
+    import services.mostly_service as mostly_service
+
+    job = pending_generation_job()
+    written = []
+
+    def run_generation(dataset_id, config, api_key, base_url, progress=None):
+        cancel_in_store(job)
+        written.append(dataset_id)
+        return {
+            "recordCount": 3, "sourceHash": "hash", "columns": ["a"], "cacheHit": False, "externalCalls": {},
+            "privacyMetrics": {"kAnonymity": 1, "lDiversity": 1, "tCloseness": 0.0},
+        }
+
+    monkeypatch.setattr(mostly_service, "run_generation", run_generation)
+    get_mostly_service().execute_generation(job.id)
+
+    store = get_job_store()
+    assert store.get_generation_job(job.id).status == JobStatus.CANCELLED
+    assert store.get_dataset(written[0]) is None
+    assert store.get_dataset_by_job(job.id) is None
+
+
+def test_training_completing_after_a_cancel_keeps_the_latest_weights(monkeypatch):
+    import services.training_service as training_service
+
+    store = get_job_store()
+    latest = WeightVector(cost=0.4, time=0.3, reliability=0.2, risk=0.1)
+    store.put_weight_matrix("latest", latest)
+    job = pending_training_job()
+
+    def fit_weights(df, weights, max_iterations, model_type, progress=None):
+        cancel_in_store(job)
+        return {"weights": [0.25, 0.25, 0.25, 0.25], "iterations": 1, "accuracy": 0.9}
+
+    monkeypatch.setattr(training_service, "fit_weights", fit_weights)
+    monkeypatch.setattr(training_service.TrainingService, "_load_training_data", lambda self, dataset_id: None)
+    get_training_service().execute_training(job.id)
+
+    assert store.get_training_job(job.id).status == JobStatus.CANCELLED
+    assert store.get_weight_matrix("latest") == latest
+    assert store.get_weight_matrix(f"trained_{job.id}") is None
+
+
+@pytest.mark.parametrize("status", [JobStatus.COMPLETED, JobStatus.CANCELLED])
+def test_cancelling_a_job_that_settled_meanwhile_returns_it_unchanged(monkeypatch, status):
+    import asyncio
+
+    store = get_job_store()
+    job = pending_training_job()
+    service = get_training_service()
+    # The job settles between the cancel's read and its write
+    settled = job.model_copy(update={"status": status})
+    reads = iter([job])
+    monkeypatch.setattr(store, "get_training_job", lambda job_id: next(reads, settled))
+    store.put_training_job(settled)
+
+    assert asyncio.run(service.cancel_job(job.id)).status == status
@@ -0,0 +1,73 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from models.schemas import GenerationJob, JobStatus, SyntheticDataConfig, TrainingJob, WeightVector
+from services.job_store import SQLJobStore
+from services.job_supervisor import PROCESS_DEAD_AFTER_SECONDS, PROCESS_ID, recover_orphaned_jobs
+
+CONFIG = SyntheticDataConfig(baseDatasetSize=500, syntheticRatio=2.0, privacyLevel="medium", scenarioType="historical")
+WEIGHTS = WeightVector(cost=0.3, time=0.3, reliability=0.25, risk=0.15)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLJobStore(f"sqlite:///{tmp_path / 'jobs.db'}")
+
+
+def generation_job(store, owner=None, status=JobStatus.PENDING) -> str:
+    job_id = str(uuid.uuid4())
+    if owner is not None:
+        store.set_job_owner("generation", job_id, owner)
+    store.put_generation_job(GenerationJob(id=job_id, status=status, progress=0, config=CONFIG, createdAt=datetime.utcnow()))
+    return job_id
+
+
+def training_job(store, owner=None) -> str:
+    job_id = str(uuid.uuid4())
+    if owner is not None:
+        store.set_job_owner("training", job_id, owner)
+    store.put_training_job(TrainingJob(
+        id=job_id, status=JobStatus.RUNNING, progress=50, datasetId="latest", weights=WEIGHTS, createdAt=datetime.utcnow()
+    ))
+    return job_id
+
+
+def test_only_jobs_of_dead_processes_are_failed(store):
+    now = datetime.utcnow()
+    store.touch_process("live-worker", now)
+    store.touch_process("dead-worker", now - timedelta(hours=1))
+    live = [generation_job(store, "live-worker"), training_job(store, "live-worker")]
+    orphaned = [generation_job(store, "dead-worker"), training_job(store, "dead-worker"), generation_job(store)]
+    settled = generation_job(store, "dead-worker", JobStatus.COMPLETED)
+
+    assert store.fail_orphaned_jobs("Interrupted by server restart", now - timedelta(minutes=1)) == 3
+
+    assert store.get_generation_job(live[0]).status == JobStatus.PENDING
+    assert store.get_training_job(live[1]).status == JobStatus.RUNNING
+    for job in (store.get_generation_job(orphaned[0]), store.get_training_job(orphaned[1]), store.get_generation_job(orphaned[2])):
+        assert job.status == JobStatus.FAILED
+        assert job.error == "Interrupted by server restart"
+        assert job.completedAt is not None
+    assert store.get_generation_job(settled).status == JobStatus.COMPLETED
+
+
+def test_a_starting_worker_leaves_running_workers_jobs_alone(store):
+    # A rolling restart: the old worker is still serving when the new one starts
+    old_worker = str(uuid.uuid4())
+    store.touch_process(old_worker, datetime.utcnow())
+    running = generation_job(store, old_worker, JobStatus.RUNNING)
+    store.touch_process(PROCESS_ID, datetime.utcnow())
+
+    assert recover_orphaned_jobs(store) == 0
+    assert store.get_generation_job(running).status == JobStatus.RUNNING
+
+
+def test_jobs_are_recovered_once_their_worker_stops_reporting(store):
+    crashed = str(uuid.uuid4())
+    store.touch_process(crashed, datetime.utcnow() - timedelta(seconds=PROCESS_DEAD_AFTER_SECONDS + 1))
+    running = generation_job(store, crashed, JobStatus.RUNNING)
+
+    assert recover_orphaned_jobs(store) == 1
+    assert store.get_generation_job(running).status == JobStatus.FAILED
+    # Nothing is left to recover a second time
+    assert recover_orphaned_jobs(store) == 0
@@ -0,0 +1,35 @@
+from datetime import datetime
+from models.schemas import TrainingJob, JobStatus, WeightVector
+from services.job_stats import JobStats
+
+WEIGHTS = WeightVector(cost=0.25, time=0.25, reliability=0.25, risk=0.25)
+
+
+def training_job(job_id: str) -> TrainingJob:
+    return TrainingJob(
+        id=job_id, status=JobStatus.PENDING, progress=0, datasetId="latest",
+        weights=WEIGHTS, createdAt=datetime.utcnow()
+    )
+
+
+def finish(stats: JobStats, job: TrainingJob, status: JobStatus) -> TrainingJob:
+    finished = job.model_copy(update={"status": status, "completedAt": datetime.utcnow()})
+    stats.record(job, finished)
+    return finished
+
+
+def test_cancelled_jobs_are_counted_and_no_longer_active():
+    stats = JobStats()
+    jobs = [training_job(str(i)) for i in range(4)]
+    for job in jobs:
+        stats.record(None, job)
+    finish(stats, jobs[0], JobStatus.COMPLETED)
+    finish(stats, jobs[1], JobStatus.FAILED)
+    cancelled = finish(stats, jobs[2], JobStatus.CANCELLED)
+    # A repeated cancel publishes no status change and must not count twice
+    stats.record(cancelled, cancelled)
+
+    counts = stats.totals.as_dict()
+    assert counts["cancelledJobs"] == 1
+    assert counts["activeJobs"] == 1
+    assert stats.snapshot()["rates"]["lastHour"]["cancelledPerHour"] == 1
@@ -0,0 +1,101 @@
+import pytest
+from datetime import datetime, timedelta
+from models.schemas import (
+    DatasetMetadata, GenerationJob, JobStatus, PrivacyMetrics, SyntheticDataConfig, SyntheticDataset,
+    TrainingJob, WeightVector
+)
+from services.job_store import SQLJobStore
+
+CONFIG = SyntheticDataConfig(baseDatasetSize=500, syntheticRatio=2.0, privacyLevel="medium", scenarioType="historical")
+WEIGHTS = WeightVector(cost=0.3, time=0.3, reliability=0.25, risk=0.15)
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLJobStore(f"sqlite:///{tmp_path / 'jobs.db'}")
+
+
+def generation_job(i: int, status: JobStatus = JobStatus.COMPLETED) -> GenerationJob:
+    return GenerationJob(id=f"job-{i}", status=status, progress=0, config=CONFIG, createdAt=START + timedelta(minutes=i))
+
+
+def dataset(i: int, job_id: str) -> SyntheticDataset:
+    metadata = DatasetMetadata(
+        generatedAt=START + timedelta(minutes=i), recordCount=10, sourceHash="hash", scenario="historical",
+        privacyMetrics=PrivacyMetrics(kAnonymity=5, lDiversity=2, tCloseness=0.1)
+    )
+    return SyntheticDataset(id=f"dataset-{i}", jobId=job_id, metadata=metadata)
+
+
+def test_jobs_page_in_creation_order_whatever_the_insert_order(store):
+    for i in (3, 0, 4, 1, 2):
+        store.put_generation_job(generation_job(i))
+
+    assert [job.id for job in store.list_generation_jobs()] == [f"job-{i}" for i in range(5)]
+    assert [job.id for job in store.list_generation_jobs(limit=2, offset=1)] == ["job-1", "job-2"]
+    assert store.list_generation_jobs(limit=2, offset=5) == []
+
+
+def test_status_filters_and_counts_see_the_latest_write(store):
+    for i in range(4):
+        store.put_generation_job(generation_job(i, JobStatus.PENDING))
+    store.put_generation_job(generation_job(1, JobStatus.RUNNING))
+
+    assert [job.id for job in store.list_generation_jobs(status=JobStatus.PENDING)] == ["job-0", "job-2", "job-3"]
+    assert store.count_generation_jobs(JobStatus.PENDING) == 3
+    # Queue position: pending jobs created before job-3
+    assert store.count_generation_jobs(JobStatus.PENDING, created_before=START + timedelta(minutes=3)) == 2
+
+
+def test_training_jobs_page_by_status(store):
+    for i in range(6):
+        status = JobStatus.COMPLETED if i % 2 else JobStatus.FAILED
+        store.put_training_job(TrainingJob(
+            id=f"training-{i}", status=status, progress=100, datasetId="latest", weights=WEIGHTS,
+            createdAt=START + timedelta(minutes=i)
+        ))
+
+    completed = store.list_training_jobs(status=JobStatus.COMPLETED, limit=2, offset=1)
+    assert [job.id for job in completed] == ["training-3", "training-5"]
+
+
+def test_datasets_are_found_by_id_job_and_age(store):
+    for i in range(3):
+        store.put_dataset(dataset(i, f"job-{i}"))
+
+    assert store.get_dataset("dataset-1").jobId == "job-1"
+    assert store.get_dataset_by_job("job-2").id == "dataset-2"
+    assert store.get_latest_dataset().id == "dataset-2"
+    assert [d.id for d in store.list_datasets(limit=2)] == ["dataset-0", "dataset-1"]
+
+    assert store.delete_dataset("dataset-2")
+    assert not store.delete_dataset("dataset-2")
+    assert store.get_latest_dataset().id == "dataset-1"
+
+
+def test_pooled_datasets_stay_unlisted_until_taken(store):
+    store.put_dataset(dataset(0, "job-0"))
+    store.put_dataset(dataset(1, "pooled-job"))
+    store.add_scenario_pool_entry("peak_season", "pooled-job", "version")
+
+    assert [d.id for d in store.list_datasets()] == ["dataset-0"]
+    assert store.get_latest_dataset().id == "dataset-0"
+    assert store.take_scenario_pool_entry("pooled-job")
+    assert store.get_latest_dataset().id == "dataset-1"
+
+
+def test_weight_matrices_are_replaced_in_place(store):
+    store.put_weight_matrix("latest", WEIGHTS)
+    updated = WEIGHTS.model_copy(update={"cost": 0.5})
+    store.put_weight_matrix("latest", updated)
+
+    assert store.get_weight_matrix("latest") == updated
+    assert store.get_weight_matrix("missing") is None
+    assert store.count_weight_matrices() == 1
+
+
+def test_jobs_survive_a_new_store_on_the_same_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    SQLJobStore(url).put_generation_job(generation_job(0))
+    assert SQLJobStore(url).get_generation_job("job-0") == generation_job(0)
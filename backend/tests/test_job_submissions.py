@@ -0,0 +1,161 @@
+import uuid
+import asyncio
+import pytest
+from datetime import datetime
+from models.schemas import JobStatus, TrainingJob, TrainingJobRequest, WeightVector
+from services.dependencies import get_job_store, get_training_service
+from services.job_submissions import IdempotencyKeyReused, SubmissionInProgress, claim_job, claim_or_find_job
+
+WEIGHTS = WeightVector(cost=0.3, time=0.3, reliability=0.25, risk=0.15)
+
+
+def unique_request() -> TrainingJobRequest:
+    """A request no other test submits, so claims never collide across tests"""
+    return TrainingJobRequest(datasetId=f"dataset-{uuid.uuid4()}", weights=WEIGHTS)
+
+
+def stored_job(request: TrainingJobRequest, job_id: str, status: JobStatus = JobStatus.PENDING) -> TrainingJob:
+    job = TrainingJob(
+        id=job_id, status=status, progress=0, datasetId=request.datasetId,
+        weights=request.weights, modelType=request.modelType, createdAt=datetime.utcnow()
+    )
+    get_job_store().put_training_job(job)
+    return job
+
+
+def test_first_claim_wins_and_duplicates_find_it():
+    store = get_job_store()
+    request = unique_request()
+    assert claim_job(store, "training", request, "first") is None
+    assert claim_job(store, "training", request, "second") == "first"
+    assert claim_job(store, "training", request.model_copy(), "third", f"key-{uuid.uuid4()}") == "first"
+
+
+def test_reusing_a_key_for_another_request_is_rejected():
+    store = get_job_store()
+    key = f"key-{uuid.uuid4()}"
+    assert claim_job(store, "training", unique_request(), "first", key) is None
+    with pytest.raises(IdempotencyKeyReused):
+        claim_job(store, "training", unique_request(), "second", key)
+
+
+def test_settled_jobs_release_their_request_but_not_their_key():
+    store = get_job_store()
+    request = unique_request()
+    key = f"key-{uuid.uuid4()}"
+    assert claim_job(store, "training", request, "keyed", key) is None
+    stored_job(request, "keyed", JobStatus.COMPLETED)
+
+    assert claim_job(store, "training", request, "again", f"other-{key}") is None
+    assert claim_job(store, "training", request, "retry", key) == "keyed"
+
+
+def test_a_key_sent_with_a_duplicate_outlives_the_duplicated_job():
+    store = get_job_store()
+    service = get_training_service()
+    request = unique_request()
+    key = f"key-{uuid.uuid4()}"
+    holder_id = str(uuid.uuid4())
+    assert claim_job(store, "training", request, holder_id) is None
+    holder = stored_job(request, holder_id)
+
+    # The duplicate carries a key; the active job is returned and the key now points at it
+    assert asyncio.run(service.start_training(request, key)).id == holder.id
+    stored_job(request, holder.id, JobStatus.COMPLETED)
+
+    # Once the job settles its request claim lapses; the retry still finds the job through its key
+    assert asyncio.run(service.start_training(request, key)).id == holder.id
+
+
+def test_a_duplicate_in_the_claim_window_waits_for_the_holders_job():
+    store = get_job_store()
+    service = get_training_service()
+    request = unique_request()
+    holder_id = str(uuid.uuid4())
+    # The holder has claimed the request but not yet stored its job
+    assert claim_job(store, "training", request, holder_id) is None
+
+    async def run():
+        duplicate = asyncio.create_task(service.start_training(request))
+        await asyncio.sleep(0.2)
+        assert not duplicate.done()
+        stored_job(request, holder_id)
+        return await duplicate
+
+    assert asyncio.run(run()).id == holder_id
+    assert [job.id for job in store.list_training_jobs() if job.datasetId == request.datasetId] == [holder_id]
+
+
+def test_a_duplicate_never_submits_without_the_claim(monkeypatch):
+    import services.job_submissions as job_submissions
+
+    store = get_job_store()
+    request = unique_request()
+    assert claim_job(store, "training", request, "slow-holder") is None
+    monkeypatch.setattr(job_submissions, "CLAIM_WAIT_SECONDS", 0.2)
+
+    async def find_job(job_id):
+        return None
+
+    with pytest.raises(SubmissionInProgress):
+        asyncio.run(claim_or_find_job(store, "training", request, "duplicate", None, find_job))
+    assert store.get_training_job("duplicate") is None
+
+
+def test_a_duplicate_takes_over_a_claim_its_holder_released():
+    store = get_job_store()
+    request = unique_request()
+    assert claim_job(store, "training", request, "failed-holder") is None
+
+    async def find_job(job_id):
+        # The holder could not create its job and let its claim go
+        store.release_submissions(job_id)
+        return None
+
+    assert asyncio.run(claim_or_find_job(store, "training", request, "duplicate", None, find_job)) is None
+    assert claim_job(store, "training", request, "later") == "duplicate"
+
+
+def test_duplicate_submissions_in_the_claim_window_get_a_retryable_409(monkeypatch):
+    import main
+    import services.job_submissions as job_submissions
+    from fastapi.testclient import TestClient
+
+    request = unique_request()
+    assert claim_job(get_job_store(), "training", request, str(uuid.uuid4())) is None
+    monkeypatch.setattr(job_submissions, "CLAIM_WAIT_SECONDS", 0.1)
+
+    response = TestClient(main.app).post("/api/training/start", json=request.model_dump())
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_concurrent_claims_elect_exactly_one_holder():
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = get_job_store()
+    request = unique_request()
+    key = f"key-{uuid.uuid4()}"
+    job_ids = [f"racer-{i}" for i in range(8)]
+    with ThreadPoolExecutor(len(job_ids)) as pool:
+        results = list(pool.map(lambda job_id: claim_job(store, "training", request, job_id, key), job_ids))
+
+    winners = [job_id for job_id, holder in zip(job_ids, results) if holder is None]
+    assert len(winners) == 1
+    assert set(results) == {None, winners[0]}
+
+
+def test_concurrent_duplicate_submissions_share_one_job(monkeypatch):
+    from services.tasks import train_weights
+
+    service = get_training_service()
+    request = unique_request()
+    # Left queued, the job stays active for as long as the duplicates look for it
+    monkeypatch.setattr(train_weights, "apply_async", lambda *args, **kwargs: None)
+
+    async def run():
+        return await asyncio.gather(*(service.start_training(request) for _ in range(5)))
+
+    jobs = asyncio.run(run())
+    assert len({job.id for job in jobs}) == 1
+    assert [job.id for job in get_job_store().list_training_jobs() if job.datasetId == request.datasetId] == [jobs[0].id]
@@ -0,0 +1,116 @@
+import time
+import asyncio
+import multiprocessing
+import pytest
+from services.job_supervisor import JobMemoryExceeded, JobSupervisor, JobTimedOut, MemoryWatchdog
+from services.workers import job_processes
+
+FORK_SECONDS = 0.5
+
+
+def children() -> set:
+    return set(multiprocessing.active_children())
+
+
+def supervisor(timeout_seconds: float = 0) -> JobSupervisor:
+    return JobSupervisor("generation", store=None, max_workers=1, timeout_seconds=timeout_seconds)
+
+
+def test_cancelling_during_the_start_stops_the_child(monkeypatch):
+    start = job_processes.Process.start
+
+    def slow_start(process):
+        time.sleep(FORK_SECONDS)
+        start(process)
+
+    monkeypatch.setattr(job_processes.Process, "start", slow_start)
+    jobs = supervisor()
+    before = children()
+
+    async def run():
+        task = asyncio.create_task(jobs.run_process(time.sleep, 60))
+        await asyncio.sleep(FORK_SECONDS / 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert children() <= before
+    assert not jobs._processes
+
+
+def test_jobs_past_their_deadline_are_stopped():
+    jobs = supervisor(timeout_seconds=0.5)
+    before = children()
+
+    with pytest.raises(JobTimedOut):
+        asyncio.run(jobs.run_process(time.sleep, 60))
+    assert children() <= before
+
+
+def count_to(n: int, progress=None) -> int:
+    for i in range(1, n + 1):
+        progress.value = i
+    return n
+
+
+def test_job_processes_are_not_forks_of_the_api_process():
+    assert job_processes.get_start_method() in ("forkserver", "spawn")
+
+
+def test_progress_comes_back_through_the_shared_manager():
+    from services.workers import shared_manager
+
+    progress = shared_manager().Value("i", 0)
+    assert asyncio.run(supervisor().run_process(count_to, 5, progress=progress)) == 5
+    assert progress.value == 5
+
+
+def test_results_come_back_from_the_child():
+    assert asyncio.run(supervisor().run_process(sum, [1, 2, 3])) == 6
+
+
+def test_watchdog_stops_a_job_past_its_memory_limit():
+    started = time.monotonic()
+    # Any Python process is past 1MB
+    with pytest.raises(JobMemoryExceeded, match="memory limit"):
+        with MemoryWatchdog(limit_mb=1, interval=0.05) as watchdog:
+            while time.monotonic() - started < 10:
+                time.sleep(0.01)
+    assert watchdog.exceeded
+    assert time.monotonic() - started < 5
+
+
+def test_watchdog_leaves_jobs_within_the_limit_alone():
+    with MemoryWatchdog(limit_mb=1024 * 1024, interval=0.01) as watchdog:
+        time.sleep(0.1)
+    assert not watchdog.exceeded
+    # Nothing is raised once the block has been left
+    time.sleep(0.1)
+
+
+def test_celery_tasks_fail_jobs_past_the_memory_limit(monkeypatch):
+    import services.tasks as tasks
+    import services.training_service as training_service
+    from datetime import datetime
+    from models.schemas import JobStatus, TrainingJob, WeightVector
+    from services.dependencies import get_job_store
+
+    def fit_weights(df, weights, max_iterations, model_type, progress=None):
+        while True:
+            time.sleep(0.01)
+
+    monkeypatch.setattr(tasks, "MemoryWatchdog", lambda: MemoryWatchdog(limit_mb=1, interval=0.05))
+    monkeypatch.setattr(training_service, "fit_weights", fit_weights)
+    monkeypatch.setattr(training_service.TrainingService, "_load_training_data", lambda self, dataset_id: None)
+    job = TrainingJob(
+        id="memory-hungry", status=JobStatus.PENDING, progress=0, datasetId="latest",
+        weights=WeightVector(cost=0.25, time=0.25, reliability=0.25, risk=0.25), createdAt=datetime.utcnow()
+    )
+    get_job_store().put_training_job(job)
+
+    tasks.train_weights("memory-hungry")
+
+    failed = get_job_store().get_training_job("memory-hungry")
+    assert failed.status == JobStatus.FAILED
+    assert "memory limit" in failed.error
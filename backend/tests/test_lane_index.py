@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.lane_index import build_lane_index, haversine_km, plausible_coordinates
+
+NAIROBI = (-1.29, 36.82)
+KAMPALA = (0.35, 32.58)
+
+
+def shipments(origin, destination, destination_country="Uganda"):
+    return pd.DataFrame([{
+        "origin_country": "Kenya", "destination_country": destination_country, "carrier": "DHL",
+        "origin_latitude": str(origin[0]), "origin_longitude": str(origin[1]),
+        "destination_latitude": str(destination[0]), "destination_longitude": str(destination[1]),
+        "weight_kg": "100", "carrier_cost": "500",
+    }])
+
+
+def test_haversine_matches_a_known_distance():
+    # Nairobi to Kampala is about 500 km
+    assert haversine_km(*NAIROBI, *KAMPALA) == pytest.approx(503, abs=5)
+
+
+def test_coordinates_inside_their_country_are_kept():
+    lane = build_lane_index(shipments(NAIROBI, KAMPALA)).lookup("kenya", "uganda", "dhl")
+    assert lane["distanceKm"] == pytest.approx(haversine_km(*NAIROBI, *KAMPALA))
+
+
+def test_transposed_coordinates_are_swapped_back():
+    lane = build_lane_index(shipments(NAIROBI[::-1], KAMPALA[::-1])).lookup("kenya", "uganda", "dhl")
+    assert lane["distanceKm"] == pytest.approx(haversine_km(*NAIROBI, *KAMPALA))
+
+
+def test_coordinates_outside_their_country_have_no_distance():
+    # This "Kenya" origin lies in Portugal as recorded and off Tanzania when swapped
+    lane = build_lane_index(shipments((36.99, -8.76), KAMPALA)).lookup("kenya", "uganda", "dhl")
+    assert lane["distanceKm"] is None
+    assert lane["shipments"] == 1
+
+
+def test_countries_without_bounds_only_need_valid_degrees():
+    lat, lon = plausible_coordinates(pd.Series(["Atlantis", "Atlantis"]), np.array([10.0, 95.0]), np.array([20.0, 20.0]))
+    assert lat[0] == 10.0 and lon[0] == 20.0
+    assert np.isnan(lat[1]) and np.isnan(lon[1])
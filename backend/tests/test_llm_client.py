@@ -0,0 +1,132 @@
+import json
+import asyncio
+import pytest
+import services.llm_client as llm_client
+from models.schemas import GroqOptimizationRequest, GroqScenarioRequest, WeightVector
+from services.groq_service import GroqService
+from services.llm_client import LLMClient, StubBackend
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+WEIGHTS = {"cost": 0.4, "time": 0.3, "reliability": 0.2, "risk": 0.1}
+CURRENT = WeightVector(cost=0.25, time=0.25, reliability=0.25, risk=0.25)
+
+
+class Clock:
+    """Stands in for time.monotonic so TTLs expire without sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(llm_client.time, "monotonic", clock)
+    return clock
+
+
+def optimization_request() -> GroqOptimizationRequest:
+    return GroqOptimizationRequest(currentWeights=CURRENT, historicalData=[{"cost": 1200}])
+
+
+def test_identical_requests_hit_the_cache(clock):
+    backend = StubBackend(lambda model, messages: "answer")
+    client = LLMClient(backend, ttl_seconds=60)
+
+    async def run():
+        return [await client.complete("m", MESSAGES) for _ in range(3)]
+
+    assert asyncio.run(run()) == ["answer"] * 3
+    assert backend.calls == 1
+    assert (client.hits, client.misses) == (2, 1)
+
+
+def test_concurrent_identical_requests_share_one_call(clock):
+    backend = StubBackend(lambda model, messages: "answer")
+    client = LLMClient(backend, ttl_seconds=60)
+
+    async def run():
+        return await asyncio.gather(*(client.complete("m", MESSAGES) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert backend.calls == 1
+    assert client.coalesced == 4
+
+
+def test_cached_completions_expire_after_the_ttl(clock):
+    backend = StubBackend(lambda model, messages: f"answer {backend.calls}")
+    client = LLMClient(backend, ttl_seconds=60)
+
+    async def run():
+        first = await client.complete("m", MESSAGES)
+        clock.now += 59
+        cached = await client.complete("m", MESSAGES)
+        clock.now += 2
+        refreshed = await client.complete("m", MESSAGES)
+        return first, cached, refreshed
+
+    assert asyncio.run(run()) == ("answer 1", "answer 1", "answer 2")
+    assert backend.calls == 2
+
+
+def test_completions_the_parser_rejects_are_not_cached(clock):
+    backend = StubBackend(lambda model, messages: "not json")
+    client = LLMClient(backend, ttl_seconds=60)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(json.JSONDecodeError):
+                await client.complete("m", MESSAGES, parse=json.loads)
+
+    asyncio.run(run())
+    assert backend.calls == 2
+    assert client.stats()["cacheEntries"] == 0
+
+
+def test_optimize_weights_parses_and_caches_a_valid_completion(clock):
+    backend = StubBackend(lambda model, messages: "```json\n" + json.dumps(WEIGHTS) + "\n```")
+    service = GroqService(LLMClient(backend))
+
+    async def run():
+        return [await service.optimize_weights(optimization_request()) for _ in range(2)]
+
+    assert asyncio.run(run()) == [WeightVector(**WEIGHTS)] * 2
+    assert backend.calls == 1
+
+
+def test_optimize_weights_falls_back_without_caching_an_unusable_completion(clock):
+    backend = StubBackend(lambda model, messages: "I would weight cost highest.")
+    service = GroqService(LLMClient(backend))
+
+    async def run():
+        return [await service.optimize_weights(optimization_request()) for _ in range(2)]
+
+    assert asyncio.run(run()) == [CURRENT] * 2
+    assert backend.calls == 2
+
+
+def test_backend_failures_fall_back_and_are_retried(clock):
+    def fail(model, messages):
+        raise ConnectionError("Groq is unreachable")
+
+    backend = StubBackend(fail)
+    service = GroqService(LLMClient(backend))
+
+    async def run():
+        return [await service.generate_scenario(GroqScenarioRequest(baseScenario="port strike")) for _ in range(2)]
+
+    scenarios = asyncio.run(run())
+    assert [scenario["name"] for scenario in scenarios] == ["Default Stress Test"] * 2
+    assert backend.calls == 2
+
+
+def test_generate_scenario_rejects_a_non_object_completion(clock):
+    backend = StubBackend(lambda model, messages: "[1, 2, 3]")
+    service = GroqService(LLMClient(backend))
+
+    scenario = asyncio.run(service.generate_scenario(GroqScenarioRequest(baseScenario="port strike")))
+    assert scenario["name"] == "Default Stress Test"
+    assert service.llm.stats()["cacheEntries"] == 0
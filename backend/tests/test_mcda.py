@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from services.mcda import ahp_weights, rank_order, topsis_scores
+
+# Three forwarders on one lane: (cost, time, reliability, risk)
+MATRIX = np.array([[250, 16, 0.90, 0.2], [200, 20, 0.80, 0.3], [300, 12, 0.95, 0.1]])
+WEIGHTS = np.array([0.4, 0.3, 0.2, 0.1])
+
+# Saaty's textbook three-criterion judgments
+SAATY = np.array([[1, 3, 5], [1 / 3, 1, 3], [1 / 5, 1 / 3, 1]])
+
+
+def test_topsis_matches_the_hand_computed_closeness():
+    np.testing.assert_allclose(topsis_scores(MATRIX, WEIGHTS), [0.503393, 0.471537, 0.528464], atol=1e-6)
+
+
+def test_topsis_scores_lanes_in_one_batch_with_padding():
+    padded = np.full((2, 3, 4), np.nan)
+    padded[0] = MATRIX
+    padded[1, :2] = MATRIX[:2]
+    scores = topsis_scores(padded, WEIGHTS)
+
+    np.testing.assert_allclose(scores[0], topsis_scores(MATRIX, WEIGHTS))
+    np.testing.assert_allclose(scores[1, :2], topsis_scores(MATRIX[:2], WEIGHTS))
+    assert np.isnan(scores[1, 2])
+    order, ranks = rank_order(scores)
+    assert order[0].tolist() == [2, 0, 1] and ranks[0].tolist() == [2, 3, 1]
+    assert order[1, -1] == 2
+
+
+def test_identical_alternatives_tie():
+    assert topsis_scores(np.ones((3, 4)), WEIGHTS).tolist() == [1.0, 1.0, 1.0]
+
+
+def test_ahp_weights_of_a_consistent_matrix_are_exact():
+    weights, consistency = ahp_weights(np.array([[1, 2, 4], [1 / 2, 1, 2], [1 / 4, 1 / 2, 1]]))
+    np.testing.assert_allclose(weights, [4 / 7, 2 / 7, 1 / 7])
+    assert consistency.lambdaMax == pytest.approx(3.0)
+    assert consistency.consistencyRatio == pytest.approx(0.0, abs=1e-9)
+    assert consistency.isConsistent
+
+
+def test_ahp_matches_saatys_example():
+    weights, consistency = ahp_weights(SAATY)
+    np.testing.assert_allclose(weights, [0.6370, 0.2583, 0.1047], atol=1e-4)
+    assert consistency.lambdaMax == pytest.approx(3.0385, abs=1e-4)
+    assert consistency.consistencyRatio == pytest.approx(0.0332, abs=1e-4)
+    assert consistency.isConsistent
+
+
+def test_cyclic_judgments_are_inconsistent():
+    _, consistency = ahp_weights(np.array([[1, 9, 1 / 9], [1 / 9, 1, 9], [9, 1 / 9, 1]]))
+    assert consistency.consistencyRatio > 0.1
+    assert not consistency.isConsistent
+
+
+@pytest.mark.parametrize("pairwise", [[[1, 2], [2, 1]], [[1, -1], [-1, 1]], [[1, 2, 3]]])
+def test_invalid_judgments_are_rejected(pairwise):
+    with pytest.raises(ValueError):
+        ahp_weights(np.array(pairwise, dtype=float))
+
+
+def test_rank_endpoint_uses_ahp_weights():
+    import main
+
+    alternatives = [
+        {"id": f"forwarder-{i}", **dict(zip(("cost", "time", "reliability", "risk"), row))}
+        for i, row in enumerate(MATRIX.tolist())
+    ]
+    # Cost dominates every other criterion
+    pairwise = [[1, 9, 9, 9], [1 / 9, 1, 1, 1], [1 / 9, 1, 1, 1], [1 / 9, 1, 1, 1]]
+    response = TestClient(main.app).post("/api/rank", json={
+        "lanes": [{"laneId": "lane", "alternatives": alternatives}], "pairwiseMatrix": pairwise
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["weights"]["cost"] == pytest.approx(0.75)
+    assert body["consistency"]["isConsistent"]
+    assert body["lanes"][0]["bestAlternative"] == "forwarder-1"
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Optional
+from fastapi.testclient import TestClient
+from services.metrics import LoopLagMonitor, MetricsRegistry, registry
+
+
+def sample(name: str, text: Optional[str] = None) -> float:
+    """Value of one exposition line, 0 when the series does not exist yet"""
+    text = registry.render() if text is None else text
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histograms_render_cumulative_buckets():
+    local = MetricsRegistry()
+    histogram = local.histogram("job_seconds", "Job duration", ("kind",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, kind="training")
+
+    assert local.render().splitlines() == [
+        "# HELP job_seconds Job duration",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{kind="training",le="0.1"} 2',
+        'job_seconds_bucket{kind="training",le="1"} 3',
+        'job_seconds_bucket{kind="training",le="+Inf"} 4',
+        'job_seconds_sum{kind="training"} 2.65',
+        'job_seconds_count{kind="training"} 4',
+    ]
+
+
+def test_counters_and_gauges_escape_label_values():
+    local = MetricsRegistry()
+    counter = local.counter("calls_total", "Calls", ("name",))
+    gauge = local.gauge("in_flight", "In flight")
+    counter.inc(name='say "hi"\n')
+    counter.inc(2, name='say "hi"\n')
+    gauge.inc()
+    gauge.dec(3)
+
+    text = local.render()
+    assert sample('calls_total{name="say \\"hi\\"\\n"}', text) == 3
+    assert sample("in_flight", text) == -2
+
+
+def test_requests_are_labelled_by_route_template():
+    import main
+
+    client = TestClient(main.app)
+    series = 'http_requests_total{method="GET",route="/api/synthetic/jobs/{job_id}",status="404"}'
+    unmatched = 'http_requests_total{method="GET",route="unmatched",status="404"}'
+    before, before_unmatched = sample(series), sample(unmatched)
+
+    client.get("/api/synthetic/jobs/first-missing-job")
+    client.get("/api/synthetic/jobs/second-missing-job")
+    client.get("/not/a/route")
+
+    assert sample(series) == before + 2
+    assert sample(unmatched) == before_unmatched + 1
+    assert "first-missing-job" not in registry.render()
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/synthetic/jobs/{job_id}"}' in response.text
+
+
+def test_a_blocked_loop_is_counted():
+    series = 'event_loop_blocked_total{route="none"}'
+    before = sample(series)
+
+    async def run():
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.2)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+    asyncio.run(run())
+    assert sample(series) == before + 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from services.mcda import batch_scores
+from services.neutrosophic import (
+    accuracy_function, crisp_to_neutrosophic, decision_gaps, neutrosophic_gaps, score_function, weighted_aggregate
+)
+
+WEIGHTS = np.array([0.4, 0.3, 0.2, 0.1])
+# (cost, time, reliability, risk); cost and risk are better low, reliability high
+LANE = np.array([[100.0, 10.0, 0.9, 0.2], [200.0, 20.0, 0.7, 0.4], [150.0, 15.0, 0.8, 0.3]])
+
+
+def closeness(gaps, weights=WEIGHTS):
+    return batch_scores(gaps, weights[np.newaxis, :])[0]
+
+
+def test_truth_is_the_oriented_min_max_position():
+    tif = crisp_to_neutrosophic(LANE)
+    # The first alternative is best on every criterion, the second worst
+    np.testing.assert_allclose(tif[..., 0], [[1, 1, 1, 1], [0, 0, 0, 0], [0.5, 0.5, 0.5, 0.5]])
+    np.testing.assert_allclose(tif[..., 2], 1 - tif[..., 0])
+    assert (tif[..., 1] == 0).all()
+
+
+def test_indeterminacy_is_clipped_and_padding_stays_nan():
+    padded = np.vstack([LANE, np.full((1, 4), np.nan)])
+    tif = crisp_to_neutrosophic(padded, np.array([1.5, -1.0, 0.25, 0.0]))
+    np.testing.assert_allclose(tif[0, :, 1], [1.0, 0.0, 0.25, 0.0])
+    assert np.isnan(tif[3]).all()
+
+
+def test_score_and_accuracy_functions():
+    tif = np.array([0.8, 0.2, 0.1])
+    assert score_function(tif) == pytest.approx(2.5 / 3)
+    assert accuracy_function(tif) == pytest.approx(0.7)
+    # The ideal triple scores 1, the anti-ideal 0
+    assert score_function(np.array([1.0, 0.0, 0.0])) == 1.0
+    assert score_function(np.array([0.0, 1.0, 1.0])) == 0.0
+
+
+def test_weighted_aggregate_is_the_weighted_mean():
+    aggregate = weighted_aggregate(crisp_to_neutrosophic(LANE), WEIGHTS * 10)
+    np.testing.assert_allclose(aggregate, [[1, 0, 0], [0, 0, 1], [0.5, 0, 0.5]])
+
+
+def test_closeness_matches_the_hand_computed_value():
+    # The first alternative is better on cost only; each criterion gap is 0 or 2/3,
+    # so its closeness is w_cost / (w_cost + sqrt(w_time^2 + w_reliability^2 + w_risk^2))
+    two = np.array([[100.0, 20.0, 0.8, 0.3], [200.0, 10.0, 0.9, 0.2]])
+    expected = 0.4 / (0.4 + np.sqrt(0.09 + 0.04 + 0.01))
+    np.testing.assert_allclose(closeness(neutrosophic_gaps(crisp_to_neutrosophic(two))), [expected, 1 - expected])
+
+
+def test_indeterminacy_breaks_a_crisp_tie():
+    tied = np.ones((2, 4))
+    indeterminacy = np.array([[0.6, 0, 0, 0], [0, 0, 0, 0]])
+    np.testing.assert_allclose(closeness(decision_gaps(tied, "topsis")), [1.0, 1.0])
+    np.testing.assert_allclose(closeness(decision_gaps(tied, "neutrosophic", indeterminacy)), [0.0, 1.0])
+
+
+def test_unknown_methods_are_rejected():
+    with pytest.raises(ValueError):
+        decision_gaps(LANE, "electre")
+
+
+def test_rank_endpoint_reports_neutrosophic_scores():
+    import main
+
+    alternatives = [
+        {"id": "certain", "cost": 100, "time": 10, "reliability": 0.9, "risk": 0.2},
+        {"id": "uncertain", "cost": 100, "time": 10, "reliability": 0.9, "risk": 0.2,
+         "indeterminacy": {"cost": 0.5, "time": 0.5}},
+    ]
+    response = TestClient(main.app).post("/api/rank", json={
+        "lanes": [{"laneId": "lane", "alternatives": alternatives}], "method": "neutrosophic"
+    })
+    assert response.status_code == 200
+    lane = response.json()["lanes"][0]
+    assert lane["bestAlternative"] == "certain"
+    ranked = {alt["id"]: alt for alt in lane["ranking"]}
+    assert ranked["certain"]["neutrosophicScore"] == pytest.approx(1.0)
+    assert ranked["uncertain"]["neutrosophicScore"] < 1.0
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.privacy_metrics import compute_privacy_metrics, earth_movers_distance
+
+
+def metrics(rows, sensitive="s"):
+    return compute_privacy_metrics(pd.DataFrame(rows, columns=["qi", sensitive]), ["qi"], sensitive)
+
+
+def test_k_anonymity_and_l_diversity_come_from_the_smallest_class():
+    result = metrics([("a", "x"), ("a", "x"), ("a", "y"), ("b", "y"), ("b", "z")])
+    assert result["kAnonymity"] == 2
+    assert result["lDiversity"] == 2
+    assert result["equivalenceClasses"] == 2
+
+
+def test_categorical_t_closeness_is_half_the_total_variation():
+    # Global x=.5 y=.25 z=.25; class a is all x, class b is half y half z
+    result = metrics([("a", "x"), ("a", "x"), ("b", "y"), ("b", "z")])
+    assert result["kAnonymity"] == 2
+    assert result["lDiversity"] == 1
+    assert result["tCloseness"] == pytest.approx(0.5)
+
+
+def test_categorical_t_closeness_ignores_the_order_of_category_labels():
+    rows = [("a", "x"), ("a", "y"), ("b", "z"), ("b", "z"), ("c", "x"), ("c", "z")]
+    relabelled = [(qi, {"x": "z", "z": "x"}.get(s, s)) for qi, s in rows]
+    assert metrics(rows)["tCloseness"] == pytest.approx(metrics(relabelled)["tCloseness"])
+
+
+def test_ordered_emd_matches_the_salary_example():
+    # Li et al.: salaries 3k..11k, one class holding {3k, 4k, 5k}
+    global_dist = np.full(9, 1 / 9)
+    class_dist = np.array([[1 / 3, 1 / 3, 1 / 3, 0, 0, 0, 0, 0, 0]])
+    assert earth_movers_distance(class_dist, global_dist, ordered=True)[0] == pytest.approx(0.375)
+    # The same class over unordered categories only counts the mass that moves
+    assert earth_movers_distance(class_dist, global_dist, ordered=False)[0] == pytest.approx(2 / 3)
+
+
+def test_numeric_sensitive_values_use_the_ordered_distance():
+    # Two classes at opposite ends of a numeric range, half the rows each
+    rows = [("low", 1.0)] * 5 + [("high", 100.0)] * 5
+    result = metrics(rows)
+    assert result["lDiversity"] == 1
+    assert result["tCloseness"] == pytest.approx(0.5)
+
+
+def test_quasi_identifiers_include_the_weight_band():
+    df = pd.DataFrame({"weight_kg": ["50", "80", "600", "700"], "carrier_cost": ["1", "2", "3", "4"]})
+    result = compute_privacy_metrics(df, ["weight_band"])
+    assert result["kAnonymity"] == 2
+    assert result["equivalenceClasses"] == 2
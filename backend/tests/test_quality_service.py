@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+from services.dependencies import get_groq_service
+from services.shipment_history import load_base_shipments
+from services.shipment_features import BASE_DATA_PATH
+
+
+@pytest.fixture
+def client():
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def groq_unavailable(monkeypatch):
+    """GroqService creation fails as it does without GROQ_API_KEY"""
+    import services.groq_service as groq_service
+
+    def missing_key():
+        raise ValueError("GROQ_API_KEY environment variable is required")
+
+    get_groq_service.close()
+    monkeypatch.setattr(groq_service, "create_llm_backend", missing_key)
+    yield
+    get_groq_service.close()
+
+
+@pytest.fixture(scope="module")
+def base_rows():
+    return load_base_shipments(BASE_DATA_PATH).head(40).astype("string").fillna("").to_dict("records")
+
+
+def test_scores_need_no_groq(client, groq_unavailable, base_rows):
+    response = client.post("/api/groq/analyze-dataset", json=base_rows)
+    assert response.status_code == 200
+    report = response.json()
+    assert 0 <= report["qualityScore"] <= 100
+    assert report["metrics"]["rows"] == len(base_rows)
+    # Every row is a copy of a reference row
+    assert report["metrics"]["referenceCopyRate"] == 1.0
+    assert not get_groq_service.created
+
+
+def test_narrative_without_groq_keeps_the_scores(client, groq_unavailable, base_rows):
+    plain = client.post("/api/groq/analyze-dataset", json=base_rows).json()
+    response = client.post("/api/groq/analyze-dataset?narrative=true", json=base_rows)
+    assert response.status_code == 200
+    assert response.json() == plain
+
+
+def test_narrative_replaces_the_local_summary(client, base_rows):
+    from services.llm_client import LLMClient, StubBackend
+
+    get_groq_service.close()
+    groq_service = get_groq_service()
+    groq_service.llm = LLMClient(StubBackend(lambda model, messages: "Looks like the reference data."))
+    try:
+        response = client.post("/api/groq/analyze-dataset?narrative=true", json=base_rows)
+    finally:
+        get_groq_service.close()
+    assert response.status_code == 200
+    assert response.json()["analysis"] == "Looks like the reference data."
+
+
+def test_empty_datasets_are_rejected(client, groq_unavailable):
+    response = client.post("/api/groq/analyze-dataset", json=[])
+    assert response.status_code == 400
@@ -0,0 +1,104 @@
+import asyncio
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from services.quote_service import score_quotes
+from services.shipment_features import FORWARDER_COLUMNS, parse_numeric, quote_matrix, read_shipment_upload
+
+TSV_HEADER = "request_reference\tkuehne_nagel\tdhl_express\n"
+# Every forwarder equally fast, reliable and risky, so only the quotes decide
+EQUAL_PROFILES = np.ones((len(FORWARDER_COLUMNS), 3))
+
+
+@pytest.fixture
+def client():
+    import main
+
+    return TestClient(main.app)
+
+
+def test_uploads_past_the_limit_are_rejected_with_413(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "QUOTE_UPLOAD_MAX_BYTES", 64)
+    upload = (TSV_HEADER + "SR-1\t1,000\t2,000\n" * 10).encode()
+    response = client.post("/api/quotes/score", files={"file": ("quotes.tsv", upload, "text/tab-separated-values")})
+    assert response.status_code == 413
+
+
+class UnsizedUpload:
+    """An upload whose size is unknown up front, read in chunks"""
+
+    size = None
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.reads = 0
+
+    async def read(self, n: int) -> bytes:
+        chunk, self.content = self.content[:n], self.content[n:]
+        self.reads += 1
+        return chunk
+
+
+def test_unsized_uploads_stop_being_read_past_the_limit(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "UPLOAD_CHUNK_BYTES", 10)
+    upload = UnsizedUpload(b"x" * 1000)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.read_upload(upload, 25))
+    assert error.value.status_code == 413
+    assert upload.reads == 3
+
+
+def test_uploads_within_the_limit_are_read_whole(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "UPLOAD_CHUNK_BYTES", 10)
+    assert asyncio.run(main.read_upload(UnsizedUpload(b"y" * 25), 25)) == b"y" * 25
+
+
+def test_numbers_with_thousands_separators_parse():
+    parsed = parse_numeric(["18,681", " 1,234.5 ", "", "n/a", "1,000,000"])
+    np.testing.assert_array_equal(parsed, [18681.0, 1234.5, np.nan, np.nan, 1_000_000.0])
+    np.testing.assert_array_equal(parse_numeric([1.5, 2.0]), [1.5, 2.0])
+
+
+def test_separated_quotes_survive_tsv_and_quoted_csv():
+    tsv = read_shipment_upload((TSV_HEADER + "SR-1\t18,681\t2,000\n").encode(), "quotes.tsv")
+    csv = read_shipment_upload(b'request_reference,kuehne_nagel,dhl_express\nSR-1,"18,681","2,000"\n', "quotes.csv")
+    for df in (tsv, csv):
+        quotes = quote_matrix(df)
+        assert quotes[0, FORWARDER_COLUMNS.index("kuehne_nagel")] == 18681.0
+        assert quotes[0, FORWARDER_COLUMNS.index("dhl_express")] == 2000.0
+
+
+def test_zero_and_missing_quotes_do_not_count():
+    df = read_shipment_upload((TSV_HEADER + "SR-1\t0\t\nSR-2\t-5\t1,500\n").encode(), "quotes.tsv")
+    shipments = score_quotes(df, np.array([0.25, 0.25, 0.25, 0.25]), EQUAL_PROFILES)
+
+    assert shipments[0].bestForwarder is None and shipments[0].scores == {}
+    assert shipments[1].bestForwarder == "dhl_express"
+    assert shipments[1].scores == {"dhl_express": 1.0}
+
+
+def test_the_cheapest_of_equal_forwarders_wins():
+    df = read_shipment_upload((TSV_HEADER + "SR-1\t1,200\t1,150\nSR-2\t900\t1,900\n").encode(), "quotes.tsv")
+    shipments = score_quotes(df, np.array([0.4, 0.3, 0.2, 0.1]), EQUAL_PROFILES)
+
+    assert [(s.requestReference, s.bestForwarder, s.bestCost) for s in shipments] == [
+        ("SR-1", "dhl_express", 1150.0), ("SR-2", "kuehne_nagel", 900.0)
+    ]
+    assert shipments[0].bestForwarderName == "DHL Express"
+    assert shipments[1].scores == {"kuehne_nagel": 1.0, "dhl_express": 0.0}
+
+
+def test_the_endpoint_scores_separated_quotes(client):
+    upload = (TSV_HEADER + "SR-1\t18,681\t2,000\n").encode()
+    response = client.post("/api/quotes/score", files={"file": ("quotes.tsv", upload, "text/tab-separated-values")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["scoredRows"] == 1 and body["unscoredRows"] == 0
+    assert set(body["shipments"][0]["scores"]) == {"kuehne_nagel", "dhl_express"}
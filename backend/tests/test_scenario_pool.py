@@ -0,0 +1,138 @@
+import uuid
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from models.schemas import DatasetMetadata, GenerationJob, JobStatus, PrivacyMetrics, SyntheticDataset
+from services.job_store import SQLJobStore
+from services.scenario_pool import SCENARIOS, ScenarioPool
+
+VERSION = "history-v2"
+
+
+class FakeGenerationService:
+    """Starts jobs by storing them pending, as the real service does before a worker picks them up"""
+
+    def __init__(self, store):
+        self.store = store
+        self.started = []
+        self.cancelled = []
+
+    async def start_generation(self, config, deduplicate=True):
+        job = GenerationJob(
+            id=str(uuid.uuid4()), status=JobStatus.PENDING, progress=0, config=config, createdAt=datetime.utcnow()
+        )
+        self.store.put_generation_job(job)
+        self.started.append(job.id)
+        return job
+
+    async def cancel_job(self, job_id, reason=None):
+        self.cancelled.append(job_id)
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    import services.scenario_pool as scenario_pool
+
+    monkeypatch.setattr(scenario_pool, "base_history_version", lambda: VERSION)
+    pool = ScenarioPool(size=2, max_age_seconds=0)
+    pool.store = SQLJobStore(f"sqlite:///{tmp_path / 'jobs.db'}")
+    pool.mostly_service = FakeGenerationService(pool.store)
+    # Top-ups are exercised on their own; here they would refill the pool behind the test's back
+    monkeypatch.setattr(pool, "schedule_top_up", lambda: None)
+    return pool
+
+
+def pooled_job(pool, status: JobStatus, version: str = VERSION, scenario: str = "peak_season") -> GenerationJob:
+    job = GenerationJob(
+        id=str(uuid.uuid4()), status=status, progress=0, config=SCENARIOS[scenario], createdAt=datetime.utcnow()
+    )
+    pool.store.put_generation_job(job)
+    pool.store.add_scenario_pool_entry(scenario, job.id, version)
+    return job
+
+
+def acquire(pool, scenario: str = "peak_season") -> GenerationJob:
+    return asyncio.run(pool.acquire(scenario))
+
+
+def test_completed_jobs_are_handed_out_before_in_flight_ones(pool):
+    in_flight = pooled_job(pool, JobStatus.RUNNING)
+    completed = pooled_job(pool, JobStatus.COMPLETED)
+
+    assert acquire(pool).id == completed.id
+    assert acquire(pool).id == in_flight.id
+    assert pool.store.scenario_pool_entries("peak_season") == []
+    assert pool.mostly_service.started == []
+
+
+def test_each_pooled_job_is_handed_out_once(pool):
+    pooled = pooled_job(pool, JobStatus.COMPLETED)
+
+    async def run():
+        return await asyncio.gather(*(pool.acquire("peak_season") for _ in range(4)))
+
+    jobs = asyncio.run(run())
+    assert [job.id for job in jobs].count(pooled.id) == 1
+    assert len(pool.mostly_service.started) == 3
+
+
+def test_an_empty_pool_starts_a_new_job(pool):
+    job = acquire(pool)
+    assert pool.mostly_service.started == [job.id]
+    assert job.config == SCENARIOS["peak_season"]
+
+
+def test_jobs_from_an_older_base_history_are_not_handed_out(pool):
+    pooled_job(pool, JobStatus.COMPLETED, version="history-v1")
+    assert acquire(pool).id == pool.mostly_service.started[0]
+
+
+def test_failed_and_settled_jobs_are_not_handed_out(pool):
+    pooled_job(pool, JobStatus.FAILED)
+    pooled_job(pool, JobStatus.CANCELLED)
+    assert acquire(pool).id == pool.mostly_service.started[0]
+
+
+def test_top_up_discards_stale_jobs_and_fills_every_scenario(pool):
+    stale = pooled_job(pool, JobStatus.RUNNING, version="history-v1")
+    current = pooled_job(pool, JobStatus.COMPLETED)
+
+    asyncio.run(pool.top_up())
+
+    assert pool.mostly_service.cancelled == [stale.id]
+    entries = pool.store.scenario_pool_entries("peak_season")
+    assert [job_id for job_id, _, _ in entries][0] == current.id
+    assert len(entries) == pool.size
+    for scenario in SCENARIOS:
+        assert {version for _, version, _ in pool.store.scenario_pool_entries(scenario)} == {VERSION}
+        assert len(pool.store.scenario_pool_entries(scenario)) == pool.size
+
+
+def test_top_up_leaves_a_full_pool_alone(pool):
+    for scenario in SCENARIOS:
+        for _ in range(pool.size):
+            pooled_job(pool, JobStatus.COMPLETED, scenario=scenario)
+
+    asyncio.run(pool.top_up())
+    assert pool.mostly_service.started == []
+    assert pool.mostly_service.cancelled == []
+
+
+def test_jobs_past_the_maximum_age_are_stale(pool):
+    pool.max_age_seconds = 60
+    now = datetime.utcnow()
+    assert not pool._stale(VERSION, now, VERSION)
+    assert pool._stale(VERSION, now - timedelta(minutes=2), VERSION)
+
+
+def test_pooled_datasets_are_listed_once_handed_out(pool):
+    job = pooled_job(pool, JobStatus.COMPLETED)
+    metadata = DatasetMetadata(
+        generatedAt=datetime.utcnow(), recordCount=10, sourceHash="hash", scenario="stress_test",
+        privacyMetrics=PrivacyMetrics(kAnonymity=5, lDiversity=2, tCloseness=0.1)
+    )
+    pool.store.put_dataset(SyntheticDataset(id="pooled-dataset", jobId=job.id, metadata=metadata))
+    assert pool.store.list_datasets() == []
+
+    assert acquire(pool).id == job.id
+    assert [dataset.id for dataset in pool.store.list_datasets()] == ["pooled-dataset"]
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from services.mcda import topsis_gaps
+from services.sensitivity import one_at_a_time_weights, weight_sensitivity, winner_thresholds
+
+# Alternative 0 is cheaper, alternative 1 faster by the same margin; the rest tie.
+# Alternative 0 therefore wins exactly while the cost weight exceeds the time weight.
+MIRRORED = np.array([[[100.0, 200.0, 0.9, 0.2], [200.0, 100.0, 0.9, 0.2]]])
+WEIGHTS = np.array([0.4, 0.3, 0.2, 0.1])
+STEPS = 300
+
+
+def test_sweeps_rescale_the_other_criteria_in_proportion():
+    grid, sweeps = one_at_a_time_weights(WEIGHTS, 4)
+    np.testing.assert_allclose(sweeps.sum(axis=-1), 1.0)
+    # Cost at 0.5 leaves time, reliability and risk at half their 3:2:1 share
+    np.testing.assert_allclose(sweeps[0, 2], [0.5, 0.25, 0.5 / 3, 0.5 / 6])
+
+
+def test_winner_flips_where_cost_and_time_weights_cross():
+    thresholds = winner_thresholds(topsis_gaps(MIRRORED), WEIGHTS, np.array([0]), STEPS)
+
+    # Cost sweep: time is 0.5 * (1 - cost), which overtakes cost below 1/3
+    assert thresholds["lowerWeight"][0, 0] == pytest.approx(99 / STEPS)
+    assert thresholds["lowerWinner"][0, 0] == 1
+    assert np.isnan(thresholds["upperWeight"][0, 0]) and thresholds["upperWinner"][0, 0] == -1
+
+    # Time sweep: cost is 4/7 * (1 - time), which time overtakes above 4/11
+    assert thresholds["upperWeight"][1, 0] == pytest.approx(110 / STEPS)
+    assert thresholds["upperWinner"][1, 0] == 1
+    assert np.isnan(thresholds["lowerWeight"][1, 0])
+
+    # Reliability and risk keep the cost:time ratio, so the winner never changes
+    assert np.isnan(thresholds["lowerWeight"][2:]).all() and np.isnan(thresholds["upperWeight"][2:]).all()
+
+
+def test_rank_probabilities_of_balanced_weights_split_evenly():
+    result = weight_sensitivity(
+        topsis_gaps(MIRRORED), np.array([0.3, 0.3, 0.2, 0.2]), samples=20000, concentration=50,
+        threshold_steps=STEPS, seed=7
+    )
+    probabilities = result["rankProbabilities"][0]
+    np.testing.assert_allclose(probabilities.sum(axis=0), 1.0)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+    # Dirichlet draws around equal cost and time weights favour either side equally
+    assert probabilities[0, 0] == pytest.approx(0.5, abs=0.02)
+
+
+def test_concentrated_draws_keep_a_clear_winner():
+    result = weight_sensitivity(
+        topsis_gaps(MIRRORED), np.array([0.7, 0.1, 0.1, 0.1]), samples=5000, concentration=1000,
+        threshold_steps=STEPS, seed=7
+    )
+    assert result["baseWinner"].tolist() == [0]
+    assert result["baseRanks"].tolist() == [[1, 2]]
+    assert result["rankProbabilities"][0, 0, 0] == 1.0
+
+
+def test_samples_are_reproducible_with_a_seed():
+    gaps = topsis_gaps(MIRRORED)
+    first = weight_sensitivity(gaps, WEIGHTS, samples=500, concentration=20, threshold_steps=10, seed=3)
+    second = weight_sensitivity(gaps, WEIGHTS, samples=500, concentration=20, threshold_steps=10, seed=3)
+    np.testing.assert_array_equal(first["rankProbabilities"], second["rankProbabilities"])
+
+
+def test_chunking_does_not_change_the_tally(monkeypatch):
+    import services.sensitivity as sensitivity
+
+    gaps = topsis_gaps(MIRRORED)
+    whole = weight_sensitivity(gaps, WEIGHTS, samples=500, concentration=20, threshold_steps=10, seed=3)
+    monkeypatch.setattr(sensitivity, "SENSITIVITY_CHUNK_ELEMENTS", 16)
+    chunked = weight_sensitivity(gaps, WEIGHTS, samples=500, concentration=20, threshold_steps=10, seed=3)
+    np.testing.assert_array_equal(whole["rankProbabilities"], chunked["rankProbabilities"])
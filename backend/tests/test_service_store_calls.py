@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from services.dependencies import get_job_store, get_mostly_service, get_training_service
+
+
+def record_calling_threads(monkeypatch, store, *names):
+    """Wrap store methods to note which thread calls them"""
+    threads = []
+    for name in names:
+        method = getattr(store, name)
+
+        def wrapper(*args, _method=method, **kwargs):
+            threads.append(threading.current_thread())
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(store, name, wrapper)
+    return threads
+
+
+def test_training_reads_leave_the_event_loop(monkeypatch):
+    service = get_training_service()
+    threads = record_calling_threads(
+        monkeypatch, get_job_store(), "get_training_job", "list_training_jobs", "get_weight_matrix"
+    )
+
+    async def run():
+        await service.get_training_job("missing")
+        await service.list_training_jobs(limit=1)
+        await service.get_latest_weights()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert threads and loop_thread not in threads
+
+
+def test_generation_store_calls_leave_the_event_loop(monkeypatch):
+    service = get_mostly_service()
+    threads = record_calling_threads(
+        monkeypatch, get_job_store(), "get_generation_job", "get_dataset", "get_dataset_by_job", "list_datasets"
+    )
+
+    async def run():
+        await service.get_job_status("missing")
+        await service.cancel_job("missing")
+        await service.get_dataset("missing")
+        await service.get_dataset_by_id("missing")
+        await service.list_datasets(limit=1)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 5 and loop_thread not in threads
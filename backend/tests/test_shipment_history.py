@@ -0,0 +1,68 @@
+import os
+import pyarrow as pa
+import pytest
+from services.shipment_history import ShipmentHistory, parse_numeric_column
+
+HEADER = "request_reference\tcarrier\tcarrier_cost\tweight_kg\n"
+
+
+def write_history(path, rows, mtime=None):
+    path.write_text(HEADER + "".join("\t".join(row) + "\n" for row in rows))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ShipmentHistory(str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "shipments.tsv"
+    write_history(path, [("SR-1", "DHL", "18,681", "1,200.5"), ("SR-2", "AGL", "n/a", "")], mtime=1_000_000)
+    return path
+
+
+def test_numbers_with_separators_become_floats_and_the_rest_null():
+    parsed = parse_numeric_column(pa.chunked_array([[" 18,681 ", "1,200.5", "-3e2", "n/a", "", None, "1.2.3"]]))
+    assert parsed.to_pylist() == [18681.0, 1200.5, -300.0, None, None, None, None]
+
+
+def test_history_is_typed(history, source):
+    table = history.table(str(source))
+    assert table.schema.field("carrier_cost").type == pa.float64()
+    assert table.schema.field("carrier").type == pa.string()
+    assert table.column("carrier_cost").to_pylist() == [18681.0, None]
+    assert table.column("weight_kg").to_pylist() == [1200.5, None]
+
+
+def test_unchanged_sources_are_served_from_the_mapped_table(history, source):
+    first = history.table(str(source))
+    assert history.table(str(source)) is first
+    # A fresh cache in another process maps the same file instead of reparsing
+    other = ShipmentHistory(history.directory)
+    assert other.version(str(source)) == history.version(str(source))
+    assert len(os.listdir(history.directory)) == 1
+
+
+def test_a_touched_but_identical_source_keeps_its_version(history, source):
+    version = history.version(str(source))
+    os.utime(source, (2_000_000, 2_000_000))
+    assert history.version(str(source)) == version
+    assert len(os.listdir(history.directory)) == 1
+
+
+def test_changed_content_rebuilds_and_drops_the_old_file(history, source):
+    version = history.version(str(source))
+    write_history(source, [("SR-1", "DHL", "19,000", "1,200.5")], mtime=3_000_000)
+
+    assert history.version(str(source)) != version
+    assert history.table(str(source)).column("carrier_cost").to_pylist() == [19000.0]
+    assert os.listdir(history.directory) == [f"{history.version(str(source))}.arrow"]
+
+
+def test_frames_are_private_copies(history, source):
+    frame = history.frame(str(source))
+    frame.loc[0, "carrier"] = "changed"
+    assert history.frame(str(source)).loc[0, "carrier"] == "DHL"
@@ -79,6 +79,9 @@ export const SyntheticDataManager: React.FC<SyntheticDataManagerProps> = ({ onDa
             humorToast("✅ Generation Complete", `${updatedJob.recordsGenerated || 0} synthetic records created!`, 3000);
             onDataGenerated?.();
             await loadStats();
+          } else if (updatedJob.status === 'cancelled') {
+            clearInterval(pollInterval);
+            humorToast("⏹️ Generation Cancelled", updatedJob.error || "The job was cancelled", 3000);
           } else if (updatedJob.status === 'failed') {
             clearInterval(pollInterval);
             humorToast("❌ Generation Failed", updatedJob.error || "Unknown error", 4000);
@@ -113,6 +116,9 @@ export const SyntheticDataManager: React.FC<SyntheticDataManagerProps> = ({ onDa
           if (updatedJob.status === 'completed') {
             clearInterval(pollInterval);
             humorToast("✅ Training Complete", "Model weights updated successfully!", 3000);
+          } else if (updatedJob.status === 'cancelled') {
+            clearInterval(pollInterval);
+            humorToast("⏹️ Training Cancelled", updatedJob.error || "The job was cancelled", 3000);
           } else if (updatedJob.status === 'failed') {
             clearInterval(pollInterval);
             humorToast("❌ Training Failed", updatedJob.error || "Unknown error", 4000);
@@ -11,7 +11,7 @@ export interface SyntheticDataConfig {
 
 export interface GenerationJob {
   id: string;
-  status: 'pending' | 'running' | 'completed' | 'failed';
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
   progress: number;
   config: SyntheticDataConfig;
   createdAt: string;
@@ -37,6 +37,18 @@ export interface SyntheticDataset {
   };
 }
 
+export interface DatasetPage {
+  datasetId: string;
+  offset: number;
+  limit: number;
+  total: number;
+  columns: string[];
+  records: any[];
+}
+
+// The largest page the backend serves
+const ROWS_PAGE_SIZE = 10000;
+
 class SyntheticDataService {
   private static instance: SyntheticDataService;
   private baseURL: string;
@@ -153,9 +165,12 @@ class SyntheticDataService {
         return cached;
       }
 
-      // Fetch from backend
+      // Fetch metadata, then page the rows instead of loading them in one response
       const response = await axios.get(`${this.baseURL}/synthetic/datasets/${jobId}`);
-      const dataset: SyntheticDataset = response.data;
+      const dataset: SyntheticDataset = {
+        ...response.data,
+        records: await this.getDatasetRows(response.data.id)
+      };
       
       // Cache in memory and IndexedDB
       this.cache.set(jobId, dataset);
@@ -168,6 +183,23 @@ class SyntheticDataService {
     }
   }
 
+  /**
+   * Read every row of a dataset, one page at a time
+   */
+  async getDatasetRows(datasetId: string): Promise<any[]> {
+    const records: any[] = [];
+    for (;;) {
+      const response = await axios.get(`${this.baseURL}/synthetic/datasets/${datasetId}/rows`, {
+        params: { offset: records.length, limit: ROWS_PAGE_SIZE }
+      });
+      const page: DatasetPage = response.data;
+      records.push(...page.records);
+      if (page.records.length === 0 || records.length >= page.total) {
+        return records;
+      }
+    }
+  }
+
   /**
    * List all available synthetic datasets
    */
@@ -36,7 +36,7 @@ export interface WeightMatrix {
 
 export interface TrainingJob {
   id: string;
-  status: 'pending' | 'running' | 'completed' | 'failed';
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
   progress: number;
   stage: 'preprocessing' | 'feature_extraction' | 'model_training' | 'validation' | 'deployment';
   startedAt: string;